@@ -3,9 +3,10 @@
 Script to analyze the HCPCS Transaction Report xlsx file structure
 """
 
-import pandas as pd
 from pathlib import Path
 
+from medical_codes.excel import Workbook
+
 def analyze_hcpcs_file():
     file_path = "/Users/michaeldadi/Downloads/hcpc2025_oct_anweb_v4/HCPC2025_OCT_ANWEB_Transaction Report_v4.xlsx"
     
@@ -14,35 +15,47 @@ def analyze_hcpcs_file():
         return
     
     try:
-        # Read the Excel file to get sheet names
-        xl_file = pd.ExcelFile(file_path)
-        print(f"Sheet names: {xl_file.sheet_names}")
-        
-        # Read each sheet and analyze structure
-        for sheet_name in xl_file.sheet_names:
-            print(f"\n=== Sheet: {sheet_name} ===")
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            print(f"Shape: {df.shape}")
-            print(f"Columns: {list(df.columns)}")
-            
-            # Show first few rows
-            print("\nFirst 5 rows:")
-            print(df.head())
-            
-            # Show data types
-            print(f"\nData types:")
-            print(df.dtypes)
-            
-            # Check for unique values in key columns
-            if len(df.columns) > 0:
-                first_col = df.columns[0]
-                print(f"\nUnique values in first column ({first_col}): {df[first_col].nunique()}")
-                print(f"Sample values: {df[first_col].dropna().head(10).tolist()}")
-            
-            print("\n" + "="*60)
+        # Open the workbook once; every sheet is read from the same handle
+        with Workbook(file_path) as book:
+            print(f"Sheet names: {book.sheet_names}")
+
+            # Read each sheet and analyze structure
+            for sheet_name in book.sheet_names:
+                analyze_sheet(book, sheet_name)
     
     except Exception as e:
         print(f"Error analyzing file: {e}")
 
+def analyze_sheet(book, sheet_name):
+    """Print the shape, columns and sample values of one sheet, one chunk at a time."""
+    print(f"\n=== Sheet: {sheet_name} ===")
+    chunks = book.iter_frames(sheet_name)
+    df = next(chunks, None)
+    if df is None:
+        print("Empty sheet")
+        print("\n" + "="*60)
+        return
+    rows = len(df)
+    first_values = set(df.iloc[:, 0].dropna()) if len(df.columns) > 0 else set()
+    for chunk in chunks:
+        rows += len(chunk)
+        if len(chunk.columns) > 0:
+            first_values.update(chunk.iloc[:, 0].dropna())
+
+    print(f"Shape: {(rows, len(df.columns))}")
+    print(f"Columns: {list(df.columns)}")
+    
+    # Show first few rows
+    print("\nFirst 5 rows:")
+    print(df.head())
+    
+    # Check for unique values in key columns
+    if len(df.columns) > 0:
+        first_col = df.columns[0]
+        print(f"\nUnique values in first column ({first_col}): {len(first_values)}")
+        print(f"Sample values: {df[first_col].dropna().head(10).tolist()}")
+    
+    print("\n" + "="*60)
+
 if __name__ == "__main__":
     analyze_hcpcs_file()
\ No newline at end of file
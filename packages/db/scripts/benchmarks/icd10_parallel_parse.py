@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs multi-process parsing of the ICD-10 order file.
+
+Generates a synthetic icd10cm_order file and times process_icd10_txt_file for
+an increasing number of worker processes, reporting the speedup over serial.
+
+Usage: python benchmarks/icd10_parallel_parse.py [--lines 98000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_icd10_order_file
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def load_processor():
+    """Import process-medical-codes-updated.py as a module."""
+    spec = importlib.util.spec_from_file_location(
+        'process_medical_codes_updated', SCRIPTS_DIR / 'process-medical-codes-updated.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes (forked) can unpickle its functions
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_run(processor, path, workers, repeat):
+    """Return the best wall time and code count over ``repeat`` runs."""
+    best = None
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, count = processor.process_icd10_txt_file(path, workers)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=98000)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--input', help="existing order file to use instead of synthetic data")
+    args = parser.parse_args()
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        multiprocessing.set_start_method('fork')
+
+    processor = load_processor()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = args.input
+        if not path:
+            path = os.path.join(temp_dir, 'icd10cm_order_synthetic.txt')
+            write_icd10_order_file(path, args.lines)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Input: {path} ({size_mb:.1f} MB), {cpu_count} CPUs")
+        print(f"{'workers':>8} {'seconds':>9} {'codes':>8} {'codes/s':>10} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            elapsed, count = time_run(processor, path, workers, args.repeat)
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>8} {elapsed:>9.3f} {count:>8} {count / elapsed:>10.0f} "
+                f"{baseline / elapsed:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
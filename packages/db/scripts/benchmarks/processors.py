@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmark every processor on synthetic inputs and record the results as JSON.
+
+Generates an ICD-10 order file (and the legacy ICD-10 workbook), an HCPCS
+transaction workbook, a CPT DHS addendum workbook and a CARC/RARC list at
+the requested scale, then runs each process_* function in a fresh process.
+For each one it reports the best wall time, rows per second, peak RSS and
+the size of the generated SQL. The icd10-parse benchmarks time only the
+parse of the order file: the whitespace-splitting parser the processor used
+to have against medical_codes.icd10.
+
+Runs are stored as JSON (--output) so that a later run can be compared
+against them (--compare).
+
+Usage: python benchmarks/processors.py [--icd10-lines 100000] [--scale 2]
+           [--only icd10 hcpcs] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import (
+    write_carc_rarc_workbook,
+    write_cpt_workbook,
+    write_hcpcs_workbook,
+    write_icd10_order_file,
+    write_icd10_workbook,
+)
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# name: (script, function, input kind); the function takes the input path only.
+# A script of None means a function of this file.
+BENCHMARKS = {
+    'icd10': ('process-medical-codes-updated.py', 'process_icd10_txt_file', 'icd10'),
+    'hcpcs': ('process-medical-codes-updated.py', 'process_hcpcs_file', 'hcpcs'),
+    'cpt': ('process-medical-codes-updated.py', 'process_cpt_file', 'cpt'),
+    'icd10-legacy': ('process-medical-codes.py', 'process_icd10_file', 'icd10_xlsx'),
+    'cpt-legacy': ('process-medical-codes.py', 'process_cpt_file', 'cpt'),
+    'carc-rarc': ('process-carc-rarc-codes.py', 'process_carc_rarc_file', 'carc_rarc'),
+    'modifiers': ('process-modifier-codes.py', 'generate_modifier_codes_sql', None),
+    'icd10-parse-split': (None, 'parse_icd10_split', 'icd10'),
+    'icd10-parse': (None, 'parse_icd10_fixed_width', 'icd10'),
+}
+
+INPUT_WRITERS = {
+    'icd10': ('icd10cm_order_synthetic.txt', write_icd10_order_file),
+    'icd10_xlsx': ('valid_icd10_synthetic.xlsx', write_icd10_workbook),
+    'hcpcs': ('hcpcs_transactions_synthetic.xlsx', write_hcpcs_workbook),
+    'cpt': ('dhs_addendum_synthetic.xlsx', write_cpt_workbook),
+    'carc_rarc': ('carc_rarc_synthetic.xlsx', write_carc_rarc_workbook),
+}
+
+
+def load_script(filename):
+    """Import one of the hyphen-named processor scripts as a module."""
+    name = filename[:-len('.py')].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_icd10_split(path):
+    """The order file parse process_icd10_txt_file did before medical_codes.icd10."""
+    rows = 0
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(None, 4)
+            if len(parts) < 5:
+                continue
+            record = (parts[0], parts[1].strip(), parts[2], parts[3], parts[4])
+            rows += 1
+    return None, rows
+
+
+def parse_icd10_fixed_width(path):
+    """The streaming fixed-width parse, without the SQL formatting."""
+    from medical_codes.icd10 import parse_icd10_order_file
+
+    rows = 0
+    for record in parse_icd10_order_file(path):
+        rows += 1
+    return None, rows
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is bytes on macOS, KiB elsewhere)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_benchmark(name, input_path, repeat, results):
+    """Child process body: time one processor and put its measurements on ``results``."""
+    script, function_name, _ = BENCHMARKS[name]
+    function = getattr(load_script(script), function_name) if script else globals()[function_name]
+    baseline_rss = peak_rss_mb()
+    args = (input_path,) if input_path else ()
+
+    timings = []
+    sql, rows = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sql, rows = function(*args)
+        timings.append((time.perf_counter() - started, time.process_time() - cpu_started))
+
+    seconds, cpu_seconds = min(timings)
+    results.put({
+        'benchmark': name,
+        'function': f"{script or Path(__file__).name}:{function_name}",
+        'input_bytes': os.path.getsize(input_path) if input_path else 0,
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'cpu_seconds': round(cpu_seconds, 4),
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'baseline_rss_mb': round(baseline_rss, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'output_bytes': len(sql.encode('utf-8')) if sql else 0,
+    })
+
+
+def measure(context, name, input_path, repeat):
+    """Run one benchmark in a fresh process so peak RSS is its own."""
+    results = context.Queue()
+    process = context.Process(target=run_benchmark, args=(name, input_path, repeat, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {'benchmark': name, 'error': f"exit code {process.exitcode}"}
+    return results.get()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {entry['benchmark']: entry for entry in (baseline or {}).get('results', [])}
+    header = (
+        f"{'benchmark':<12} {'rows':>9} {'seconds':>9} {'rows/s':>10} "
+        f"{'peak MB':>8} {'output MB':>10}"
+    )
+    print(header + ('   vs baseline' if previous else ''))
+    for entry in results:
+        if 'error' in entry:
+            print(f"{entry['benchmark']:<12} failed: {entry['error']}")
+            continue
+        line = (
+            f"{entry['benchmark']:<12} {entry['rows']:>9} {entry['seconds']:>9.3f} "
+            f"{entry['rows_per_second'] or 0:>10.0f} {entry['peak_rss_mb']:>8.1f} "
+            f"{entry['output_bytes'] / 1024 / 1024:>10.2f}"
+        )
+        before = previous.get(entry['benchmark'])
+        if before and before.get('seconds'):
+            line += f"   {before['seconds'] / entry['seconds']:.2f}x speed, "
+            line += f"{entry['peak_rss_mb'] - before['peak_rss_mb']:+.1f} MB"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--icd10-lines', type=int, default=100000)
+    parser.add_argument('--icd10-xlsx-rows', type=int, default=20000)
+    parser.add_argument('--hcpcs-rows', type=int, default=10000)
+    parser.add_argument('--cpt-rows', type=int, default=10000)
+    parser.add_argument('--carc-rarc-rows', type=int, default=2000)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier for every size")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per benchmark (best kept)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument('--output', help="JSON file to write the results to")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--input-dir', help="keep the generated inputs here (reused if present)")
+    args = parser.parse_args()
+
+    sizes = {
+        'icd10': args.icd10_lines,
+        'icd10_xlsx': args.icd10_xlsx_rows,
+        'hcpcs': args.hcpcs_rows,
+        'cpt': args.cpt_rows,
+        'carc_rarc': args.carc_rarc_rows,
+    }
+    sizes = {kind: max(1, int(size * args.scale)) for kind, size in sizes.items()}
+    names = args.only or list(BENCHMARKS)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    # Spawned children start from a bare interpreter, so peak RSS is not inherited
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(args.input_dir or temp_dir)
+        input_dir.mkdir(parents=True, exist_ok=True)
+        inputs = {}
+        for kind in sorted({BENCHMARKS[name][2] for name in names} - {None}):
+            filename, writer = INPUT_WRITERS[kind]
+            path = input_dir / f"{sizes[kind]}-{filename}"
+            if not path.exists():
+                print(f"Generating {path.name}...")
+                writer(path, sizes[kind])
+            inputs[kind] = str(path)
+
+        results = []
+        for name in names:
+            kind = BENCHMARKS[name][2]
+            print(f"Running {name}...")
+            results.append(measure(context, name, inputs.get(kind), args.repeat))
+
+    report = {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sizes': sizes,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    print()
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
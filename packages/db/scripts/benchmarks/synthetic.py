@@ -0,0 +1,139 @@
+"""
+Synthetic inputs shaped like the real CMS/AMA/X12 source files.
+
+Every generator is seeded, so the same arguments always produce the same
+file and benchmark runs stay comparable.
+"""
+
+import random
+
+from openpyxl import Workbook
+
+WORDS = (
+    "acute chronic disease of the left right bilateral knee hip with without complication "
+    "type 2 diabetes mellitus neuropathy fracture initial subsequent encounter sequela "
+    "unspecified other specified displaced nondisplaced patient's"
+).split()
+
+PROCEDURE_WORDS = (
+    "injection infusion catheter supply per unit each wheelchair orthosis prosthesis "
+    "ambulance transport oxygen drug 1 mg 10 mg dose molecular pathology assay panel "
+    "office visit established new patient minutes imaging contrast \"complex\" 50%"
+).split()
+
+ADJUSTMENT_WORDS = (
+    "claim denied payment adjusted because the deductible coinsurance copay amount "
+    "benefit maximum exceeded authorization required not covered timely filing "
+    "duplicate contractual obligation medical necessity appeal patient notified"
+).split()
+
+CPT_SECTION_HEADERS = (
+    'CLINICAL LABORATORY SERVICES',
+    'PHYSICAL THERAPY SERVICES',
+    'RADIOLOGY AND CERTAIN OTHER IMAGING SERVICES',
+    'OUTPATIENT PRESCRIPTION DRUGS',
+    'HOME HEALTH SERVICES',
+)
+
+# Columns of the "Changes by HCPC" sheet in the quarterly transaction report
+HCPCS_COLUMNS = (
+    'HCPC', 'SEQNUM', 'RECID', 'ACTION CD', 'SHORT DESCRIPTION', 'LONG DESCRIPTION',
+    'PRICE1', 'MULT_PI', 'COV', 'ACTION EFF DATE',
+)
+
+
+def _phrase(rng, words, low, high):
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(low, high)))
+
+
+def write_icd10_order_file(path, line_count, seed=2026):
+    """Write a fixed-width order file with realistic code shapes and descriptions."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for order_number in range(1, line_count + 1):
+            category = rng.choice('ABCDEFGHIJKLMNOPQRSTVWXYZ') + f"{rng.randint(0, 99):02d}"
+            suffix_length = rng.choice((0, 1, 2, 3, 3, 4, 4))
+            code = category + ''.join(rng.choice('0123456789X') for _ in range(suffix_length))
+            header_flag = '0' if suffix_length == 0 else '1'
+            short_description = ' '.join(rng.choice(WORDS) for _ in range(7))[:60]
+            long_description = _phrase(rng, WORDS, 8, 30)
+            file.write(
+                f"{order_number % 100000:05d} {code:<7} {header_flag} "
+                f"{short_description:<60} {long_description}\n"
+            )
+
+
+def write_icd10_workbook(path, row_count, seed=2026):
+    """Write the Section 111 valid ICD-10 list used by the legacy loader."""
+    rng = random.Random(seed)
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet('Valid ICD-10 Codes')
+    sheet.append(['ICD-10 Code', 'Description'])
+    for _ in range(row_count):
+        code = rng.choice('ABCDEFGHIJKLMNOPQRSTVWXYZ') + f"{rng.randint(0, 99):02d}"
+        code += ''.join(rng.choice('0123456789X') for _ in range(rng.choice((0, 1, 2, 3, 4))))
+        sheet.append([code, _phrase(rng, WORDS, 4, 20)])
+    book.save(path)
+
+
+def write_hcpcs_workbook(path, row_count, seed=2026):
+    """Write a transaction report with an intro sheet and a "Changes by HCPC" sheet."""
+    rng = random.Random(seed)
+    book = Workbook(write_only=True)
+    intro = book.create_sheet('Read Me')
+    intro.append(['HCPCS Quarterly Update - Transaction Report (synthetic)'])
+
+    sheet = book.create_sheet('Changes by HCPC')
+    sheet.append(list(HCPCS_COLUMNS))
+    for sequence in range(1, row_count + 1):
+        # About one row in eight repeats an earlier code, as multi-line records do
+        number = rng.randint(0, max(row_count * 7 // 8, 1))
+        code = f"{'ABCEGHJKLPQRSTV'[number % 15]}{number % 10000:04d}"
+        sheet.append([
+            code,
+            sequence * 10,
+            rng.choice((3, 4, 7, 8)),
+            rng.choice('AACCDNP'),
+            _phrase(rng, PROCEDURE_WORDS, 2, 6)[:28],
+            _phrase(rng, PROCEDURE_WORDS, 5, 40),
+            rng.choice((11, 13, 45, 51, 57)),
+            rng.choice(('A', 'D', None)),
+            rng.choice(('C', 'D', 'I', 'M', 'S')),
+            f"2025{rng.randint(1, 12):02d}01",
+        ])
+        if sequence % 2500 == 0:
+            sheet.append([None] * len(HCPCS_COLUMNS))
+    book.save(path)
+
+
+def write_cpt_workbook(path, row_count, seed=2026):
+    """Write a DHS code list addendum: a code/description sheet with section headers."""
+    rng = random.Random(seed)
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet('Addendum')
+    sheet.append(['CPT/HCPCS', 'Description'])
+    for row in range(row_count):
+        if row % 400 == 0:
+            sheet.append([rng.choice(CPT_SECTION_HEADERS), None])
+        # Mostly five digit numbers (stored as numbers, as Excel does), a few Cat III codes
+        if rng.random() < 0.03:
+            code = f"{rng.randint(1, 999):04d}T"
+        else:
+            code = rng.randint(10021, 99607)
+        sheet.append([code, _phrase(rng, PROCEDURE_WORDS, 3, 25)])
+    book.save(path)
+
+
+def write_carc_rarc_workbook(path, row_count, seed=2026):
+    """Write a combined CARC/RARC list with code, description and type columns."""
+    rng = random.Random(seed)
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet('Sheet1')
+    sheet.append(['Code', 'Description', 'Type'])
+    carc_count = row_count // 3
+    for number in range(1, carc_count + 1):
+        sheet.append([number, _phrase(rng, ADJUSTMENT_WORDS, 6, 40), 'CARC'])
+    for number in range(1, row_count - carc_count + 1):
+        code = f"{rng.choice('MNMA')}{number}"
+        sheet.append([code, _phrase(rng, ADJUSTMENT_WORDS, 6, 40), rng.choice(('RARC', None))])
+    book.save(path)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script to build the binary code dictionary from the processors' record files.
+
+Reads the ICD-10, CPT, HCPCS and modifier records from sidecar directories
+written by process-medical-codes-updated.py and process-modifier-codes.py
+and writes one sorted, fixed-width dictionary file (see
+medical_codes/dictionary.py). Validators memory-map it and check a code's
+billable, active and date flags by binary search instead of querying the
+master tables per claim line.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from medical_codes.dictionary import CodeDictionary, read_dictionary_records, write_code_dictionary
+from medical_codes.sidecar import MANIFEST_NAME, default_sidecar_dir
+
+DB_DIR = Path(__file__).parent.parent
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the binary code dictionary.")
+    parser.add_argument(
+        '--records',
+        nargs='+',
+        default=[
+            str(default_sidecar_dir(DB_DIR / "populate_medical_codes_updated.sql")),
+            str(default_sidecar_dir(DB_DIR / "populate_modifier_codes.sql")),
+        ],
+        help="sidecar record directories to read the codes from",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(DB_DIR / "code_dictionary.bin"),
+        help="dictionary file to write",
+    )
+    parser.add_argument(
+        '--lookup',
+        nargs='*',
+        default=[],
+        metavar='CODE',
+        help="print the entries of these codes from the written file",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to build the dictionary."""
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("Binary Code Dictionary Builder")
+    print("=" * 60)
+    print()
+
+    frames = []
+    for directory in args.records:
+        if not (Path(directory) / MANIFEST_NAME).exists():
+            print(f"⚠ No record files in {directory}")
+            continue
+        records = read_dictionary_records(directory)
+        print(f"✓ Read {len(records)} codes from {directory}")
+        frames.append(records)
+
+    entries = pd.concat(frames, ignore_index=True) if frames else None
+    if entries is None or entries.empty:
+        print("❌ No codes found; run the processors with record files enabled first")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    path = write_code_dictionary(entries, args.output)
+    seconds = time.perf_counter() - started
+
+    with CodeDictionary(path) as dictionary:
+        print(f"\n✅ Dictionary file generated: {path}")
+        print(
+            f"📊 {len(dictionary)} codes, {len(dictionary.categories)} categories, "
+            f"{path.stat().st_size / 1024 / 1024:.1f} MiB, built in {seconds:.1f}s"
+        )
+        for code_set, count in dictionary.code_set_counts().items():
+            print(f"  {code_set}: {count}")
+        for code in args.lookup:
+            print(f"\n{code}: {dictionary.lookup(code) or 'not found'}")
+
+if __name__ == "__main__":
+    main()
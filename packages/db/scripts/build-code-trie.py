@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script to build the code autocomplete trie from the processors' record files.
+
+Reads the ICD-10, CPT, HCPCS and modifier records from sidecar directories
+written by process-medical-codes-updated.py and process-modifier-codes.py
+and writes one binary prefix trie (see medical_codes/trie.py) that services
+memory-map to complete codes as the user types.
+
+Completions are ranked by usage. Pass --weights with hot_codes_cache usage,
+e.g. psql -c "\\copy (SELECT code_value, usage_count FROM hot_codes_cache)
+TO 'usage.csv' CSV HEADER"; counts of the same code are added up across
+organizations.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from medical_codes.sidecar import MANIFEST_NAME, default_sidecar_dir
+from medical_codes.trie import DEFAULT_TOP_K, CodeTrie, read_trie_entries, write_code_trie
+
+DB_DIR = Path(__file__).parent.parent
+
+def read_weights(path):
+    """Usage weight per code from a CSV with code_value and usage_count columns."""
+    usage = pd.read_csv(path, usecols=['code_value', 'usage_count'], dtype={'code_value': str})
+    usage['code_value'] = usage['code_value'].str.strip().str.upper().str.replace('.', '', regex=False)
+    return usage.groupby('code_value')['usage_count'].sum().astype(float).to_dict()
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the code autocomplete trie.")
+    parser.add_argument(
+        '--records',
+        nargs='+',
+        default=[
+            str(default_sidecar_dir(DB_DIR / "populate_medical_codes_updated.sql")),
+            str(default_sidecar_dir(DB_DIR / "populate_modifier_codes.sql")),
+        ],
+        help="sidecar record directories to read the codes from",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(DB_DIR / "code_trie.bin"),
+        help="trie file to write",
+    )
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        default=DEFAULT_TOP_K,
+        help="completions stored per prefix",
+    )
+    parser.add_argument(
+        '--weights',
+        help="CSV of code_value,usage_count (e.g. exported from hot_codes_cache) to rank by",
+    )
+    parser.add_argument(
+        '--complete',
+        nargs='*',
+        default=[],
+        metavar='PREFIX',
+        help="print the completions of these prefixes from the written file",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to build the trie."""
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("Code Autocomplete Trie Builder")
+    print("=" * 60)
+    print()
+
+    weights = read_weights(args.weights) if args.weights else None
+    entries = []
+    for directory in args.records:
+        if not (Path(directory) / MANIFEST_NAME).exists():
+            print(f"⚠ No record files in {directory}")
+            continue
+        found = read_trie_entries(directory, weights)
+        print(f"✓ Read {len(found)} codes from {directory}")
+        entries.extend(found)
+
+    if not entries:
+        print("❌ No codes found; run the processors with record files enabled first")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    skipped = []
+    path = write_code_trie(entries, args.output, args.top_k, skipped)
+    seconds = time.perf_counter() - started
+    if skipped:
+        examples = ', '.join(repr(entry.code) for entry in skipped[:5])
+        print(f"⚠ Skipped {len(skipped)} codes with non-ASCII characters: {examples}")
+
+    with CodeTrie(path) as trie:
+        print(f"\n✅ Trie file generated: {path}")
+        print(
+            f"📊 {len(trie)} codes, {len(trie.edge_label)} edges, "
+            f"{path.stat().st_size / 1024 / 1024:.1f} MiB, built in {seconds:.1f}s"
+        )
+        for prefix in args.complete:
+            print(f"\n{prefix}:")
+            for completion in trie.complete(prefix):
+                print(f"  {completion.code:<8} {completion.code_set:<8} {completion.description}")
+
+if __name__ == "__main__":
+    main()
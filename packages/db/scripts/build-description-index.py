@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Script to build the description search index from the processors' record files.
+
+Reads the ICD-10, CPT, HCPCS, modifier and CARC/RARC records from sidecar
+directories, tokenizes their short and long descriptions and writes the
+word and trigram inverted index (see medical_codes/search.py) as one .npz
+file. Services load it with DescriptionIndex.load and search in memory
+instead of running ILIKE scans against the master tables.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from medical_codes.search import DEFAULT_LIMIT, DescriptionIndex, read_search_documents
+from medical_codes.sidecar import MANIFEST_NAME, default_sidecar_dir
+
+DB_DIR = Path(__file__).parent.parent
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the description search index.")
+    parser.add_argument(
+        '--records',
+        nargs='+',
+        default=[
+            str(default_sidecar_dir(DB_DIR / "populate_medical_codes_updated.sql")),
+            str(default_sidecar_dir(DB_DIR / "populate_modifier_codes.sql")),
+            str(default_sidecar_dir(DB_DIR / "populate_carc_rarc_codes.sql")),
+        ],
+        help="sidecar record directories to read the descriptions from",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(DB_DIR / "description_index.npz"),
+        help="index file to write",
+    )
+    parser.add_argument(
+        '--search',
+        nargs='*',
+        default=[],
+        metavar='QUERY',
+        help="print the best matches of these queries from the built index",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to build the index."""
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("Description Search Index Builder")
+    print("=" * 60)
+    print()
+
+    frames = []
+    for directory in args.records:
+        if not (Path(directory) / MANIFEST_NAME).exists():
+            print(f"⚠ No record files in {directory}")
+            continue
+        documents = read_search_documents(directory)
+        print(f"✓ Read {len(documents)} descriptions from {directory}")
+        frames.append(documents)
+
+    documents = pd.concat(frames, ignore_index=True) if frames else None
+    if documents is None or documents.empty:
+        print("❌ No records found; run the processors with record files enabled first")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    index = DescriptionIndex.build(
+        documents['code'],
+        documents['code_set'],
+        documents['short_description'],
+        documents['long_description'],
+    )
+    seconds = time.perf_counter() - started
+    path = index.save(args.output)
+
+    print(f"\n✅ Index file generated: {path}")
+    print(
+        f"📊 {len(index)} descriptions, {len(index.words)} words, {len(index.trigrams)} trigrams, "
+        f"{path.stat().st_size / 1024 / 1024:.1f} MiB, built in {seconds:.1f}s"
+    )
+    for query in args.search:
+        started = time.perf_counter()
+        hits = index.search(query, DEFAULT_LIMIT)
+        milliseconds = (time.perf_counter() - started) * 1000
+        print(f"\n{query} ({len(hits)} shown, {milliseconds:.1f} ms):")
+        for hit in hits:
+            print(f"  {hit.code:<8} {hit.code_set:<9} {hit.score:6.2f}  {hit.description}")
+
+if __name__ == "__main__":
+    main()
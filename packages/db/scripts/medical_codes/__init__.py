@@ -0,0 +1 @@
+"""Shared building blocks for the medical code processing scripts."""
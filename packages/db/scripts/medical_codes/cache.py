@@ -0,0 +1,90 @@
+"""
+Local cache of transformed records, keyed by source file content.
+
+An entry is the processor's records DataFrame for one source file. Its key
+is the file's SHA-256 plus the processor version, so an unchanged input is
+served without being read or parsed again. Editing the file, or bumping the
+processor version after a transform change, makes the old entry a miss.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import pandas as pd
+
+PathLike = Union[str, Path]
+
+
+def file_sha256(path: PathLike) -> str:
+    """Return the hex SHA-256 of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RecordCache:
+    """Pickled records per (kind, source hash, processor version)."""
+
+    def __init__(self, directory: PathLike, version: str) -> None:
+        self.directory = Path(directory)
+        self.version = version
+
+    def entry_path(self, kind: str, source_hash: str) -> Path:
+        version = re.sub(r'[^A-Za-z0-9_.-]', '_', self.version)
+        return self.directory / f"{kind}-{source_hash[:24]}-v{version}.pkl"
+
+    def load(self, kind: str, source_hash: str) -> Optional[pd.DataFrame]:
+        """Return the cached records, or None on a miss or an unreadable entry."""
+        path = self.entry_path(kind, source_hash)
+        try:
+            with open(path, 'rb') as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated or incompatible entry is just a miss; it is rewritten
+            return None
+        if entry.get('source_sha256') != source_hash or entry.get('version') != self.version:
+            return None
+        return entry['records']
+
+    def store(self, kind: str, source_hash: str, records: pd.DataFrame) -> Path:
+        """Write an entry atomically so an interrupted run never leaves half a file."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.entry_path(kind, source_hash)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        entry = {'source_sha256': source_hash, 'version': self.version, 'records': records}
+        with open(temp_path, 'wb') as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        return path
+
+    def get_or_build(
+        self, kind: str, source: PathLike, build: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """Return cached records for ``source``, building and caching them on a miss."""
+        source_hash = file_sha256(source)
+        records = self.load(kind, source_hash)
+        if records is not None:
+            print(f"  Using cached {kind} records ({len(records)} rows) for {source}")
+            return records
+
+        records = build()
+        if not records.empty:
+            self.store(kind, source_hash, records)
+        return records
+
+
+def cached_records(
+    cache: Optional[RecordCache], kind: str, source: PathLike, build: Callable[[], pd.DataFrame]
+) -> pd.DataFrame:
+    """``cache.get_or_build`` when a cache is configured, otherwise just ``build()``."""
+    if cache is None:
+        return build()
+    return cache.get_or_build(kind, source, build)
@@ -0,0 +1,62 @@
+"""Keyword rules deriving adjustment_reason_code fields from a CARC/RARC description."""
+
+from typing import NamedTuple, Optional
+
+from medical_codes.keywords import KeywordClassifier, KeywordRule
+
+# Rules are listed in precedence order within each field; the first match wins.
+ADJUSTMENT_REASON_RULES = (
+    # category
+    KeywordRule('category', 'Patient Responsibility', ('patient', 'deductible', 'copay', 'coinsurance')),
+    KeywordRule('category', 'Coverage', ('coverage', 'benefit', 'covered')),
+    KeywordRule('category', 'Medical Necessity', ('medical necessity', 'medically necessary')),
+    KeywordRule('category', 'Benefit Limit', ('limit', 'maximum', 'exceeded')),
+    KeywordRule('category', 'Administrative', ('administrative', 'processing', 'clerical')),
+    KeywordRule('category', 'Duplicate', ('duplicate', 'previously paid')),
+    KeywordRule('category', 'Authorization', ('authorization', 'prior auth')),
+    KeywordRule('category', 'COB', ('coordination', 'other insurance', 'cob')),
+    KeywordRule('category', 'Contractual', ('contractual', 'contract', 'allowable')),
+    KeywordRule('category', 'Documentation', ('documentation', 'records', 'missing')),
+    KeywordRule('category', 'Eligibility', ('eligibility', 'eligible')),
+    KeywordRule('category', 'Timely Filing', ('timely filing', 'claim filing', 'late')),
+    KeywordRule('category', 'Coding Error', ('coding', 'procedure code', 'diagnosis')),
+    KeywordRule('category', 'Bundling', ('bundling', 'bundled', 'inclusive')),
+    KeywordRule('category', 'Appeal Rights', ('appeal', 'review')),
+    KeywordRule('category', 'Routing', ('routing', 'forward')),
+    # financial_class
+    KeywordRule(
+        'financial_class', 'patient_responsibility', ('patient', 'deductible', 'copay', 'coinsurance')
+    ),
+    KeywordRule('financial_class', 'contractual', ('contractual', 'allowable', 'contract')),
+    KeywordRule('financial_class', 'adjustment', ('write', 'adjustment', 'non-covered')),
+    # appealable: non-appealable conditions take precedence
+    KeywordRule('appealable', False, ('duplicate', 'timely filing', 'late', 'administrative')),
+    KeywordRule('appealable', True, ('medical necessity', 'coverage', 'denial', 'benefit')),
+    # requires_patient_notification
+    KeywordRule('requires_patient_notification', True, ('patient',)),
+)
+
+ADJUSTMENT_REASON_DEFAULTS = {
+    'category': 'Administrative',
+    'financial_class': 'other',
+    'appealable': False,
+    'requires_patient_notification': False,
+}
+
+ADJUSTMENT_REASON_CLASSIFIER = KeywordClassifier(ADJUSTMENT_REASON_RULES, ADJUSTMENT_REASON_DEFAULTS)
+
+
+class AdjustmentClassification(NamedTuple):
+    """Fields derived from a CARC/RARC description."""
+
+    category: str
+    financial_class: str
+    appealable: bool
+    requires_patient_notification: bool
+
+
+def classify_adjustment_description(
+    description: Optional[str], classifier: KeywordClassifier = ADJUSTMENT_REASON_CLASSIFIER
+) -> AdjustmentClassification:
+    """Derive every rule-based field from a description in a single scan."""
+    return AdjustmentClassification(**classifier.classify(description))
@@ -0,0 +1,186 @@
+"""
+Code classification tables shared by the processors.
+
+The tables are built once at import: ICD-10 chapters by first letter, the
+sorted CPT category ranges (searched with bisect, or np.searchsorted for a
+whole column) and the HCPCS Level II categories by first letter. Each rule
+has a per-code function (icd10_chapter, cpt_category, ...) and a batched
+classify_* function over a column of codes; both give the same answers.
+"""
+
+from bisect import bisect_right
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+Codes = Union[Sequence[str], np.ndarray, pd.Series]
+
+OTHER_CATEGORY = 'Other'
+
+# ICD-10-CM chapter and chapter code range by the code's first letter
+ICD10_CHAPTER_BY_LETTER: Dict[str, Tuple[str, str]] = {
+    'A': ('Infectious and parasitic diseases', 'A00-B99'),
+    'B': ('Infectious and parasitic diseases', 'A00-B99'),
+    'C': ('Neoplasms', 'C00-D49'),
+    'D': ('Diseases of blood and immune system', 'D50-D89'),
+    'E': ('Endocrine, nutritional and metabolic diseases', 'E00-E89'),
+    'F': ('Mental and behavioral disorders', 'F01-F99'),
+    'G': ('Diseases of the nervous system', 'G00-G99'),
+    'H': ('Diseases of eye/ear and adnexa', 'H00-H95'),
+    'I': ('Diseases of the circulatory system', 'I00-I99'),
+    'J': ('Diseases of the respiratory system', 'J00-J99'),
+    'K': ('Diseases of the digestive system', 'K00-K95'),
+    'L': ('Diseases of skin and subcutaneous tissue', 'L00-L99'),
+    'M': ('Diseases of musculoskeletal system', 'M00-M99'),
+    'N': ('Diseases of the genitourinary system', 'N00-N99'),
+    'O': ('Pregnancy, childbirth and the puerperium', 'O00-O9A'),
+    'P': ('Perinatal conditions', 'P00-P96'),
+    'Q': ('Congenital malformations', 'Q00-Q99'),
+    'R': ('Symptoms, signs and abnormal findings', 'R00-R99'),
+    'S': ('Injury, poisoning (by body region)', 'S00-T88'),
+    'T': ('Injury, poisoning (by type)', 'S00-T88'),
+    'V': ('External causes - transport accidents', 'V00-Y99'),
+    'W': ('External causes - other accidents', 'V00-Y99'),
+    'X': ('External causes - intentional self-harm', 'V00-Y99'),
+    'Y': ('External causes - assault, undetermined', 'V00-Y99'),
+    'Z': ('Factors influencing health status', 'Z00-Z99'),
+}
+ICD10_OTHER_CHAPTER = ('Other', 'Unknown')
+_ICD10_CHAPTER_NAMES = {letter: chapter[0] for letter, chapter in ICD10_CHAPTER_BY_LETTER.items()}
+_ICD10_CHAPTER_RANGES = {letter: chapter[1] for letter, chapter in ICD10_CHAPTER_BY_LETTER.items()}
+
+# Codes starting with these need a 7th character extension
+ICD10_SEVENTH_CHARACTER_LETTERS = ('S', 'T')
+ICD10_SEVENTH_CHARACTER_PREFIXES = ('M80', 'M84', 'M48.4', 'M48.5')
+
+# Sorted, non-overlapping CPT code ranges: (first code, last code, category)
+CPT_CATEGORY_RANGES = (
+    (10021, 69990, 'Surgery'),
+    (70010, 79999, 'Radiology'),
+    (80047, 89398, 'Pathology and Laboratory'),
+    (90281, 99199, 'Medicine'),
+    (99201, 99499, 'Evaluation and Management'),
+    (99500, 99607, 'Home Health Procedures/Services'),
+)
+
+CPT_RANGE_START_LIST = [start for start, _, _ in CPT_CATEGORY_RANGES]
+CPT_RANGE_STARTS = np.array(CPT_RANGE_START_LIST)
+CPT_RANGE_ENDS = np.array([end for _, end, _ in CPT_CATEGORY_RANGES])
+CPT_RANGE_CATEGORIES = np.array([category for _, _, category in CPT_CATEGORY_RANGES], dtype=object)
+
+HCPCS_CATEGORY_BY_LETTER = {
+    'A': 'Transportation Services, Medical and Surgical Supplies',
+    'B': 'Enteral and Parenteral Therapy',
+    'C': 'Outpatient PPS',
+    'D': 'Dental Procedures',
+    'E': 'Durable Medical Equipment',
+    'G': 'Procedures/Professional Services (Temporary)',
+    'H': 'Alcohol and Drug Abuse Treatment Services',
+    'J': 'Drugs Administered Other Than Oral Method',
+    'K': 'Temporary Codes',
+    'L': 'Orthotic/Prosthetic Procedures',
+    'M': 'Medical Services',
+    'P': 'Pathology and Laboratory Services',
+    'Q': 'Temporary Codes',
+    'R': 'Diagnostic Radiology Services',
+    'S': 'Temporary National Codes',
+    'T': 'National T-Codes',
+    'V': 'Vision Services',
+}
+
+
+def _text_series(codes: Codes) -> pd.Series:
+    if isinstance(codes, pd.Series):
+        # String dtype columns (Arrow-backed on pandas 3) have vectorized .str methods;
+        # on object columns they are a Python loop either way
+        if isinstance(codes.dtype, pd.StringDtype):
+            return codes
+        return codes.astype(object)
+    return pd.Series(np.asarray(codes, dtype=object), dtype=object)
+
+
+def _lookup(keys: pd.Series, table: Dict[str, str], default: str) -> np.ndarray:
+    # Map each distinct key once instead of once per row
+    positions, distinct = pd.factorize(keys, use_na_sentinel=False)
+    values = np.array([table.get(key, default) for key in distinct], dtype=object)
+    return values[positions]
+
+
+def icd10_chapter(code: str) -> Tuple[str, str]:
+    """(chapter, chapter range) of an ICD-10-CM code."""
+    return ICD10_CHAPTER_BY_LETTER.get(code[:1], ICD10_OTHER_CHAPTER)
+
+
+def icd10_properties(code: str) -> Tuple[bool, bool]:
+    """(is_billable, requires_additional_digit) from the structure of an ICD-10-CM code."""
+    length = len(code)
+    # Category codes like A01, unspecified codes like A019 and placeholder codes
+    is_billable = not (length == 3 or (length == 4 and code[3] == '9') or 'X' in code)
+    requires_additional_digit = (
+        code[:1] in ICD10_SEVENTH_CHARACTER_LETTERS and length >= 6
+    ) or code.startswith(ICD10_SEVENTH_CHARACTER_PREFIXES)
+    return is_billable, requires_additional_digit
+
+
+def classify_icd10_chapters(codes: Codes) -> Tuple[np.ndarray, np.ndarray]:
+    """``icd10_chapter`` over a column: (chapters, chapter ranges) as object arrays."""
+    letters = _text_series(codes).str[:1]
+    return (
+        _lookup(letters, _ICD10_CHAPTER_NAMES, ICD10_OTHER_CHAPTER[0]),
+        _lookup(letters, _ICD10_CHAPTER_RANGES, ICD10_OTHER_CHAPTER[1]),
+    )
+
+
+def classify_icd10_properties(codes: Codes) -> Tuple[np.ndarray, np.ndarray]:
+    """``icd10_properties`` over a column: (is_billable, requires_additional_digit) arrays."""
+    text = _text_series(codes)
+    length = text.str.len().to_numpy()
+    not_billable = (
+        (length == 3)
+        | ((length == 4) & (text.str[3:4] == '9').to_numpy())
+        | text.str.contains('X', regex=False).to_numpy(dtype=bool)
+    )
+    requires = (
+        text.str[:1].isin(ICD10_SEVENTH_CHARACTER_LETTERS).to_numpy() & (length >= 6)
+    ) | text.str.startswith(ICD10_SEVENTH_CHARACTER_PREFIXES).to_numpy(dtype=bool)
+    return ~not_billable, requires
+
+
+def cpt_category(code: Union[str, int], current_category: str = '') -> str:
+    """
+    Category of a numeric CPT code by range; ``current_category`` (the
+    section header above the code) or 'Other' when it is outside every range
+    or not numeric.
+    """
+    try:
+        number = int(code)
+    except ValueError:
+        return current_category or OTHER_CATEGORY
+    position = bisect_right(CPT_RANGE_START_LIST, number) - 1
+    if position >= 0 and number <= CPT_CATEGORY_RANGES[position][1]:
+        return CPT_CATEGORY_RANGES[position][2]
+    return current_category or OTHER_CATEGORY
+
+
+def classify_cpt_codes(codes: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Categorize numeric CPT codes by range, using ``fallback`` outside every range."""
+    positions = np.searchsorted(CPT_RANGE_STARTS, codes, side='right') - 1
+    clipped = positions.clip(0)
+    in_range = (positions >= 0) & (codes <= CPT_RANGE_ENDS[clipped])
+    return np.where(in_range, CPT_RANGE_CATEGORIES[clipped], fallback)
+
+
+def hcpcs_category(code: Optional[str]) -> str:
+    """HCPCS Level II category by the code's first letter."""
+    code = (code or '').strip()
+    if not code:
+        return OTHER_CATEGORY
+    return HCPCS_CATEGORY_BY_LETTER.get(code[0].upper(), OTHER_CATEGORY)
+
+
+def classify_hcpcs_codes(codes: Codes) -> np.ndarray:
+    """``hcpcs_category`` over a column of stripped, non-blank codes."""
+    letters = _text_series(codes).str[:1].str.upper()
+    return _lookup(letters, HCPCS_CATEGORY_BY_LETTER, OTHER_CATEGORY)
+
@@ -0,0 +1,102 @@
+"""Columnar transform of the CPT sheet in the CMS DHS code list addendum."""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.classification import classify_cpt_codes
+from medical_codes.cpt_sections import CPT_CODE_PATTERN, default_index
+from medical_codes.metrics import (
+    DROP_BLANK,
+    DROP_DUPLICATE,
+    DROP_FAILED_REGEX,
+    DROP_HEADER,
+    count_dropped,
+)
+from medical_codes.text import clean_text_column
+
+def _transform_cpt(
+    df: pd.DataFrame, carried_category: str, dropped: Optional[Dict[str, int]] = None
+) -> Tuple[pd.DataFrame, str]:
+    code_col = df.columns[0]  # First column usually contains codes
+    desc_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
+
+    first = clean_text_column(df[code_col])
+    first = first.where(first != 'nan').fillna('')
+
+    is_code = first.str.fullmatch(CPT_CODE_PATTERN)
+    is_header = (first != '') & (
+        first.str.upper().str.contains('SERVICES', regex=False)
+        | (first.str.isupper() & first.str.contains(r'\s') & ~is_code)
+    )
+    current_category = first.where(is_header).ffill().fillna(carried_category)
+
+    keep = is_code & ~is_header
+    duplicate = first.where(keep).duplicated()
+    if dropped is not None:
+        blank = first == ''
+        count_dropped(dropped, DROP_BLANK, blank.sum())
+        count_dropped(dropped, DROP_HEADER, is_header.sum())
+        count_dropped(dropped, DROP_FAILED_REGEX, (~blank & ~is_header & ~is_code).sum())
+        count_dropped(dropped, DROP_DUPLICATE, (keep & duplicate).sum())
+    keep &= ~duplicate
+
+    codes = first[keep]
+    fallback = current_category[keep]
+    fallback = fallback.where(fallback != '', 'Other').to_numpy(dtype=object)
+    # The category ranges cover Category I codes; lettered codes keep their header
+    numeric = codes.str[-1:].str.isdigit().to_numpy(dtype=bool)
+    category = fallback.copy()
+    category[numeric] = classify_cpt_codes(
+        codes[numeric].astype(np.int64).to_numpy(), fallback[numeric]
+    )
+    section, subsection = default_index().classify_many(codes)
+
+    description = clean_text_column(df[desc_col][keep])
+    description = description.where(description != 'nan').fillna('')
+
+    records = pd.DataFrame({
+        'cpt_code': codes,
+        'short_description': description.str.slice(0, 100),
+        'long_description': description.str.slice(0, 1000),
+        'category': pd.Series(category, index=codes.index, dtype=object).str.slice(0, 50),
+        'section': pd.Series(section, index=codes.index, dtype=object).str.slice(0, 50),
+        'subsection': pd.Series(subsection, index=codes.index, dtype=object).str.slice(0, 50),
+    }, index=codes.index)
+    return records, current_category.iloc[-1] if len(df) else carried_category
+
+
+def transform_cpt_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn the raw addendum sheet into cpt_code_master columns.
+
+    The first column holds either a code (five digits, or four digits and a
+    Category II/III, PLA or MAAA letter) or a category header (an all-caps
+    multi-word label or anything mentioning SERVICES); the second holds the
+    description. Header labels are carried forward onto the codes below them
+    and used when a code falls outside the known CPT ranges. Section and
+    subsection come from the range index in cpt_sections.
+    """
+    return _transform_cpt(df, '')[0]
+
+
+def transform_cpt_chunks(
+    chunks: Iterable[pd.DataFrame], dropped: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    ``transform_cpt_frame`` over a sheet streamed in consecutive chunks.
+
+    The current header label is carried from one chunk into the next, and a
+    code repeated in a later chunk keeps its first occurrence. ``chunks``
+    must yield at least one (possibly empty) frame.
+    """
+    parts = []
+    category = ''
+    for chunk in chunks:
+        records, category = _transform_cpt(chunk, category, dropped)
+        parts.append(records)
+    records = pd.concat(parts)
+    duplicate = records['cpt_code'].duplicated()
+    count_dropped(dropped, DROP_DUPLICATE, duplicate.sum())
+    return records[~duplicate]
@@ -0,0 +1,154 @@
+"""
+CPT section and subsection lookup by code range.
+
+The ranges come from ``data/cpt_sections.csv``: a row with an empty
+subsection is a section, the other rows are subsections inside one. Both
+levels are kept as sorted, non-overlapping intervals, so a code is placed
+with one binary search per level (bisect for a single code,
+np.searchsorted for a column).
+
+Category I codes are five digits. Category II, Category III, PLA and
+administrative MAAA codes are four digits and a letter (0001F, 0042T,
+0001U, 0001M); cpt_code_key gives each letter its own key range so they
+sort apart from the numeric codes and from each other.
+"""
+
+import csv
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DATA_FILE = Path(__file__).resolve().parent / 'data' / 'cpt_sections.csv'
+
+# Codes the section lookup understands: Category I and the lettered categories
+CPT_CODE_PATTERN = r'\d{5}|\d{4}[FMTU]'
+
+# Key offset of each lettered code category, above every five digit code
+_LETTER_OFFSETS = {'F': 100000, 'M': 200000, 'T': 300000, 'U': 400000}
+_CODE_RE = re.compile(CPT_CODE_PATTERN)
+
+
+def cpt_code_key(code: str) -> Optional[int]:
+    """Sortable integer key of a CPT code, or None when it is not one."""
+    if not _CODE_RE.fullmatch(code):
+        return None
+    if code[-1].isdigit():
+        return int(code)
+    return _LETTER_OFFSETS[code[-1]] + int(code[:4])
+
+
+def cpt_code_keys(codes: pd.Series) -> np.ndarray:
+    """``cpt_code_key`` over a column of valid codes, as an int64 array."""
+    text = codes.astype(str)
+    numbers = text.str[:4].astype(np.int64).to_numpy()
+    last = text.str[-1:]
+    offsets = last.map(_LETTER_OFFSETS).fillna(-1).astype(np.int64).to_numpy()
+    digits = last.where(offsets < 0, '0').astype(np.int64).to_numpy()
+    # Five digit codes are number * 10 + last digit; lettered ones offset + number
+    return np.where(offsets < 0, numbers * 10 + digits, offsets + numbers)
+
+
+class CptRange(NamedTuple):
+    """One row of the section data file."""
+
+    first: str
+    last: str
+    section: str
+    subsection: str
+
+
+class IntervalIndex:
+    """Sorted, non-overlapping integer intervals, each with a label."""
+
+    def __init__(self, intervals: Sequence[Tuple[int, int, str]], name: str = 'interval') -> None:
+        ordered = sorted(intervals)
+        for (start, end, label), following in zip(ordered, ordered[1:] + [None]):
+            if start > end:
+                raise ValueError(f"Empty {name} range for '{label}': {start} > {end}")
+            if following is not None and following[0] <= end:
+                raise ValueError(f"{name.capitalize()} '{following[2]}' overlaps '{label}'")
+        self.start_list = [start for start, _, _ in ordered]
+        self.starts = np.array(self.start_list, dtype=np.int64)
+        self.ends = np.array([end for _, end, _ in ordered], dtype=np.int64)
+        self.labels = np.array([label for _, _, label in ordered], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.start_list)
+
+    def find(self, key: int) -> Optional[str]:
+        """Label of the interval holding ``key``, or None."""
+        position = bisect_right(self.start_list, key) - 1
+        if position >= 0 and key <= self.ends[position]:
+            return self.labels[position]
+        return None
+
+    def find_many(self, keys: np.ndarray, default: Optional[str] = None) -> np.ndarray:
+        """``find`` over an array of keys, with ``default`` outside every interval."""
+        if not len(self):
+            return np.full(len(keys), default, dtype=object)
+        positions = np.searchsorted(self.starts, keys, side='right') - 1
+        clipped = positions.clip(0)
+        inside = (positions >= 0) & (keys <= self.ends[clipped])
+        return np.where(inside, self.labels[clipped], default)
+
+
+def read_ranges(path: Union[str, Path] = DATA_FILE) -> List[CptRange]:
+    """The rows of a section data file; lines starting with # are comments."""
+    with open(path, encoding='utf-8', newline='') as file:
+        lines = [line for line in file if line.strip() and not line.startswith('#')]
+    return [
+        CptRange(row['first'], row['last'], row['section'], row['subsection'] or '')
+        for row in csv.DictReader(lines)
+    ]
+
+
+class CptSectionIndex:
+    """Section and subsection of CPT codes, from the code range hierarchy."""
+
+    def __init__(self, ranges: Sequence[CptRange]) -> None:
+        sections = []
+        subsections = []
+        for row in ranges:
+            first, last = cpt_code_key(row.first), cpt_code_key(row.last)
+            if first is None or last is None:
+                raise ValueError(f"Not a CPT code range: {row.first}-{row.last}")
+            if row.subsection:
+                subsections.append((first, last, row.subsection, row.section))
+            else:
+                sections.append((first, last, row.section))
+        self.sections = IntervalIndex(sections, 'section')
+
+        for first, last, subsection, section in subsections:
+            if self.sections.find(first) != section or self.sections.find(last) != section:
+                raise ValueError(f"Subsection '{subsection}' is not inside section '{section}'")
+        self.subsections = IntervalIndex(
+            [(first, last, subsection) for first, last, subsection, _ in subsections],
+            'subsection',
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DATA_FILE) -> 'CptSectionIndex':
+        return cls(read_ranges(path))
+
+    def classify(self, code: str) -> Tuple[Optional[str], Optional[str]]:
+        """(section, subsection) of one code; None where no range holds it."""
+        key = cpt_code_key(code)
+        if key is None:
+            return None, None
+        return self.sections.find(key), self.subsections.find(key)
+
+    def classify_many(self, codes: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """``classify`` over a column of codes matching CPT_CODE_PATTERN."""
+        keys = cpt_code_keys(codes)
+        return self.sections.find_many(keys), self.subsections.find_many(keys)
+
+
+@lru_cache(maxsize=None)
+def default_index() -> CptSectionIndex:
+    """The index over the bundled data file, loaded once per process."""
+    return CptSectionIndex.load()
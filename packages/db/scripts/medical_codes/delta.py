@@ -0,0 +1,323 @@
+"""
+Row-level delta between the previous release's records and the new ones.
+
+Both sides are sorted by the table's conflict key and merged. The result
+holds three kinds of rows:
+
+- inserts: codes that are new in this release
+- changes: codes where any per-row column differs
+- terminations: codes that are missing from this release
+
+Codes are only terminated for sources that list every current code (see
+COMPLETE_SOURCE_TABLES); a partial list such as the HCPCS transaction
+report says nothing about the codes it leaves out. Rows that were already
+inactive in the previous release are compared like any other row and are
+not terminated again.
+
+The SQL for a delta upserts only the inserts and changes, and retires the
+terminated codes with ``is_active = false`` and a termination date. An
+inserted code may be one an earlier delta retired, so its upsert also
+resets ``is_active`` and the termination date. The SQL also records the
+run in ``annual_code_update`` and, when an organization is given, records
+each change in ``code_update_history``.
+"""
+
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.sql import (
+    DEFAULT_BATCH_ROWS,
+    format_value_rows,
+    iter_row_batches,
+    sql_literal,
+    sql_text,
+)
+from medical_codes.tables import TableSpec
+
+# annual_code_update.code_type for each master table (varchar(10))
+ANNUAL_UPDATE_CODE_TYPES = {
+    'icd10_code_master': 'ICD10',
+    'cpt_code_master': 'CPT',
+    'hcpcs_code_master': 'HCPCS',
+    'adjustment_reason_code': 'CARC/RARC',
+    'modifier_code': 'MODIFIER',
+}
+
+# Tables whose source lists every current code, so that a code missing from
+# a new release has been retired. The HCPCS transaction report and the CPT
+# DHS addendum are partial lists.
+COMPLETE_SOURCE_TABLES = frozenset({'icd10_code_master'})
+
+
+class RecordDelta(NamedTuple):
+    inserts: pd.DataFrame
+    # New values of changed rows, the matching previous values, and which
+    # compared columns differ; all three share one index
+    changes: pd.DataFrame
+    previous_values: pd.DataFrame
+    changed_columns: pd.DataFrame
+    # Conflict key columns of codes missing from the new release
+    terminations: pd.DataFrame
+
+    @property
+    def is_empty(self) -> bool:
+        return self.inserts.empty and self.changes.empty and self.terminations.empty
+
+
+def _values_differ(new: pd.Series, old: pd.Series) -> np.ndarray:
+    new_missing = new.isna().to_numpy()
+    old_missing = old.isna().to_numpy()
+    equal = new.to_numpy(dtype=object) == old.to_numpy(dtype=object)
+    return ~(equal | (new_missing & old_missing))
+
+
+def diff_records(
+    spec: TableSpec,
+    previous: pd.DataFrame,
+    current: pd.DataFrame,
+    terminate_missing: bool = False,
+) -> RecordDelta:
+    """
+    Merge-join the previous and current records on the conflict key. Codes
+    missing from ``current`` are only terminated with ``terminate_missing``.
+    """
+    keys = list(spec.conflict_columns)
+    compared = [name for name in spec.record_columns if name not in keys]
+    columns = keys + compared
+
+    # Inactive previous rows are compared like the rest; only the flag is kept aside
+    if 'is_active' in previous.columns:
+        active = previous['is_active'].fillna(True).astype(bool).to_numpy()
+    else:
+        active = np.ones(len(previous), dtype=bool)
+    previous = previous.reindex(columns=columns).assign(_previous_active=active)
+    previous = previous.sort_values(keys, kind='stable')
+    current = current.loc[:, columns].sort_values(keys, kind='stable')
+
+    merged = current.merge(
+        previous, on=keys, how='outer', suffixes=('', '_previous'), indicator=True, sort=True
+    )
+    side = merged['_merge'].to_numpy()
+
+    both = merged[side == 'both']
+    changed_columns = pd.DataFrame(
+        {name: _values_differ(both[name], both[f"{name}_previous"]) for name in compared},
+        index=both.index,
+    )
+    changed = changed_columns.any(axis=1).to_numpy() if compared else np.zeros(len(both), bool)
+    previous_values = both.loc[changed, [f"{name}_previous" for name in compared]]
+    previous_values.columns = compared
+
+    # Codes that were already inactive are not terminated again
+    terminated = (
+        (side == 'right_only') & merged['_previous_active'].eq(True).to_numpy() & terminate_missing
+    )
+
+    return RecordDelta(
+        inserts=merged.loc[side == 'left_only', columns].reset_index(drop=True),
+        changes=both.loc[changed, columns],
+        previous_values=previous_values,
+        changed_columns=changed_columns[changed],
+        terminations=merged.loc[terminated, keys].reset_index(drop=True),
+    )
+
+
+def termination_column(spec: TableSpec) -> str:
+    return 'termination_date' if 'termination_date' in spec.column_names else 'expiration_date'
+
+
+def reinstating_spec(spec: TableSpec) -> TableSpec:
+    """
+    ``spec`` with an upsert that also takes ``is_active`` and the termination
+    date from the new row, bringing back a code that an earlier delta retired.
+    """
+    reset = [
+        name
+        for name in ('is_active', termination_column(spec))
+        if name in spec.column_names and name not in spec.update_columns
+    ]
+    return spec._replace(update_columns=spec.update_columns + tuple(reset))
+
+
+def render_terminations(
+    spec: TableSpec,
+    terminations: pd.DataFrame,
+    termination_date: str,
+    batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+) -> str:
+    """Render ``UPDATE`` statements that retire the given codes."""
+    if terminations.empty:
+        return ''
+    keys = list(spec.conflict_columns)
+    if len(keys) == 1:
+        matches = sql_text(terminations[keys[0]]).tolist()
+        target = keys[0]
+    else:
+        columns = [sql_text(terminations[key]).tolist() for key in keys]
+        matches = ['(' + ', '.join(values) + ')' for values in zip(*columns)]
+        target = f"({', '.join(keys)})"
+
+    head = (
+        f"UPDATE {spec.table} SET\n"
+        f"    is_active = false,\n"
+        f"    {termination_column(spec)} = {sql_literal(termination_date, 'date')},\n"
+        f"    updated_at = NOW()\n"
+        f"WHERE {target} IN (\n    "
+    )
+    return ''.join(
+        head + ',\n    '.join(batch) + '\n);\n'
+        for batch in iter_row_batches(matches, batch_rows)
+    )
+
+
+def _history_value(value: Any) -> Optional[str]:
+    if value is None or value != value:  # None or NaN
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def history_rows(spec: TableSpec, delta: RecordDelta) -> pd.DataFrame:
+    """One code_update_history row per inserted code, changed field and terminated code."""
+    key = spec.conflict_columns[0]
+    frames: List[pd.DataFrame] = [
+        pd.DataFrame({
+            'code_value': delta.inserts[key],
+            'field_changed': None,
+            'old_value': None,
+            'new_value': None,
+            'change_type': 'INSERT',
+        }),
+    ]
+    for name in delta.changed_columns.columns:
+        mask = delta.changed_columns[name]
+        if not mask.any():
+            continue
+        frames.append(pd.DataFrame({
+            'code_value': delta.changes.loc[mask, key],
+            'field_changed': name,
+            'old_value': delta.previous_values.loc[mask, name].map(_history_value),
+            'new_value': delta.changes.loc[mask, name].map(_history_value),
+            'change_type': 'UPDATE',
+        }))
+    frames.append(pd.DataFrame({
+        'code_value': delta.terminations[key],
+        'field_changed': 'is_active',
+        'old_value': 'true',
+        'new_value': 'false',
+        'change_type': 'DELETE',
+    }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def render_history(
+    spec: TableSpec,
+    delta: RecordDelta,
+    organization_id: str,
+    update_source: str,
+    batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+) -> str:
+    """Render set-based inserts into code_update_history, resolving code_id by join."""
+    if len(spec.conflict_columns) != 1:
+        raise ValueError(f"code_update_history needs a single-column code key ({spec.table})")
+    rows = history_rows(spec, delta)
+    if rows.empty:
+        return ''
+    key = spec.conflict_columns[0]
+    values = format_value_rows([
+        sql_text(rows['code_value'].str.slice(0, 10)),
+        sql_text(rows['field_changed']),
+        sql_text(rows['old_value']),
+        sql_text(rows['new_value']),
+        sql_text(rows['change_type']),
+    ])
+    head = (
+        "INSERT INTO code_update_history (\n"
+        "    organization_id,\n    table_name,\n    code_id,\n    code_value,\n"
+        "    field_changed,\n    old_value,\n    new_value,\n    change_type,\n    update_source\n"
+        ")\nSELECT\n"
+        f"    {sql_literal(organization_id, 'text')}::uuid,\n"
+        f"    {sql_literal(spec.table, 'text')},\n"
+        "    m.id,\n    v.code_value,\n    v.field_changed,\n    v.old_value,\n"
+        "    v.new_value,\n    v.change_type,\n"
+        f"    {sql_literal(update_source, 'text')}\n"
+        "FROM (VALUES\n"
+    )
+    tail = (
+        "\n) AS v (code_value, field_changed, old_value, new_value, change_type)\n"
+        f"LEFT JOIN {spec.table} m ON m.{key} = v.code_value;\n"
+    )
+    return ''.join(
+        head + ','.join(batch) + tail for batch in iter_row_batches(values, batch_rows)
+    )
+
+
+def render_annual_update(
+    spec: TableSpec,
+    delta: RecordDelta,
+    total_records: int,
+    source_file: Optional[str] = None,
+    source_checksum: Optional[str] = None,
+) -> str:
+    """Render the annual_code_update row summarizing this delta."""
+    effective = spec.constants.get('effective_date') or ''
+    year = int(effective[:4]) if effective[:4].isdigit() else 'EXTRACT(YEAR FROM NOW())::integer'
+    code_type = ANNUAL_UPDATE_CODE_TYPES.get(spec.table, spec.table.upper()[:10])
+    values = [
+        str(year),
+        sql_literal(code_type, 'text'),
+        "'completed'",
+        'NOW()',
+        'NOW()',
+        str(total_records),
+        str(len(delta.inserts)),
+        str(len(delta.changes)),
+        str(len(delta.terminations)),
+        sql_literal(source_file[:255], 'text') if source_file else 'NULL',
+        sql_literal(source_checksum, 'text') if source_checksum else 'NULL',
+    ]
+    return (
+        "INSERT INTO annual_code_update (\n"
+        "    update_year,\n    code_type,\n    status,\n    started_at,\n    completed_at,\n"
+        "    total_records_processed,\n    new_codes,\n    updated_codes,\n    deprecated_codes,\n"
+        "    source_file,\n    source_checksum\n"
+        ") VALUES (\n    " + ',\n    '.join(values) + "\n);\n"
+    )
+
+
+def render_delta_sql(
+    spec: TableSpec,
+    delta: RecordDelta,
+    render_upsert: Callable[[TableSpec, pd.DataFrame], str],
+    total_records: int,
+    termination_date: Optional[str] = None,
+    batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+    organization_id: Optional[str] = None,
+    update_source: str = 'CMS',
+    source_file: Optional[str] = None,
+    source_checksum: Optional[str] = None,
+) -> str:
+    """
+    Render the SQL applying a delta: upserts of the inserted rows, which
+    reinstate retired codes, and of the changed rows (via ``render_upsert``),
+    the terminations, and the bookkeeping rows.
+    """
+    parts = []
+    if not delta.inserts.empty:
+        parts.append(render_upsert(reinstating_spec(spec), delta.inserts))
+    if not delta.changes.empty:
+        parts.append(render_upsert(spec, delta.changes))
+    termination_date = termination_date or spec.constants.get('effective_date')
+    if not delta.terminations.empty:
+        if not termination_date:
+            raise ValueError(f"A termination date is required to retire {spec.table} codes")
+        parts.append(render_terminations(spec, delta.terminations, termination_date, batch_rows))
+    if organization_id and len(spec.conflict_columns) == 1:
+        parts.append(render_history(spec, delta, organization_id, update_source, batch_rows))
+    elif organization_id:
+        print(f"  Skipping code_update_history for {spec.table}: it has a composite code key")
+    parts.append(render_annual_update(spec, delta, total_records, source_file, source_checksum))
+    return ''.join(parts)
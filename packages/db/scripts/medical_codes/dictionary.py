@@ -0,0 +1,332 @@
+"""
+Sorted, fixed-width binary dictionary of the master codes.
+
+One file holds every ICD-10, CPT, HCPCS and modifier code with what a
+validator needs to know about it: billable, header, active and 7th
+character flags, effective and termination dates and a category. Readers
+memory-map it and look codes up by binary search on numpy views of the
+mapping, so opening the file costs nothing and a lookup copies nothing.
+
+File layout, little-endian, each array starting on an 8-byte boundary:
+
+    header      magic, version, code_count, category_count, category_text_size
+    keys        S9[code_count], sorted: a code set byte (1-based index into
+                CODE_SETS) followed by the code, NUL-padded to 8 bytes
+    attributes  RECORD_DTYPE[code_count], in key order
+    categories  uint32[category_count + 1] offsets, then the UTF-8 names
+
+Dates are days since 1970-01-01, with NO_DATE for none.
+"""
+
+import datetime
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.sidecar import read_table_records
+from medical_codes.tables import (
+    CPT_CODE_MASTER,
+    HCPCS_CODE_MASTER,
+    ICD10_CODE_MASTER,
+    MODIFIER_CODE,
+)
+from medical_codes.trie import CODE_SETS, TRIE_TABLES
+
+MAGIC = b'CODEDICT'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8s4I')
+
+CODE_BYTES = 8
+KEY_DTYPE = np.dtype(f'S{CODE_BYTES + 1}')
+RECORD_DTYPE = np.dtype([
+    ('flags', 'u1'),
+    ('reserved', 'u1'),
+    ('category', '<u2'),
+    ('effective_date', '<i4'),
+    ('termination_date', '<i4'),
+])
+
+FLAG_BILLABLE = 1
+FLAG_HEADER = 2
+FLAG_ACTIVE = 4
+FLAG_REQUIRES_ADDITIONAL_DIGIT = 8
+
+NO_DATE = np.iinfo(np.int32).min
+NOT_FOUND = -1
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+# The processors write these columns with one value for the whole table
+# (TableSpec.constants), so they say nothing about an individual code
+PLACEHOLDER_COLUMNS: Dict[str, Sequence[str]] = {
+    spec.table: tuple(spec.constants)
+    for spec in (ICD10_CODE_MASTER, CPT_CODE_MASTER, HCPCS_CODE_MASTER, MODIFIER_CODE)
+}
+
+
+class CodeEntry(NamedTuple):
+    code: str
+    code_set: str
+    is_billable: bool
+    is_header: bool
+    is_active: bool
+    requires_additional_digit: bool
+    effective_date: Optional[datetime.date]
+    termination_date: Optional[datetime.date]
+    category: str
+
+
+def normalize_code(code: str) -> str:
+    """Codes are stored upper case without the ICD-10 dot: ' e11.9' -> 'E119'."""
+    return code.strip().upper().replace('.', '')
+
+
+def normalize_codes(codes: Iterable[str]) -> np.ndarray:
+    """``normalize_code`` over a column, as a unicode array."""
+    text = pd.Series(list(codes), dtype=object).astype(str)
+    text = text.str.strip().str.upper().str.replace('.', '', regex=False)
+    return text.to_numpy(dtype=str)
+
+
+def encode_key(code: str, code_set: str) -> bytes:
+    """The dictionary key of a code; codes longer than CODE_BYTES can never match."""
+    return bytes((CODE_SETS.index(code_set) + 1,)) + normalize_code(code).encode('ascii', 'replace')
+
+
+def encode_keys(codes: Iterable[str], code_set: str) -> np.ndarray:
+    """``encode_key`` over a column."""
+    prefix = bytes((CODE_SETS.index(code_set) + 1,))
+    normalized = normalize_codes(codes)
+    keys = np.char.add(prefix, np.char.encode(normalized, 'ascii', 'replace')).astype(KEY_DTYPE)
+    # Cut to KEY_DTYPE a longer code could equal a stored one; 0xFF bytes never do
+    keys[np.char.str_len(normalized) > CODE_BYTES] = prefix + b'\xff' * CODE_BYTES
+    return keys
+
+
+def date_days(values: pd.Series) -> np.ndarray:
+    """Dates as days since 1970-01-01, NO_DATE where missing."""
+    dates = pd.to_datetime(values, errors='coerce')
+    days = (dates - pd.Timestamp(_EPOCH)).dt.days
+    return days.fillna(NO_DATE).to_numpy(dtype=np.int64).astype(np.int32)
+
+
+def _day_date(days: int) -> Optional[datetime.date]:
+    return None if days == NO_DATE else _EPOCH + datetime.timedelta(days=int(days))
+
+
+def _column(records: pd.DataFrame, name: str, default: object) -> pd.Series:
+    if name in records:
+        return records[name]
+    return pd.Series(default, index=records.index, dtype=object)
+
+
+def dictionary_frame(
+    records: pd.DataFrame,
+    code_column: str,
+    code_set: str,
+    placeholder_columns: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    The dictionary columns of one master table's records. Tables without
+    is_billable or is_header (CPT, HCPCS, modifiers) have billable codes and
+    no headers.
+
+    Where there is an is_header column (ICD-10), billable means not a
+    header: is_header comes from the order file's valid-for-submission flag,
+    while is_billable is icd10_properties' structural guess, which rejects
+    valid codes such as I10 and E119. Date columns in
+    ``placeholder_columns`` are stored as NO_DATE, for dates the processor
+    set table-wide rather than read per code.
+    """
+    flags = np.zeros(len(records), dtype=np.uint8)
+    for name, flag, default in (
+        ('is_billable', FLAG_BILLABLE, True),
+        ('is_header', FLAG_HEADER, False),
+        ('is_active', FLAG_ACTIVE, True),
+        ('requires_additional_digit', FLAG_REQUIRES_ADDITIONAL_DIGIT, False),
+    ):
+        if name == 'is_billable' and 'is_header' in records:
+            values = ~records['is_header'].fillna(False).astype(bool).to_numpy()
+        else:
+            values = _column(records, name, default).fillna(default).astype(bool).to_numpy()
+        flags |= np.where(values, flag, 0).astype(np.uint8)
+
+    placeholders = set(placeholder_columns)
+
+    def dates(name: str) -> np.ndarray:
+        if name in placeholders:
+            return np.full(len(records), NO_DATE, dtype=np.int32)
+        return date_days(_column(records, name, None))
+
+    return pd.DataFrame({
+        'code': records[code_column].astype(str).map(normalize_code),
+        'code_set': code_set,
+        'flags': flags,
+        'effective_date': dates('effective_date'),
+        'termination_date': dates('termination_date'),
+        'category': _column(records, 'category', '').fillna('').astype(str),
+    }, index=records.index)
+
+
+def read_dictionary_records(directory: Union[str, Path]) -> pd.DataFrame:
+    """
+    ``dictionary_frame`` of every TRIE_TABLES master table in a sidecar
+    directory, without the table-wide PLACEHOLDER_COLUMNS dates.
+    """
+    frames = []
+    for table, code_column, code_set in TRIE_TABLES:
+        records = read_table_records(directory, table)
+        if records is not None:
+            frames.append(dictionary_frame(
+                records, code_column, code_set, PLACEHOLDER_COLUMNS.get(table, ())
+            ))
+    if not frames:
+        return dictionary_frame(pd.DataFrame({'code': []}), 'code', CODE_SETS[0])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _align(size: int) -> int:
+    return -size % 8
+
+
+def build_code_dictionary(entries: pd.DataFrame) -> bytes:
+    """Build the file contents from ``dictionary_frame`` rows; the last of a repeated code wins."""
+    too_long = entries['code'].str.len() > CODE_BYTES
+    if too_long.any():
+        examples = entries['code'][too_long].tolist()[:5]
+        raise ValueError(f"Codes longer than {CODE_BYTES} bytes: {examples}")
+
+    keys = np.empty(len(entries), dtype=KEY_DTYPE)
+    for code_set in CODE_SETS:
+        in_set = (entries['code_set'] == code_set).to_numpy()
+        keys[in_set] = encode_keys(entries['code'][in_set], code_set)
+    # Stable sort, then keep the last row of each key
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[:-1] != keys[1:]
+    order, keys = order[last], keys[last]
+
+    categories, category_ids = np.unique(
+        entries['category'].to_numpy(dtype=str), return_inverse=True
+    )
+    if len(categories) > np.iinfo(np.uint16).max:
+        raise ValueError(f"Too many categories for a uint16 id: {len(categories)}")
+    records = np.zeros(len(keys), dtype=RECORD_DTYPE)
+    records['flags'] = entries['flags'].to_numpy()[order]
+    records['category'] = category_ids[order]
+    records['effective_date'] = entries['effective_date'].to_numpy()[order]
+    records['termination_date'] = entries['termination_date'].to_numpy()[order]
+
+    names = [name.encode('utf-8') for name in categories.tolist()]
+    name_offsets = np.zeros(len(names) + 1, dtype='<u4')
+    name_offsets[1:] = np.cumsum([len(name) for name in names])
+    text = b''.join(names)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(keys), len(names), len(text))
+    parts = [header, b'\0' * _align(len(header))]
+    for section in (keys.tobytes(), records.tobytes(), name_offsets.tobytes(), text):
+        parts.append(section)
+        parts.append(b'\0' * _align(len(section)))
+    return b''.join(parts)
+
+
+def write_code_dictionary(entries: pd.DataFrame, path: Union[str, Path]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(build_code_dictionary(entries))
+    return path
+
+
+class CodeDictionary:
+    """
+    Read-only view of a dictionary file. ``keys`` and ``records`` are numpy
+    views onto the memory map; lookups binary-search ``keys`` in place.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, category_count, text_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} code dictionary file")
+
+        offset = _HEADER.size + _align(_HEADER.size)
+        self.keys = np.frombuffer(self._mmap, dtype=KEY_DTYPE, count=count, offset=offset)
+        offset += self.keys.nbytes + _align(self.keys.nbytes)
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=count, offset=offset)
+        offset += self.records.nbytes + _align(self.records.nbytes)
+        name_offsets = np.frombuffer(
+            self._mmap, dtype='<u4', count=category_count + 1, offset=offset
+        )
+        text_start = offset + name_offsets.nbytes + _align(name_offsets.nbytes)
+        # A few thousand short names; decoded once rather than per lookup
+        bounds = name_offsets.tolist()
+        self.categories: List[str] = [
+            self._mmap[text_start + start:text_start + end].decode('utf-8')
+            for start, end in zip(bounds, bounds[1:])
+        ]
+
+    def __enter__(self) -> 'CodeDictionary':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The numpy views keep the buffer exported; drop them before closing
+        self.keys = self.records = None  # type: ignore[assignment]
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def find_many(self, codes: Sequence[str], code_set: str) -> np.ndarray:
+        """Positions of codes from one code set, NOT_FOUND for unknown codes."""
+        wanted = encode_keys(codes, code_set)
+        positions = np.searchsorted(self.keys, wanted)
+        clipped = positions.clip(0, max(len(self.keys) - 1, 0))
+        found = (positions < len(self.keys)) & (self.keys[clipped] == wanted)
+        return np.where(found, positions, NOT_FOUND)
+
+    def find(self, code: str, code_set: str) -> int:
+        """Position of one code, NOT_FOUND when unknown."""
+        key = encode_key(code, code_set)
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return NOT_FOUND
+
+    def entry(self, position: int) -> CodeEntry:
+        key = self.keys[position]
+        record = self.records[position]
+        flags = int(record['flags'])
+        return CodeEntry(
+            key[1:].decode('ascii'),
+            CODE_SETS[key[0] - 1],
+            bool(flags & FLAG_BILLABLE),
+            bool(flags & FLAG_HEADER),
+            bool(flags & FLAG_ACTIVE),
+            bool(flags & FLAG_REQUIRES_ADDITIONAL_DIGIT),
+            _day_date(int(record['effective_date'])),
+            _day_date(int(record['termination_date'])),
+            self.categories[int(record['category'])],
+        )
+
+    def lookup(self, code: str, code_set: Optional[str] = None) -> Optional[CodeEntry]:
+        """A code's entry; without ``code_set``, the first set (in CODE_SETS order) having it."""
+        for candidate in (code_set,) if code_set else CODE_SETS:
+            position = self.find(code, candidate)
+            if position != NOT_FOUND:
+                return self.entry(position)
+        return None
+
+    def code_set_counts(self) -> Dict[str, int]:
+        set_bytes = self.keys.view(np.uint8).reshape(-1, KEY_DTYPE.itemsize)[:, 0]
+        counts = np.bincount(set_bytes, minlength=len(CODE_SETS) + 1)
+        return {code_set: int(counts[index + 1]) for index, code_set in enumerate(CODE_SETS)}
@@ -0,0 +1,355 @@
+"""
+Streaming, string-typed access to the CMS/AMA Excel workbooks.
+
+A Workbook opens the file once and streams rows from any of its sheets
+without loading the whole workbook into memory:
+
+- The calamine engine is used when python-calamine is installed; otherwise
+  it falls back to openpyxl's read_only mode.
+- The first row is the header.
+- Callers may project a subset of columns.
+- Every cell comes back as a string, or None for blanks. A numeric code
+  keeps the spelling it has in the sheet (``99213``, not ``99213.0``).
+"""
+
+import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from medical_codes.cache import file_sha256
+from medical_codes.sheet_cache import CachedSheet, SheetCache
+
+SheetRef = Union[int, str]
+ColumnRef = Union[int, str]
+Row = Tuple[Optional[str], ...]
+
+DEFAULT_CHUNK_ROWS = 10000
+
+
+def cell_text(value: Any) -> Optional[str]:
+    """Render one cell value as the string it displays, or None when blank."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value if value != '' else None
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0):
+            return value.date().isoformat()
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def header_names(values: Sequence[Any]) -> List[str]:
+    """Column names the way pandas derives them: 'Unnamed: i' for blanks, '.n' for repeats."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for index, value in enumerate(values):
+        name = cell_text(value)
+        name = name if name is not None else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class _OpenpyxlEngine:
+    name = 'openpyxl'
+
+    def __init__(self, path: Path) -> None:
+        import openpyxl
+
+        self._book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._book.sheetnames)
+
+    def iter_values(self, sheet_name: str) -> Iterator[Sequence[Any]]:
+        sheet = self._book[sheet_name]
+        # Some exporters write a bogus <dimension>; recompute it while streaming
+        sheet.reset_dimensions()
+        return sheet.iter_rows(values_only=True)
+
+    def close(self) -> None:
+        self._book.close()
+
+
+class _CalamineEngine:
+    name = 'calamine'
+
+    def __init__(self, path: Path) -> None:
+        from python_calamine import CalamineWorkbook
+
+        self._book = CalamineWorkbook.from_path(str(path))
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._book.sheet_names)
+
+    def iter_values(self, sheet_name: str) -> Iterator[Sequence[Any]]:
+        sheet = self._book.get_sheet_by_name(sheet_name)
+        if hasattr(sheet, 'iter_rows'):
+            return sheet.iter_rows()
+        return iter(sheet.to_python(skip_empty_area=False))
+
+    def close(self) -> None:
+        close = getattr(self._book, 'close', None)
+        if close is not None:
+            close()
+
+
+def _open_engine(path: Path, engine: Optional[str]) -> Any:
+    if engine in (None, 'calamine'):
+        try:
+            return _CalamineEngine(path)
+        except ImportError:
+            if engine == 'calamine':
+                raise
+    if engine in (None, 'openpyxl'):
+        return _OpenpyxlEngine(path)
+    raise ValueError(f"Unknown Excel engine: {engine}")
+
+
+def _projection(
+    header: List[str], columns: Optional[Sequence[ColumnRef]]
+) -> Tuple[List[str], List[Optional[int]]]:
+    """Output names and header positions for a column selection (None = missing column)."""
+    if columns is None:
+        return list(header), list(range(len(header)))
+    names: List[str] = []
+    positions: List[Optional[int]] = []
+    for column in columns:
+        if isinstance(column, int):
+            names.append(header[column] if column < len(header) else f"Unnamed: {column}")
+            positions.append(column)
+        else:
+            names.append(column)
+            positions.append(header.index(column) if column in header else None)
+    return names, positions
+
+
+def _row_text(raw: Sequence[Any], positions: Sequence[Optional[int]]) -> Row:
+    width = len(raw)
+    return tuple(
+        cell_text(raw[position]) if position is not None and position < width else None
+        for position in positions
+    )
+
+
+class Workbook:
+    """
+    An Excel workbook opened once, streaming string rows from its sheets.
+
+    With a SheetCache (and pyarrow installed), each sheet read in full is
+    stored in columnar form and later reads of the same workbook are served
+    from the memory-mapped cache; the workbook itself is only opened on a miss.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        engine: Optional[str] = None,
+        cache: Optional[SheetCache] = None,
+    ) -> None:
+        self.path = Path(path)
+        self._engine_name = engine
+        self._engine: Any = None
+        if cache is not None and not cache.available():
+            print("  pyarrow is not installed; reading Excel sheets without the sheet cache")
+            cache = None
+        self.cache = cache
+        self._workbook_hash: Optional[str] = None
+        self._sheet_names: Optional[List[str]] = None
+
+    def __enter__(self) -> 'Workbook':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._engine is not None:
+            self._engine.close()
+            self._engine = None
+
+    @property
+    def _book(self) -> Any:
+        if self._engine is None:
+            self._engine = _open_engine(self.path, self._engine_name)
+        return self._engine
+
+    @property
+    def engine(self) -> str:
+        return self._book.name
+
+    @property
+    def workbook_hash(self) -> str:
+        if self._workbook_hash is None:
+            self._workbook_hash = file_sha256(self.path)
+        return self._workbook_hash
+
+    @property
+    def sheet_names(self) -> List[str]:
+        if self._sheet_names is None:
+            names = None
+            if self.cache is not None:
+                names = self.cache.load_sheet_names(self.workbook_hash)
+            if names is None:
+                names = self._book.sheet_names
+                if self.cache is not None:
+                    self.cache.store_sheet_names(self.workbook_hash, names)
+            self._sheet_names = names
+        return self._sheet_names
+
+    def sheet_name(self, sheet: SheetRef) -> str:
+        """Resolve a sheet index or name; raises KeyError if there is no such sheet."""
+        names = self.sheet_names
+        if isinstance(sheet, int):
+            if not 0 <= sheet < len(names):
+                raise KeyError(f"Worksheet index {sheet} out of range ({len(names)} sheets)")
+            return names[sheet]
+        if sheet not in names:
+            raise KeyError(f"Worksheet named '{sheet}' not found")
+        return sheet
+
+    def first_sheet(self, candidates: Sequence[SheetRef]) -> str:
+        """Return the first of ``candidates`` present in the workbook."""
+        for sheet in candidates:
+            try:
+                return self.sheet_name(sheet)
+            except KeyError:
+                continue
+        raise KeyError(f"None of the sheets {list(candidates)} found in {self.path.name}")
+
+    def iter_rows(
+        self, sheet: SheetRef = 0, columns: Optional[Sequence[ColumnRef]] = None
+    ) -> Tuple[List[str], Iterator[Row]]:
+        """
+        Return the header names and an iterator over the data rows as string
+        tuples. ``columns`` projects (and orders) the output by header name or
+        position; names missing from the sheet come back as all-None columns.
+        Completely blank rows are skipped.
+        """
+        values = iter(self._book.iter_values(self.sheet_name(sheet)))
+        names, positions = _projection(header_names(next(values, ())), columns)
+
+        def rows() -> Iterator[Row]:
+            for raw in values:
+                row = _row_text(raw, positions)
+                if any(cell is not None for cell in row):
+                    yield row
+
+        return names, rows()
+
+    def iter_frames(
+        self,
+        sheet: SheetRef = 0,
+        columns: Optional[Sequence[ColumnRef]] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the sheet as object-dtype DataFrames of up to ``chunk_rows``
+        rows, always yielding at least one (possibly empty) frame.
+        """
+        sheet_name = self.sheet_name(sheet)
+        if self.cache is None:
+            names, rows = self.iter_rows(sheet_name, columns)
+            return _chunk_frames(rows, names, chunk_rows)
+
+        cached = self.cache.open_sheet(self.workbook_hash, sheet_name)
+        if cached is not None:
+            print(f"  Using cached sheet '{sheet_name}' ({cached.num_rows} rows) for {self.path}")
+            return _cached_frames(cached, columns, chunk_rows)
+        return self._caching_frames(sheet_name, columns, chunk_rows)
+
+    def _caching_frames(
+        self, sheet_name: str, columns: Optional[Sequence[ColumnRef]], chunk_rows: int
+    ) -> Iterator[pd.DataFrame]:
+        """Stream from the workbook while writing every column to the sheet cache."""
+        assert self.cache is not None
+        values = iter(self._book.iter_values(sheet_name))
+        header = header_names(next(values, ()))
+        names, positions = _projection(header, columns)
+        all_positions = list(range(len(header)))
+        writer = self.cache.writer(self.workbook_hash, sheet_name, header)
+
+        def full_rows() -> Iterator[Row]:
+            for raw in values:
+                row = _row_text(raw, all_positions)
+                if any(cell is not None for cell in row):
+                    yield row
+
+        offset = 0
+        try:
+            for chunk in _batches(full_rows(), chunk_rows):
+                writer.write(chunk)
+                projected = [_row_text(row, positions) for row in chunk]
+                projected = [row for row in projected if any(cell is not None for cell in row)]
+                yield _frame(projected, names, offset)
+                offset += len(projected)
+            writer.commit()
+        finally:
+            # Only a fully read sheet is published
+            writer.abort()
+
+    def read_frame(
+        self, sheet: SheetRef = 0, columns: Optional[Sequence[ColumnRef]] = None
+    ) -> pd.DataFrame:
+        """Read a whole sheet (or the projected columns) as one object-dtype DataFrame."""
+        return pd.concat(list(self.iter_frames(sheet, columns)))
+
+
+def _batches(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    """Group rows into lists of ``size``; yields one empty list for no rows."""
+    batch: List[Row] = []
+    emitted = False
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            emitted = True
+            batch = []
+    if batch or not emitted:
+        yield batch
+
+
+def _chunk_frames(rows: Iterator[Row], names: List[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    offset = 0
+    for chunk in _batches(rows, chunk_rows):
+        yield _frame(chunk, names, offset)
+        offset += len(chunk)
+
+
+def _cached_frames(
+    cached: CachedSheet, columns: Optional[Sequence[ColumnRef]], chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    names, positions = _projection(cached.header, columns)
+    offset = 0
+    for length, arrays in cached.iter_columns(positions, chunk_rows):
+        if not length and offset:
+            continue
+        frame = pd.DataFrame(
+            dict(enumerate(arrays)), index=pd.RangeIndex(offset, offset + length), dtype=object
+        )
+        frame.columns = names
+        yield frame
+        offset += length
+
+
+def _frame(rows: List[Row], names: List[str], offset: int) -> pd.DataFrame:
+    index = pd.RangeIndex(offset, offset + len(rows))
+    frame = pd.DataFrame.from_records(rows, columns=names, index=index, coerce_float=False)
+    return frame.astype(object)
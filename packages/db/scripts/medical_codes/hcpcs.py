@@ -0,0 +1,67 @@
+"""Columnar transform of the HCPCS "Changes by HCPC" transaction sheet."""
+
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from medical_codes.classification import classify_hcpcs_codes
+from medical_codes.metrics import DROP_BLANK, DROP_DUPLICATE, count_dropped
+from medical_codes.text import clean_text_column
+
+# D = Discontinued
+DISCONTINUED_ACTION_CODE = 'D'
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Return a sheet column, or an all-missing column if the sheet lacks it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def transform_hcpcs_frame(
+    df: pd.DataFrame, dropped: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    Turn the raw transaction sheet into hcpcs_code_master columns.
+
+    Keeps the first row of each HCPC code, drops blank codes, maps the category
+    from the first letter and derives is_active from the action code. Text
+    values are stripped and truncated but not SQL-escaped. Dropped rows are
+    counted by reason into ``dropped``, if given.
+    """
+    codes = clean_text_column(_column(df, 'HCPC'))
+    keep = codes.notna() & (codes != '')
+    duplicate = codes.where(keep).duplicated()
+    count_dropped(dropped, DROP_BLANK, len(keep) - keep.sum())
+    count_dropped(dropped, DROP_DUPLICATE, (keep & duplicate).sum())
+    keep &= ~duplicate
+
+    rows = df[keep]
+    codes = codes[keep]
+
+    category = pd.Series(classify_hcpcs_codes(codes), index=codes.index, dtype=object)
+
+    action_code = clean_text_column(_column(rows, 'ACTION CD'))
+
+    return pd.DataFrame({
+        'hcpcs_code': codes,
+        'short_description': clean_text_column(_column(rows, 'SHORT DESCRIPTION'), 100).fillna(''),
+        'long_description': clean_text_column(_column(rows, 'LONG DESCRIPTION'), 1000).fillna(''),
+        'category': category,
+        'action_code': action_code,
+        'is_active': (action_code != DISCONTINUED_ACTION_CODE).to_numpy(),
+    }, index=rows.index)
+
+
+def transform_hcpcs_chunks(
+    chunks: Iterable[pd.DataFrame], dropped: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    ``transform_hcpcs_frame`` over a sheet streamed in consecutive chunks;
+    ``chunks`` must yield at least one (possibly empty) frame.
+    """
+    records = pd.concat([transform_hcpcs_frame(chunk, dropped) for chunk in chunks])
+    duplicate = records['hcpcs_code'].duplicated()
+    count_dropped(dropped, DROP_DUPLICATE, duplicate.sum())
+    return records[~duplicate]
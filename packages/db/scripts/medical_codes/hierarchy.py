@@ -0,0 +1,104 @@
+"""
+ICD-10-CM code tree built from the order file's sort order.
+
+The order file is sorted by code, so every code comes right after its
+parent or an earlier sibling's subtree (E11, E111, E1110, E1111, E112,
+...), and a parent is always a prefix of its children.
+One pass with a stack of the current branch therefore places every code:
+pop until the top of the stack is a prefix of the code, and that top is
+its parent. The stack at that moment is also the code's full ancestor
+chain, so the closure rows are emitted in the same pass.
+
+The result is two derived tables: icd10_code_hierarchy (parent pointer,
+depth and materialized path per code) and icd10_code_closure (one row per
+ancestor/descendant pair, each code included as its own ancestor at
+distance 0). "All codes under E11" is then an index lookup on
+``ancestor_code = 'E11'`` instead of a ``LIKE 'E11%'`` scan.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from medical_codes.tables import ICD10_CODE_CLOSURE, ICD10_CODE_HIERARCHY
+
+PATH_SEPARATOR = '/'
+
+# Both tables hold nothing but what is derived from the master codes
+HIERARCHY_DDL = """\
+CREATE TABLE IF NOT EXISTS icd10_code_hierarchy (
+    icd10_code varchar(10) PRIMARY KEY,
+    parent_code varchar(10),
+    depth integer NOT NULL,
+    path text NOT NULL,
+    updated_at timestamp NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS icd10_code_hierarchy_parent_idx
+    ON icd10_code_hierarchy (parent_code);
+CREATE INDEX IF NOT EXISTS icd10_code_hierarchy_path_idx
+    ON icd10_code_hierarchy (path text_pattern_ops);
+
+CREATE TABLE IF NOT EXISTS icd10_code_closure (
+    ancestor_code varchar(10) NOT NULL,
+    descendant_code varchar(10) NOT NULL,
+    distance integer NOT NULL,
+    updated_at timestamp NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (ancestor_code, descendant_code)
+);
+CREATE INDEX IF NOT EXISTS icd10_code_closure_descendant_idx
+    ON icd10_code_closure (descendant_code, distance);
+"""
+
+
+class ICD10Hierarchy(NamedTuple):
+    """Records for the icd10_code_hierarchy and icd10_code_closure tables."""
+
+    nodes: pd.DataFrame
+    closure: pd.DataFrame
+
+
+def build_icd10_hierarchy(codes: Iterable[str]) -> ICD10Hierarchy:
+    """
+    Build the code tree from codes in order file order (sorted, so each
+    parent comes just before its children); codes out of order are sorted
+    first. A code with no parent in the list, normally a three character
+    category, is a root at depth 0.
+    """
+    codes = list(codes)
+    if any(following < code for code, following in zip(codes, codes[1:])):
+        codes.sort()
+
+    node_rows: List[Tuple[str, Optional[str], int, str]] = []
+    ancestors: List[str] = []
+    descendants: List[str] = []
+    distances: List[int] = []
+
+    # The current branch, root first, with each code's path alongside
+    stack: List[str] = []
+    paths: List[str] = []
+    for code in codes:
+        while stack and not code.startswith(stack[-1]):
+            stack.pop()
+            paths.pop()
+        if stack and code == stack[-1]:
+            raise ValueError(f"Duplicate ICD-10 code in hierarchy input: {code}")
+
+        depth = len(stack)
+        path = paths[-1] + PATH_SEPARATOR + code if paths else code
+        node_rows.append((code, stack[-1] if stack else None, depth, path))
+
+        ancestors.extend(stack)
+        ancestors.append(code)
+        descendants.extend([code] * (depth + 1))
+        distances.extend(range(depth, -1, -1))
+
+        stack.append(code)
+        paths.append(path)
+
+    nodes = pd.DataFrame.from_records(node_rows, columns=ICD10_CODE_HIERARCHY.record_columns)
+    closure = pd.DataFrame({
+        'ancestor_code': pd.Series(ancestors, dtype=object),
+        'descendant_code': pd.Series(descendants, dtype=object),
+        'distance': pd.Series(distances, dtype='int64'),
+    }, columns=list(ICD10_CODE_CLOSURE.record_columns))
+    return ICD10Hierarchy(nodes, closure)
@@ -0,0 +1,280 @@
+"""
+Streaming parser for the CMS ICD-10-CM order file (icd10cm_order_YYYY.txt).
+
+The order file is fixed-width, so columns are sliced at known offsets instead of
+being split on whitespace (which would cut multi-word descriptions apart).
+iter_icd10_order_records yields one record per line; iter_icd10_order_frames
+slices blocks of lines as columns and yields them as DataFrames, which
+transform_icd10_chunks turns into icd10_code_master records without a
+per-row step.
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from medical_codes.classification import classify_icd10_chapters, classify_icd10_properties
+from medical_codes.metrics import DROP_DUPLICATE, DROP_FAILED_REGEX, count_dropped
+
+# Column layout (0-based, end-exclusive). Single spaces separate each column.
+#   order number (5) | code (7) | header flag (1) | short description (60) | long description
+ORDER_NUMBER_START, ORDER_NUMBER_END = 0, 5
+CODE_START, CODE_END = 6, 13
+HEADER_FLAG_START = 14
+SHORT_DESCRIPTION_START, SHORT_DESCRIPTION_END = 16, 76
+LONG_DESCRIPTION_START = 77
+
+# '0' marks a header (non-billable) row, '1' a code valid for submission
+HEADER_FLAG = '0'
+
+ICD10_CODE_PATTERN = re.compile(r'^[A-Z]\d{2}')
+
+# Order file lines sliced together by iter_icd10_order_frames
+DEFAULT_FRAME_LINES = 100000
+
+# icd10_code_master columns of the records built from the order file
+ICD10_RECORD_COLUMNS = (
+    'icd10_code',
+    'short_description',
+    'long_description',
+    'chapter',
+    'chapter_range',
+    'category',
+    'is_billable',
+    'is_header',
+    'requires_additional_digit',
+)
+
+
+class ICD10OrderRecord(NamedTuple):
+    """One row of the ICD-10-CM order file."""
+
+    order_number: int
+    code: str
+    is_header: bool
+    short_description: str
+    long_description: str
+
+
+def iter_icd10_order_records(lines: Iterable[str]) -> Iterator[ICD10OrderRecord]:
+    """Parse order file lines into records, skipping blank or malformed lines."""
+    new_record = tuple.__new__
+    for line in lines:
+        if len(line) <= SHORT_DESCRIPTION_START + 1:
+            continue
+        try:
+            order_number = int(line[ORDER_NUMBER_START:ORDER_NUMBER_END])
+        except ValueError:
+            continue
+
+        short_description = line[SHORT_DESCRIPTION_START:SHORT_DESCRIPTION_END].rstrip()
+        # rstrip() also drops the trailing newline
+        long_description = line[LONG_DESCRIPTION_START:].rstrip()
+
+        # tuple.__new__ skips the generated NamedTuple.__new__ wrapper on this hot path
+        yield new_record(ICD10OrderRecord, (
+            order_number,
+            line[CODE_START:CODE_END].rstrip(),
+            line[HEADER_FLAG_START] == HEADER_FLAG,
+            short_description,
+            long_description or short_description,
+        ))
+
+
+def parse_icd10_order_file(
+    file_path: Union[str, Path], encoding: str = 'utf-8'
+) -> Iterator[ICD10OrderRecord]:
+    """Lazily yield records from an order file; memory use is independent of file size."""
+    with open(file_path, 'r', encoding=encoding) as file:
+        yield from iter_icd10_order_records(file)
+
+
+def icd10_order_frame(lines: Sequence[str]) -> pd.DataFrame:
+    """
+    ``iter_icd10_order_records`` over a block of lines, column by column: one
+    column per ICD10OrderRecord field, one row per record.
+    """
+    text = pd.Series(list(lines), dtype=str)
+    text = text[(text.str.len() > SHORT_DESCRIPTION_START + 1).to_numpy(dtype=bool)]
+    order_number = text.str.slice(ORDER_NUMBER_START, ORDER_NUMBER_END).str.strip()
+    # The digits int() accepts; the order file has no signs
+    numbered = order_number.str.isdecimal().to_numpy(dtype=bool)
+    text = text[numbered]
+
+    short_description = text.str.slice(SHORT_DESCRIPTION_START, SHORT_DESCRIPTION_END).str.rstrip()
+    long_description = text.str.slice(LONG_DESCRIPTION_START).str.rstrip()
+    header_flag = text.str.slice(HEADER_FLAG_START, HEADER_FLAG_START + 1)
+    return pd.DataFrame({
+        'order_number': order_number[numbered].astype('int64'),
+        'code': text.str.slice(CODE_START, CODE_END).str.rstrip(),
+        'is_header': (header_flag == HEADER_FLAG).to_numpy(dtype=bool),
+        'short_description': short_description,
+        'long_description': long_description.where(long_description != '', short_description),
+    }).reset_index(drop=True)
+
+
+def iter_icd10_order_frames(
+    file_path: Union[str, Path],
+    frame_lines: int = DEFAULT_FRAME_LINES,
+    encoding: str = 'utf-8',
+) -> Iterator[pd.DataFrame]:
+    """Yield the records of an order file as frames of up to ``frame_lines`` lines each."""
+    with open(file_path, 'r', encoding=encoding) as file:
+        while True:
+            lines = list(islice(file, frame_lines))
+            if not lines:
+                return
+            yield icd10_order_frame(lines)
+
+
+def transform_icd10_frame(
+    records: pd.DataFrame, dropped: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    Turn order file records into icd10_code_master columns.
+
+    Keeps the first record of each code and drops codes that do not start
+    with a letter and two digits; dropped rows are counted by reason into
+    ``dropped``, if given.
+    """
+    codes = records['code']
+    duplicate = codes.duplicated().to_numpy(dtype=bool)
+    valid = codes.str.match(ICD10_CODE_PATTERN.pattern).to_numpy(dtype=bool)
+    count_dropped(dropped, DROP_DUPLICATE, duplicate.sum())
+    count_dropped(dropped, DROP_FAILED_REGEX, (~duplicate & ~valid).sum())
+
+    records = records[~duplicate & valid]
+    codes = records['code']
+    chapters, chapter_ranges = classify_icd10_chapters(codes)
+    is_billable, requires_additional_digit = classify_icd10_properties(codes)
+    long_description = records['long_description']
+    if (long_description.str.len() > 1000).any():
+        long_description = long_description.str.slice(0, 1000)
+    return pd.DataFrame({
+        'icd10_code': codes,
+        # Short descriptions are a 60-character column, within the 100 the table allows
+        'short_description': records['short_description'],
+        'long_description': long_description,
+        'chapter': pd.Series(chapters, index=codes.index),
+        'chapter_range': pd.Series(chapter_ranges, index=codes.index),
+        'category': codes.str.slice(0, 3),
+        'is_billable': is_billable,
+        'is_header': records['is_header'],
+        'requires_additional_digit': requires_additional_digit,
+    }, columns=ICD10_RECORD_COLUMNS).reset_index(drop=True)
+
+
+def transform_icd10_chunks(
+    chunks: Iterable[pd.DataFrame], dropped: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """``transform_icd10_frame`` over an order file read in consecutive frames."""
+    frames = list(chunks)
+    records = pd.concat(frames, ignore_index=True) if frames else icd10_order_frame([])
+    return transform_icd10_frame(records, dropped)
+
+
+def split_line_aligned_ranges(buffer: Any, count: int) -> List[Tuple[int, int]]:
+    """Split a bytes-like buffer into up to ``count`` ranges that each end on a line break."""
+    size = len(buffer)
+    boundaries = [0]
+    for index in range(1, count):
+        newline = buffer.find(b'\n', max(size * index // count, boundaries[-1]))
+        if newline == -1:
+            break
+        boundaries.append(newline + 1)
+    boundaries.append(size)
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def iter_unique_transformed_records(
+    records: Iterable[ICD10OrderRecord], transform: Callable[[ICD10OrderRecord], Any]
+) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(code, transform(record))`` for the first record of each code."""
+    processed_codes = set()
+    for record in records:
+        if record.code in processed_codes:
+            continue
+        processed_codes.add(record.code)
+        yield record.code, transform(record)
+
+
+def _transform_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    encoding: str,
+    transform: Callable[[ICD10OrderRecord], Any],
+) -> List[Tuple[str, Any]]:
+    """Worker entry point: parse and transform one line-aligned byte range of the file."""
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            text = buffer[start:end].decode(encoding)
+
+    records = iter_icd10_order_records(text.split('\n'))
+    return list(iter_unique_transformed_records(records, transform))
+
+
+def transform_icd10_order_file_parallel(
+    file_path: Union[str, Path],
+    transform: Callable[[ICD10OrderRecord], Any],
+    workers: Optional[int] = None,
+    encoding: str = 'utf-8',
+) -> List[Any]:
+    """
+    Parse and transform an order file across worker processes.
+
+    The file is memory-mapped and split into line-aligned byte ranges, one per
+    worker. Results come back in file order, keeping only the first record of
+    each code; ``transform`` may return None to drop a record. ``transform`` must
+    be picklable (a module-level function). ``workers`` defaults to one per CPU.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    file_path = str(file_path)
+
+    if os.path.getsize(file_path) == 0:
+        return []
+
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            ranges = split_line_aligned_ranges(buffer, workers)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [
+            executor.submit(_transform_byte_range, file_path, start, end, encoding, transform)
+            for start, end in ranges
+        ]
+
+        # Merge in range order so a code repeated across ranges keeps its first occurrence
+        results = []
+        processed_codes = set()
+        for future in futures:
+            for code, result in future.result():
+                if code in processed_codes:
+                    continue
+                processed_codes.add(code)
+                if result is not None:
+                    results.append(result)
+
+    return results
@@ -0,0 +1,95 @@
+"""
+Single-pass keyword classifier.
+
+Rules are ordered keyword lists per output field, evaluated first-match-wins
+like an if/elif chain of ``any(word in text for word in keywords)`` checks.
+All keywords are compiled into one trie-shaped regular expression, so each
+text is scanned once regardless of how many rules or fields there are.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+
+class KeywordRule(NamedTuple):
+    """Assign ``value`` to ``field`` when any keyword occurs in the text."""
+
+    field: str
+    value: Any
+    keywords: Sequence[str]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex matching any of ``words``, factored on shared prefixes."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        is_word_end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_word_end:
+            return branches[0]
+        # Greedy optional group, so the longest keyword at a position wins
+        return '(?:' + '|'.join(branches) + ')' + ('?' if is_word_end else '')
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """Compiled first-match-wins keyword rules for several fields."""
+
+    def __init__(self, rules: Sequence[KeywordRule], defaults: Dict[str, Any]):
+        self.defaults = dict(defaults)
+        self._values: Dict[str, List[Any]] = {field: [] for field in self.defaults}
+        # keyword -> field -> index of the first (highest precedence) rule using it
+        self._priorities: Dict[str, Dict[str, int]] = {}
+
+        for rule in rules:
+            if rule.field not in self._values:
+                raise ValueError(f"No default given for field '{rule.field}'")
+            priority = len(self._values[rule.field])
+            self._values[rule.field].append(rule.value)
+            for keyword in rule.keywords:
+                self._priorities.setdefault(keyword.lower(), {}).setdefault(rule.field, priority)
+
+        keywords = sorted(self._priorities)
+        # A match on a keyword also means every keyword it contains occurs in the text
+        self._contained: Dict[str, List[str]] = {
+            keyword: [other for other in keywords if other in keyword] for keyword in keywords
+        }
+        self._pattern = re.compile(_trie_pattern(keywords)) if keywords else None
+
+    def matched_keywords(self, text: Optional[str]) -> set:
+        """Return every keyword that occurs in ``text`` (case-insensitive substring match)."""
+        if not text or self._pattern is None:
+            return set()
+        text = text.lower()
+        search = self._pattern.search
+        found: set = set()
+        # Restart one character after each match start so overlapping keywords are found too
+        match = search(text)
+        while match:
+            keyword = match.group()
+            if keyword not in found:
+                found.update(self._contained[keyword])
+            match = search(text, match.start() + 1)
+        return found
+
+    def classify(self, text: Optional[str]) -> Dict[str, Any]:
+        """Return the value of every field for ``text``, falling back to the defaults."""
+        best: Dict[str, int] = {}
+        for keyword in self.matched_keywords(text):
+            for field, priority in self._priorities[keyword].items():
+                if priority < best.get(field, priority + 1):
+                    best[field] = priority
+
+        result = dict(self.defaults)
+        for field, priority in best.items():
+            result[field] = self._values[field][priority]
+        return result
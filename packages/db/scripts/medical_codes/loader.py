@@ -0,0 +1,241 @@
+"""
+Load records straight into PostgreSQL through staging tables.
+
+Loading has two steps:
+
+1. stage: COPY one table's records into its staging table, tagged with an
+   import batch id, and commit. The schema's ``cpt_code_staging``,
+   ``hcpcs_code_staging`` and ``icd10_code_staging`` tables are used as they
+   are. CARC/RARC and modifier codes have no staging table in the schema, so
+   the loader creates an UNLOGGED copy of the master table's columns on
+   first use.
+2. promote: move every staged table of the batch into its master table with
+   one set-based ``INSERT ... SELECT ... ON CONFLICT`` per table and delete
+   the batch from the staging table. All of them run in a single
+   transaction, so either every table is cut over or none is. A batch with
+   a table that failed to stage is not promoted at all.
+
+Database errors are raised as LoadError, so the scripts can report them
+apart from failures to write their output files.
+
+Requires psycopg (version 3). The SQL builders work without it.
+"""
+
+import datetime
+import uuid
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+
+from medical_codes.pgcopy import render_copy_rows
+from medical_codes.sidecar import table_frame
+from medical_codes.sql import conflict_clause, sql_literal
+from medical_codes.tables import Column, TableSpec
+
+DEFAULT_COPY_ROWS = 10000
+
+
+class LoadError(Exception):
+    """Staging or promoting a batch failed in the database."""
+
+
+class StagingTable(NamedTuple):
+    table: str
+    # Created by the loader as UNLOGGED rather than defined in the schema
+    managed: bool
+
+
+STAGING_TABLES = {
+    'icd10_code_master': StagingTable('icd10_code_staging', managed=False),
+    'cpt_code_master': StagingTable('cpt_code_staging', managed=False),
+    'hcpcs_code_master': StagingTable('hcpcs_code_staging', managed=False),
+    'adjustment_reason_code': StagingTable('adjustment_reason_code_staging', managed=True),
+    'modifier_code': StagingTable('modifier_code_staging', managed=True),
+}
+
+# Master columns the schema's staging tables do not have; promoted from the constants
+_UNSTAGED_COLUMNS = ('usage_count', 'last_used_date')
+
+_BATCH_COLUMNS = (Column('update_year', 'integer'), Column('import_batch', 'text'))
+
+
+def staging_table(spec: TableSpec) -> StagingTable:
+    try:
+        return STAGING_TABLES[spec.table]
+    except KeyError:
+        raise ValueError(f"No staging table for {spec.table}") from None
+
+
+def staged_columns(spec: TableSpec) -> Tuple[Column, ...]:
+    """The master columns that are copied into the staging table."""
+    if staging_table(spec).managed:
+        return spec.columns
+    return tuple(column for column in spec.columns if column.name not in _UNSTAGED_COLUMNS)
+
+
+def new_import_batch() -> str:
+    """A batch id that sorts by time, e.g. ``20260115T093000-1a2b3c4d``."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def update_year(spec: TableSpec) -> int:
+    effective = spec.constants.get('effective_date') or ''
+    if effective[:4].isdigit():
+        return int(effective[:4])
+    return datetime.date.today().year
+
+
+def render_staging_ddl(spec: TableSpec) -> str:
+    """``CREATE UNLOGGED TABLE IF NOT EXISTS`` for a loader-managed staging table."""
+    staging = staging_table(spec)
+    if not staging.managed:
+        return ''
+    # LIKE keeps the master's column types (enums included) so promotion needs no casts
+    return (
+        f"CREATE UNLOGGED TABLE IF NOT EXISTS {staging.table} (\n"
+        f"    LIKE {spec.table} INCLUDING DEFAULTS,\n"
+        "    update_year integer NOT NULL,\n"
+        "    import_batch varchar(50) NOT NULL,\n"
+        "    validation_status varchar(20) DEFAULT 'pending'\n"
+        ");\n"
+        f"CREATE INDEX IF NOT EXISTS {staging.table}_batch_idx\n"
+        f"    ON {staging.table} (import_batch);\n"
+    )
+
+
+def render_copy_statement(spec: TableSpec) -> str:
+    names = [column.name for column in staged_columns(spec) + _BATCH_COLUMNS]
+    return (
+        f"COPY {staging_table(spec).table} ({', '.join(names)}) FROM STDIN WITH (FORMAT text)"
+    )
+
+
+def iter_copy_data(
+    spec: TableSpec,
+    records: pd.DataFrame,
+    import_batch: str,
+    chunk_rows: int = DEFAULT_COPY_ROWS,
+) -> Iterator[str]:
+    """Yield COPY text-format data for the staging table, ``chunk_rows`` records at a time."""
+    columns = staged_columns(spec) + _BATCH_COLUMNS
+    layout = TableSpec(staging_table(spec).table, columns, (), (), {})
+    year = update_year(spec)
+    for start in range(0, len(records), chunk_rows):
+        frame = table_frame(spec, records.iloc[start:start + chunk_rows])
+        frame = frame.assign(update_year=year, import_batch=import_batch)
+        yield render_copy_rows(layout, frame, 'text')
+
+
+def _promote_expression(spec: TableSpec, column: Column, staged: Set[str]) -> str:
+    if column.name in staged:
+        return column.name
+    value = spec.constants.get(column.name)
+    # Untyped NULLs would be resolved as text, so cast them explicitly
+    return f"NULL::{column.sql_type}" if value is None else sql_literal(value, column.sql_type)
+
+
+def render_promote(spec: TableSpec, import_batch: str) -> str:
+    """Upsert one batch from the staging table into the master table."""
+    staged = {column.name for column in staged_columns(spec)}
+    targets = ',\n    '.join(spec.column_names)
+    selects = ',\n    '.join(_promote_expression(spec, column, staged) for column in spec.columns)
+    return (
+        f"INSERT INTO {spec.table} (\n    {targets}\n)\nSELECT\n    {selects}\n"
+        f"FROM {staging_table(spec).table}\n"
+        f"WHERE import_batch = {sql_literal(import_batch, 'text')}"
+        + conflict_clause(spec)
+    )
+
+
+def _psycopg() -> Any:
+    try:
+        import psycopg
+    except ImportError as e:
+        raise RuntimeError(
+            "Loading into the database requires psycopg (pip install psycopg)"
+        ) from e
+    return psycopg
+
+
+class DatabaseLoader:
+    """Stages tables as they are produced and promotes them together at the end."""
+
+    def __init__(
+        self,
+        conninfo: str,
+        import_batch: Optional[str] = None,
+        chunk_rows: int = DEFAULT_COPY_ROWS,
+    ) -> None:
+        self.conninfo = conninfo
+        self.import_batch = import_batch or new_import_batch()
+        self.chunk_rows = chunk_rows
+        self.staged: Dict[str, TableSpec] = {}
+        # Tables whose staging failed; they keep the whole batch from being promoted
+        self.failed: List[str] = []
+
+    def connect(self) -> Any:
+        return _psycopg().connect(self.conninfo)
+
+    def stage(self, spec: TableSpec, records: pd.DataFrame) -> int:
+        """COPY the records into the staging table in their own committed transaction."""
+        staging = staging_table(spec).table
+        psycopg = _psycopg()
+        try:
+            with self.connect() as connection:
+                with connection.cursor() as cursor:
+                    ddl = render_staging_ddl(spec)
+                    if ddl:
+                        cursor.execute(ddl)
+                    # A re-run of the same batch replaces what it staged before
+                    cursor.execute(
+                        f"DELETE FROM {staging} WHERE import_batch = %s", (self.import_batch,)
+                    )
+                    with cursor.copy(render_copy_statement(spec)) as copy:
+                        for data in iter_copy_data(
+                            spec, records, self.import_batch, self.chunk_rows
+                        ):
+                            copy.write(data)
+        except psycopg.Error as e:
+            self.failed.append(spec.table)
+            raise LoadError(f"Could not stage {spec.table} into {staging}: {e}") from e
+        self.staged[spec.table] = spec
+        print(f"  Staged {len(records)} rows into {staging} (batch {self.import_batch})")
+        return len(records)
+
+    def join(self, other: 'DatabaseLoader') -> None:
+        """Adopt the tables another loader of the same batch has staged."""
+        self.staged.update(other.staged)
+        self.failed.extend(other.failed)
+
+    def promote(self) -> List[Tuple[str, int]]:
+        """
+        Promote every staged table and delete the batch from the staging
+        tables, all in one transaction; returns (table, rows) pairs.
+        """
+        if self.failed:
+            raise LoadError(
+                f"Not promoting batch {self.import_batch}: staging failed for "
+                f"{', '.join(self.failed)}"
+            )
+        if not self.staged:
+            return []
+        psycopg = _psycopg()
+        results = []
+        try:
+            with self.connect() as connection:
+                with connection.transaction():
+                    with connection.cursor() as cursor:
+                        for spec in self.staged.values():
+                            cursor.execute(render_promote(spec, self.import_batch))
+                            results.append((spec.table, cursor.rowcount))
+                            cursor.execute(
+                                f"DELETE FROM {staging_table(spec).table} "
+                                "WHERE import_batch = %s",
+                                (self.import_batch,),
+                            )
+        except psycopg.Error as e:
+            raise LoadError(f"Could not promote batch {self.import_batch}: {e}") from e
+        for table, rows in results:
+            print(f"  Promoted {rows} rows into {table}")
+        return results
@@ -0,0 +1,259 @@
+"""
+Per-stage timing and memory metrics for the processor scripts.
+
+A run records one ProcessorMetrics per processor (icd10, hcpcs, ...), and
+each processor records its stages: read, transform, serialize and write.
+A stage tracks wall and CPU time, rows in and out, rows dropped per reason
+and, with memory tracing on, the tracemalloc peak.
+
+A stage may be entered many times; its figures add up. Streaming readers
+use that to alternate between read and transform chunk by chunk. Stages
+nest, and the time and memory of an inner stage are not counted again in
+the stage around it, so the stages of a processor add up to its total.
+
+Memory tracing slows allocation-heavy code down noticeably, so it is off
+unless asked for; without it the peaks are reported as null.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
+
+STAGES = ('read', 'transform', 'serialize', 'write')
+
+# Why a row produced no record
+DROP_DUPLICATE = 'duplicate'
+DROP_FAILED_REGEX = 'failed_regex'
+DROP_BLANK = 'blank'
+DROP_HEADER = 'header'
+
+T = TypeVar('T')
+
+
+def count_dropped(dropped: Optional[Dict[str, int]], reason: str, rows: int) -> None:
+    """Add ``rows`` to ``dropped[reason]``; a no-op without a ``dropped`` dict."""
+    if dropped is not None and rows:
+        dropped[reason] = dropped.get(reason, 0) + int(rows)
+
+
+# Peak of a tracemalloc session stopped by stop_tracing since the last reset
+_stopped_peak: Optional[int] = None
+
+
+def _max_peak(first: Optional[int], second: Optional[int]) -> Optional[int]:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def _traced_peak() -> Optional[int]:
+    current = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    return _max_peak(current, _stopped_peak)
+
+
+def _reset_peak() -> None:
+    global _stopped_peak
+    _stopped_peak = None
+    # tracemalloc.reset_peak is Python 3.9+; on 3.8 peaks only ever grow
+    if tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+def stop_tracing() -> None:
+    """
+    ``tracemalloc.stop()``, keeping the peak so far for the stages that are
+    open, which would otherwise lose it along with the session.
+    """
+    global _stopped_peak
+    _stopped_peak = _traced_peak()
+    tracemalloc.stop()
+
+
+class StageMetrics:
+    """Accumulated figures of one stage of one processor."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_out = 0
+        self.dropped: Dict[str, int] = {}
+        self.peak_traced_bytes: Optional[int] = None
+
+    def drop(self, reason: str, rows: int = 1) -> None:
+        count_dropped(self.dropped, reason, rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_dropped': dict(sorted(self.dropped.items())),
+            'bytes_out': self.bytes_out,
+            'peak_traced_bytes': self.peak_traced_bytes,
+        }
+
+
+class _ActiveStage:
+    """Bookkeeping for one entry into a stage, while it runs."""
+
+    def __init__(self, stage: StageMetrics) -> None:
+        self.stage = stage
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        # Time spent in stages nested inside this one
+        self.inner_seconds = 0.0
+        self.inner_cpu_seconds = 0.0
+        self.peak: Optional[int] = None
+
+
+class ProcessorMetrics:
+    """The stages of one processor. Picklable, so worker processes can send it back."""
+
+    def __init__(self, name: str, trace_memory: bool = False) -> None:
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageMetrics] = {}
+        self._active: List[_ActiveStage] = []
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {**self.__dict__, '_active': []}
+
+    def stage_metrics(self, name: str) -> StageMetrics:
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time the block as (another entry into) stage ``name``."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._active:
+            # Close the enclosing stage's peak so far; this stage's is its own
+            outer = self._active[-1]
+            outer.peak = _max_peak(outer.peak, _traced_peak())
+        _reset_peak()
+
+        active = _ActiveStage(self.stage_metrics(name))
+        self._active.append(active)
+        try:
+            yield active.stage
+        finally:
+            self._active.pop()
+            wall = time.perf_counter() - active.started
+            cpu = time.process_time() - active.cpu_started
+            stage = active.stage
+            stage.calls += 1
+            stage.wall_seconds += wall - active.inner_seconds
+            stage.cpu_seconds += cpu - active.inner_cpu_seconds
+            stage.peak_traced_bytes = _max_peak(
+                stage.peak_traced_bytes, _max_peak(active.peak, _traced_peak())
+            )
+            _reset_peak()
+            if self._active:
+                self._active[-1].inner_seconds += wall
+                self._active[-1].inner_cpu_seconds += cpu
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """
+        Yield from ``items``, counting the time to produce each one (and its
+        length, for sized items) towards stage ``name``.
+        """
+        iterator = iter(items)
+        while True:
+            with self.stage(name) as stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                if hasattr(item, '__len__'):
+                    stage.rows_out += len(item)  # type: ignore[arg-type]
+            yield item
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = [name for name in STAGES if name in self.stages]
+        ordered += [name for name in self.stages if name not in STAGES]
+        return {
+            'wall_seconds': round(sum(stage.wall_seconds for stage in self.stages.values()), 6),
+            'cpu_seconds': round(sum(stage.cpu_seconds for stage in self.stages.values()), 6),
+            'stages': {name: self.stages[name].to_dict() for name in ordered},
+        }
+
+
+class RunMetrics:
+    """The ProcessorMetrics of one script run, written out as JSON at the end."""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.processors: Dict[str, ProcessorMetrics] = {}
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'RunMetrics':
+        """Build from the options added by add_metrics_arguments."""
+        return cls(trace_memory=args.trace_memory)
+
+    def processor(self, name: str) -> ProcessorMetrics:
+        if name not in self.processors:
+            self.processors[name] = ProcessorMetrics(name, self.trace_memory)
+        return self.processors[name]
+
+    def join(self, other: ProcessorMetrics) -> None:
+        """Adopt the metrics a worker process recorded for one processor."""
+        self.processors[other.name] = other
+
+    def to_dict(self, generator: str) -> Dict[str, Any]:
+        return {
+            'generator': generator,
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'wall_seconds': round(time.perf_counter() - self.started, 6),
+            'cpu_seconds': round(time.process_time() - self.cpu_started, 6),
+            'processors': {
+                name: metrics.to_dict() for name, metrics in self.processors.items()
+            },
+        }
+
+    def write(self, path: Union[str, Path], generator: str) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(generator), file, indent=2)
+            file.write('\n')
+        return path
+
+
+def default_metrics_file(output: Union[str, Path]) -> Path:
+    """``<output stem>_metrics.json`` beside the SQL file."""
+    output = Path(output)
+    return output.with_name(f"{output.stem}_metrics.json")
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the metrics report options shared by the processor scripts."""
+    parser.add_argument(
+        '--metrics-file',
+        help="JSON file for the per-stage timing and memory metrics "
+        "(default: <output>_metrics.json beside the SQL file)",
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help="record each stage's tracemalloc peak (slows the run down)",
+    )
@@ -0,0 +1,224 @@
+"""
+Compiled modifier catalog and modifier combination checks.
+
+The modifier_code rows (code, category, type) are compiled once into dense
+integer ids: modifiers are numbered in code order, and each modifier's
+category and type become one bit of a uint32 mask, so "is this a telehealth
+or anatomical modifier" is ``category_bits[id] & mask``. A set of modifiers
+is a Python int with bit ``id`` set for each of them.
+
+EXCLUSIVE_MODIFIER_GROUPS lists modifiers that cannot share a claim line,
+such as the telehealth modalities 95/GT/93/FQ/GQ. They are compiled into
+one bitset per modifier of the modifiers it conflicts with (itself
+included, so a repeated modifier is a conflict too). Checking a line is
+then one AND per modifier on it, however many groups there are.
+``invalid_lines`` does the same over whole columns with a boolean conflict
+matrix indexed by pairs of ids.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.classification import Codes
+from medical_codes.dictionary import normalize_code, normalize_codes
+
+# Modifiers that describe mutually exclusive circumstances of one service:
+# (group name, modifier codes). Codes missing from a catalog are skipped.
+EXCLUSIVE_MODIFIER_GROUPS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    # Audio-video, audio-only and asynchronous telehealth
+    ('telehealth_modality', ('95', 'GT', '93', 'FQ', 'GQ')),
+    # Bilateral or one side
+    ('laterality', ('50', 'LT', 'RT')),
+    # Professional or technical component
+    ('component', ('26', 'TC')),
+    # Increased, reduced or discontinued service
+    ('service_extent', ('22', '52', '53', '73', '74')),
+    # Repeat by the same or by another provider
+    ('repeat_provider', ('76', '77')),
+    # Advance beneficiary notice on file or not
+    ('liability_notice', ('GA', 'GZ')),
+    # 59 or one of the more specific X{EPSU} subsets
+    ('distinct_service', ('59', 'XE', 'XP', 'XS', 'XU')),
+)
+
+DUPLICATE_GROUP = 'duplicate'
+
+MASK_BITS = 32
+
+
+def _bit_names(values: Iterable[str]) -> Tuple[str, ...]:
+    names = tuple(sorted(set(values)))
+    if len(names) > MASK_BITS:
+        raise ValueError(f"At most {MASK_BITS} names fit in a uint32 mask, not {len(names)}")
+    return names
+
+
+class ModifierCatalog:
+    """
+    Modifiers with dense ids (their index in ``codes``), ``category_bits``
+    and ``type_bits`` masks per id and the compiled exclusive groups.
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        categories: Sequence[str],
+        types: Sequence[str],
+        exclusive_groups: Sequence[Tuple[str, Sequence[str]]] = EXCLUSIVE_MODIFIER_GROUPS,
+    ) -> None:
+        if len(set(codes)) != len(codes):
+            raise ValueError("Modifier codes must be unique")
+        order = sorted(range(len(codes)), key=lambda index: codes[index])
+        self.codes: Tuple[str, ...] = tuple(codes[index] for index in order)
+        self.ids: Dict[str, int] = {code: id_ for id_, code in enumerate(self.codes)}
+
+        self.category_names = _bit_names(categories)
+        self.type_names = _bit_names(types)
+        category_index = {name: index for index, name in enumerate(self.category_names)}
+        type_index = {name: index for index, name in enumerate(self.type_names)}
+        self.category_bits = np.array(
+            [1 << category_index[categories[index]] for index in order], dtype=np.uint32
+        )
+        self.type_bits = np.array(
+            [1 << type_index[types[index]] for index in order], dtype=np.uint32
+        )
+
+        self.groups: List[Tuple[str, int]] = []
+        for name, group_codes in exclusive_groups:
+            mask = self.mask(group_codes)
+            if bin(mask).count('1') > 1:
+                self.groups.append((name, mask))
+        self.conflicts: List[int] = [1 << id_ for id_ in range(len(self.codes))]
+        for _, mask in self.groups:
+            for id_ in self._ids(mask):
+                self.conflicts[id_] |= mask
+
+    @classmethod
+    def from_records(
+        cls,
+        records: pd.DataFrame,
+        exclusive_groups: Sequence[Tuple[str, Sequence[str]]] = EXCLUSIVE_MODIFIER_GROUPS,
+    ) -> 'ModifierCatalog':
+        """Compile modifier_code rows (modifier_code, category and type columns)."""
+        return cls(
+            records['modifier_code'].astype(str).str.strip().str.upper().tolist(),
+            records['category'].fillna('').astype(str).tolist(),
+            records['type'].fillna('').astype(str).tolist(),
+            exclusive_groups,
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @staticmethod
+    def _ids(mask: int) -> List[int]:
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    def mask(self, codes: Iterable[str]) -> int:
+        """Bitset of the known modifiers among ``codes``."""
+        mask = 0
+        for code in codes:
+            id_ = self.ids.get(normalize_code(code))
+            if id_ is not None:
+                mask |= 1 << id_
+        return mask
+
+    def category_mask(self, names: Iterable[str]) -> int:
+        return sum(1 << self.category_names.index(name) for name in set(names))
+
+    def type_mask(self, names: Iterable[str]) -> int:
+        return sum(1 << self.type_names.index(name) for name in set(names))
+
+    def with_category(self, *names: str) -> int:
+        """Bitset of the modifiers in any of the categories."""
+        ids = np.flatnonzero(self.category_bits & self.category_mask(names))
+        return sum(1 << int(id_) for id_ in ids)
+
+    def with_type(self, *names: str) -> int:
+        """Bitset of the modifiers of any of the types."""
+        ids = np.flatnonzero(self.type_bits & self.type_mask(names))
+        return sum(1 << int(id_) for id_ in ids)
+
+    def codes_of(self, mask: int) -> List[str]:
+        return [self.codes[id_] for id_ in self._ids(mask)]
+
+    def is_valid_combination(self, codes: Iterable[str]) -> bool:
+        """
+        Whether the modifiers of one line may appear together: no repeats and
+        at most one of each exclusive group. Unknown codes are ignored here;
+        the code dictionary reports them.
+        """
+        seen = 0
+        for code in codes:
+            id_ = self.ids.get(normalize_code(code))
+            if id_ is None:
+                continue
+            if seen & self.conflicts[id_]:
+                return False
+            seen |= 1 << id_
+        return True
+
+    def violated_groups(self, codes: Sequence[str]) -> List[str]:
+        """Names of the exclusive groups (or DUPLICATE_GROUP) a line's modifiers break."""
+        known = (self.ids.get(normalize_code(code)) for code in codes)
+        ids = [id_ for id_ in known if id_ is not None]
+        violated = [DUPLICATE_GROUP] if len(set(ids)) < len(ids) else []
+        mask = sum(1 << id_ for id_ in set(ids))
+        for name, group in self.groups:
+            both = mask & group
+            # More than one bit set
+            if both & (both - 1):
+                violated.append(name)
+        return violated
+
+    def category_counts(self) -> Dict[str, int]:
+        return {
+            name: int(np.count_nonzero(self.category_bits & (1 << index)))
+            for index, name in enumerate(self.category_names)
+        }
+
+    def conflict_matrix(self) -> np.ndarray:
+        """
+        Boolean (n + 1) x (n + 1) matrix of conflicting id pairs. The last row
+        and column are for absent or unknown modifiers and conflict with
+        nothing.
+        """
+        size = len(self.codes)
+        matrix = np.zeros((size + 1, size + 1), dtype=bool)
+        for id_, conflicts in enumerate(self.conflicts):
+            matrix[id_, self._ids(conflicts)] = True
+        return matrix
+
+    def line_ids(self, codes: Codes) -> np.ndarray:
+        """Id of each line's modifier, ``len(self)`` where absent or unknown."""
+        line_ids, distinct = pd.factorize(
+            codes if isinstance(codes, pd.Series) else pd.Series(codes), use_na_sentinel=True
+        )
+        distinct_ids = np.array(
+            [self.ids.get(code, len(self.codes)) for code in normalize_codes(distinct)]
+            + [len(self.codes)],
+            dtype=np.int64,
+        )
+        return distinct_ids[line_ids]
+
+    def invalid_lines(
+        self, modifiers: Sequence[Codes], matrix: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        ``not is_valid_combination`` for each line of the modifier columns
+        (at least one); pass ``matrix`` to reuse a ``conflict_matrix``.
+        """
+        matrix = self.conflict_matrix() if matrix is None else matrix
+        ids = [self.line_ids(codes) for codes in modifiers]
+        invalid = np.zeros(len(ids[0]), dtype=bool)
+        for first in range(len(ids)):
+            for second in range(first + 1, len(ids)):
+                invalid |= matrix[ids[first], ids[second]]
+        return invalid
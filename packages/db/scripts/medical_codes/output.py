@@ -0,0 +1,270 @@
+"""Select how a processor's records are written out."""
+
+import argparse
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+
+from medical_codes.cache import file_sha256
+from medical_codes.delta import COMPLETE_SOURCE_TABLES, diff_records, render_delta_sql
+from medical_codes.loader import DatabaseLoader
+from medical_codes.pgcopy import render_copy_upsert
+from medical_codes.sidecar import (
+    SIDECAR_FORMATS,
+    SidecarWriter,
+    default_sidecar_dir,
+    read_table_records,
+)
+from medical_codes.sql import DEFAULT_BATCH_ROWS, render_insert_statements
+from medical_codes.tables import TableSpec
+
+# insert: batched INSERT ... VALUES statements, read by the populate-*.ts loaders
+# copy-text / copy-csv: COPY into a temp table plus one upsert, run with psql -f
+OUTPUT_FORMATS = ('insert', 'copy-text', 'copy-csv')
+
+
+def render_table_sql(
+    spec: TableSpec,
+    records: pd.DataFrame,
+    output_format: str = 'insert',
+    batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+    batch_bytes: Optional[int] = None,
+) -> str:
+    """Render records for ``spec.table`` in one of the OUTPUT_FORMATS."""
+    if output_format == 'insert':
+        return render_insert_statements(spec, records, batch_rows, batch_bytes)
+    if output_format in ('copy-text', 'copy-csv'):
+        return render_copy_upsert(spec, records, output_format[len('copy-'):])
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for limits where 0 means none."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the SQL rendering and sidecar options shared by the processor scripts."""
+    parser.add_argument(
+        '--batch-rows',
+        type=non_negative_int,
+        default=DEFAULT_BATCH_ROWS,
+        help="rows per INSERT statement (0 = no row limit)",
+    )
+    parser.add_argument(
+        '--batch-bytes',
+        type=non_negative_int,
+        default=0,
+        help="approximate byte budget per INSERT statement (0 = no byte limit)",
+    )
+    parser.add_argument(
+        '--format',
+        choices=OUTPUT_FORMATS,
+        default='insert',
+        help="INSERT statements, or COPY data plus one set-based upsert per table (psql -f)",
+    )
+    parser.add_argument(
+        '--sidecar-dir',
+        help="directory for per-table record files and manifest.json "
+        "(default: <output>_records beside the SQL file)",
+    )
+    parser.add_argument(
+        '--sidecar-format',
+        choices=SIDECAR_FORMATS,
+        default='jsonl',
+        help="record file format (parquet requires pyarrow)",
+    )
+    parser.add_argument(
+        '--no-sidecar',
+        action='store_true',
+        help="only write the SQL file",
+    )
+    parser.add_argument(
+        '--previous-records',
+        help="sidecar directory of the previous release; emit only the delta against it",
+    )
+    parser.add_argument(
+        '--termination-date',
+        help="termination date for codes dropped since the previous release "
+        "(default: the new release's effective date)",
+    )
+    parser.add_argument(
+        '--terminate-missing',
+        action='append',
+        default=[],
+        metavar='TABLE',
+        help="also terminate codes of TABLE that are missing from the new release; only for "
+        f"complete code lists (always on for {', '.join(sorted(COMPLETE_SOURCE_TABLES))})",
+    )
+    parser.add_argument(
+        '--organization-id',
+        help="organization UUID for code_update_history rows (history is skipped without it)",
+    )
+    parser.add_argument(
+        '--database-url',
+        help="also COPY the records into staging tables of this PostgreSQL database and "
+        "promote them into the master tables in one transaction (requires psycopg)",
+    )
+
+
+class TableOutput:
+    """
+    Everything that decides how a processor's records become output: SQL
+    format and batching, the optional sidecar files, the optional delta
+    against a previous run's sidecar records, and the optional direct load.
+    """
+
+    def __init__(
+        self,
+        output_format: str = 'insert',
+        batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+        batch_bytes: Optional[int] = None,
+        sidecar: Optional[SidecarWriter] = None,
+        previous_records: Optional[Union[str, Path]] = None,
+        termination_date: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        loader: Optional[DatabaseLoader] = None,
+        terminate_tables: Iterable[str] = COMPLETE_SOURCE_TABLES,
+    ) -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.output_format = output_format
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.sidecar = sidecar
+        self.previous_records = previous_records
+        self.termination_date = termination_date
+        self.organization_id = organization_id
+        self.loader = loader
+        self.terminate_tables = frozenset(terminate_tables)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'TableOutput':
+        """Build from the options added by add_output_arguments."""
+        sidecar = None
+        if not args.no_sidecar:
+            directory = args.sidecar_dir or default_sidecar_dir(args.output)
+            sidecar = SidecarWriter(directory, args.sidecar_format)
+        return cls(
+            output_format=args.format,
+            batch_rows=args.batch_rows,
+            batch_bytes=args.batch_bytes,
+            sidecar=sidecar,
+            previous_records=args.previous_records,
+            termination_date=args.termination_date,
+            organization_id=args.organization_id,
+            loader=DatabaseLoader(args.database_url) if args.database_url else None,
+            terminate_tables=COMPLETE_SOURCE_TABLES | set(args.terminate_missing),
+        )
+
+    def fork(self) -> 'TableOutput':
+        """
+        A copy with its own empty sidecar manifest, for rendering in another
+        process; hand it back to ``join`` to merge the tables it wrote.
+        """
+        sidecar = None
+        if self.sidecar is not None:
+            sidecar = SidecarWriter(self.sidecar.directory, self.sidecar.file_format)
+        loader = None
+        if self.loader is not None:
+            loader = DatabaseLoader(
+                self.loader.conninfo, self.loader.import_batch, self.loader.chunk_rows
+            )
+        return TableOutput(
+            output_format=self.output_format,
+            batch_rows=self.batch_rows,
+            batch_bytes=self.batch_bytes,
+            sidecar=sidecar,
+            previous_records=self.previous_records,
+            termination_date=self.termination_date,
+            organization_id=self.organization_id,
+            loader=loader,
+            terminate_tables=self.terminate_tables,
+        )
+
+    def join(self, other: 'TableOutput') -> None:
+        """Register the sidecar tables and staged loads of a ``fork`` of this output."""
+        if self.sidecar is not None and other.sidecar is not None:
+            for entry in other.sidecar.tables:
+                self.sidecar.register(entry)
+        if self.loader is not None and other.loader is not None:
+            self.loader.join(other.loader)
+
+    def render_upsert(self, spec: TableSpec, records: pd.DataFrame) -> str:
+        return render_table_sql(
+            spec, records, self.output_format, self.batch_rows, self.batch_bytes
+        )
+
+    def render_replacement(self, spec: TableSpec, records: pd.DataFrame) -> str:
+        """
+        Write the sidecar for a table derived from the master records and
+        render SQL that replaces its contents. Derived tables are rebuilt in
+        full on every run, so they get no delta and are not staged.
+        """
+        if self.sidecar is not None:
+            self.sidecar.write(spec, records)
+        return f"DELETE FROM {spec.table};\n" + self.render_upsert(spec, records)
+
+    def render(
+        self,
+        spec: TableSpec,
+        records: pd.DataFrame,
+        source_file: Optional[Union[str, Path]] = None,
+        update_source: str = 'CMS',
+    ) -> str:
+        """
+        Write the sidecar for ``records`` and render their SQL: a full upsert,
+        or only the delta when the previous run has records for this table.
+        """
+        # Read the previous records first: the sidecar may be written in place
+        previous = None
+        if self.previous_records is not None:
+            previous = read_table_records(self.previous_records, spec.table)
+            if previous is None:
+                print(f"  No previous {spec.table} records; writing a full load")
+
+        if self.sidecar is not None:
+            self.sidecar.write(spec, records)
+        if self.loader is not None:
+            self.loader.stage(spec, records)
+
+        if previous is None:
+            return self.render_upsert(spec, records)
+
+        terminate_missing = spec.table in self.terminate_tables
+        delta = diff_records(spec, previous, records, terminate_missing)
+        print(
+            f"  Delta for {spec.table}: {len(delta.inserts)} new, "
+            f"{len(delta.changes)} changed, {len(delta.terminations)} terminated"
+            + ("" if terminate_missing else " (codes missing from this source are not terminated)")
+        )
+        return render_delta_sql(
+            spec,
+            delta,
+            self.render_upsert,
+            total_records=len(records),
+            termination_date=self.termination_date,
+            batch_rows=self.batch_rows,
+            organization_id=self.organization_id,
+            update_source=update_source,
+            source_file=Path(source_file).name if source_file else None,
+            source_checksum=file_sha256(source_file) if source_file else None,
+        )
+
+    def finish(self, generator: str) -> Optional[Path]:
+        """
+        Promote the staged tables, if loading into a database, and write the
+        sidecar manifest, if any tables were written; returns its path.
+        """
+        if self.loader is not None:
+            self.loader.promote()
+        if self.sidecar is None or not self.sidecar.tables:
+            return None
+        return self.sidecar.write_manifest(generator)
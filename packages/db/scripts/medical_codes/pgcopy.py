@@ -0,0 +1,104 @@
+"""
+PostgreSQL COPY rendering: stage records in a temp table, then upsert them.
+
+The generated script is meant for ``psql -f``. For each table it creates a
+temp table holding only the per-row columns, typed like the master table's,
+streams the rows with ``COPY ... FROM STDIN`` (inline data terminated by
+``\\.``, as pg_dump does) and moves them into the master table with a
+single set-based ``INSERT ... SELECT ... ON CONFLICT``. All of this runs in
+one transaction.
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.sql import conflict_clause, sql_literal
+from medical_codes.tables import TableSpec
+from medical_codes.text import replace_all
+
+COPY_FORMATS = ('text', 'csv')
+
+# Backslash must be escaped first so the later escapes are not doubled
+_TEXT_ESCAPES = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+_CSV_ESCAPES = (('"', '""'),)
+
+_NULL = {'text': '\\N', 'csv': ''}
+_DELIMITER = {'text': '\t', 'csv': ','}
+
+
+def copy_column(values: pd.Series, sql_type: str, copy_format: str = 'text') -> np.ndarray:
+    """Render a records column as COPY fields, with the format's NULL marker."""
+    null = _NULL[copy_format]
+    if sql_type == 'boolean':
+        return np.where(values.to_numpy(dtype=bool), 't', 'f').astype(object)
+
+    missing = values.isna().to_numpy()
+    text = values.to_numpy(dtype=object)
+    if missing.any():
+        text = np.where(missing, '', text)
+
+    if sql_type in ('integer', 'numeric'):
+        fields = np.array([str(value) for value in text], dtype=object)
+    elif copy_format == 'csv':
+        # Quote every value so empty strings stay distinct from NULL
+        fields = '"' + np.array(replace_all(text, _CSV_ESCAPES), dtype=object) + '"'
+    else:
+        fields = np.array(replace_all(text, _TEXT_ESCAPES), dtype=object)
+    return np.where(missing, null, fields)
+
+
+def render_copy_rows(spec: TableSpec, records: pd.DataFrame, copy_format: str = 'text') -> str:
+    """Render the per-row columns of every record as COPY data lines."""
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f"Unknown COPY format: {copy_format}")
+    arrays = [
+        copy_column(records[column.name], column.sql_type, copy_format)
+        for column in spec.columns
+        if column.name not in spec.constants
+    ]
+    template = _DELIMITER[copy_format].join(['{}'] * len(arrays)) + '\n'
+    return ''.join(map(template.format, *arrays))
+
+
+def staging_table_name(spec: TableSpec) -> str:
+    return f"{spec.table}_load"
+
+
+def _select_expression(spec: TableSpec, name: str, sql_type: str) -> str:
+    if name not in spec.constants:
+        return name
+    value = spec.constants[name]
+    # Untyped NULLs would be resolved as text, so cast them explicitly
+    return f"NULL::{sql_type}" if value is None else sql_literal(value, sql_type)
+
+
+def render_copy_upsert(spec: TableSpec, records: pd.DataFrame, copy_format: str = 'text') -> str:
+    """
+    Render a psql script that COPYs the records into a temp table and upserts
+    them into ``spec.table`` with one ``INSERT ... SELECT ... ON CONFLICT``.
+    """
+    staging = staging_table_name(spec)
+    loaded = [column for column in spec.columns if column.name not in spec.constants]
+    loaded_names = ',\n    '.join(column.name for column in loaded)
+    targets = ',\n    '.join(spec.column_names)
+    selects = ',\n    '.join(
+        _select_expression(spec, column.name, column.sql_type) for column in spec.columns
+    )
+    options = 'FORMAT csv' if copy_format == 'csv' else 'FORMAT text'
+
+    parts: List[str] = [
+        "BEGIN;\n",
+        # Typed like the master's columns (enums included), so the INSERT needs no
+        # casts; unlike LIKE, this leaves out the NOT NULL columns set from constants
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS\n"
+        f"SELECT\n    {loaded_names}\nFROM {spec.table}\nWITH NO DATA;\n",
+        f"COPY {staging} (\n    {loaded_names}\n) FROM STDIN WITH ({options});\n",
+        render_copy_rows(spec, records, copy_format),
+        "\\.\n",
+        f"INSERT INTO {spec.table} (\n    {targets}\n)\nSELECT\n    {selects}\nFROM {staging}",
+        conflict_clause(spec),
+        "COMMIT;\n",
+    ]
+    return ''.join(parts)
@@ -0,0 +1,269 @@
+"""
+Opt-in profiling of the processors, one set of files per processor.
+
+With ``--profile-dir`` each processor runs under cProfile while a
+background thread samples its call stack. ``<name>.prof`` holds the
+pstats data (``python -m pstats``, snakeviz), ``<name>.txt`` the top
+functions by cumulative time and ``<name>.collapsed`` the sampled stacks
+in the collapsed format that flamegraph.pl and speedscope read.
+
+With ``--profile-allocations`` tracemalloc also records where memory was
+allocated. The sampler snapshots the traces as the traced total reaches
+new highs, so ``<name>.alloc.txt`` (top allocation sites) and
+``<name>.alloc.collapsed`` (bytes by allocation stack) describe memory
+close to the processor's peak rather than what is left at its end.
+"""
+
+import argparse
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+from types import CodeType, FrameType, TracebackType
+from typing import ContextManager, Dict, List, Optional, Type, Union
+
+from medical_codes.metrics import stop_tracing
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Frames kept per allocation trace
+DEFAULT_TRACE_FRAMES = 16
+# Functions and allocation sites listed in the text reports
+REPORT_LINES = 60
+
+# Snapshot allocations again once the traced total has grown by this factor,
+# but no more often than every SNAPSHOT_MIN_SECONDS
+SNAPSHOT_GROWTH = 1.25
+SNAPSHOT_MIN_SECONDS = 5.0
+
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+def _frame_name(code: CodeType) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples one thread's stack from ``root`` down, and optionally its
+    allocations, until stopped.
+    """
+
+    def __init__(
+        self, thread_id: int, root: FrameType, interval: float, snapshot_allocations: bool
+    ) -> None:
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.snapshot_allocations = snapshot_allocations
+        self.stacks: Counter = Counter()
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.snapshot_bytes = 0
+        self._snapshot_time = 0.0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        names: List[str] = []
+        # Frames above the profiled block (in a worker, those of the process pool too)
+        # would only add noise
+        while frame is not None:
+            names.append(_frame_name(frame.f_code))
+            if frame is self.root:
+                break
+            frame = frame.f_back
+        if names:
+            self.stacks[';'.join(reversed(names))] += 1
+
+        if self.snapshot_allocations and tracemalloc.is_tracing():
+            current = tracemalloc.get_traced_memory()[0]
+            now = time.monotonic()
+            if (
+                current > self.snapshot_bytes * SNAPSHOT_GROWTH
+                and now - self._snapshot_time >= SNAPSHOT_MIN_SECONDS
+            ):
+                self.take_snapshot(current)
+                self._snapshot_time = now
+
+    def take_snapshot(self, current: int) -> None:
+        # Filtering runs in Python over every trace, so it waits until the report
+        self.snapshot = tracemalloc.take_snapshot()
+        self.snapshot_bytes = current
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+        # The last moments may hold the highest total of all
+        if self.snapshot_allocations and tracemalloc.is_tracing():
+            current = tracemalloc.get_traced_memory()[0]
+            if current > self.snapshot_bytes:
+                self.take_snapshot(current)
+
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    """``frame;frame;frame count`` lines, heaviest first."""
+    lines = [f"{stack} {count}" for stack, count in Counter(stacks).most_common()]
+    return ''.join(line + '\n' for line in lines)
+
+
+def render_allocation_collapsed(snapshot: tracemalloc.Snapshot) -> str:
+    """Live bytes per allocation stack, outermost frame first, in collapsed format."""
+    stacks: Counter = Counter()
+    for statistic in snapshot.statistics('traceback'):
+        # tracemalloc tracebacks run from the oldest frame to the allocating one
+        frames = ';'.join(
+            f"{Path(frame.filename).name}:{frame.lineno}" for frame in statistic.traceback
+        )
+        stacks[frames] += statistic.size
+    return render_collapsed(stacks)
+
+
+def render_allocation_report(snapshot: tracemalloc.Snapshot, limit: int = REPORT_LINES) -> str:
+    statistics = snapshot.statistics('lineno')
+    total = sum(statistic.size for statistic in statistics)
+    lines = [f"Live traced memory near the peak: {total / 1024 / 1024:.1f} MiB", '']
+    for statistic in statistics[:limit]:
+        frame = statistic.traceback[0]
+        lines.append(
+            f"{statistic.size / 1024:10.1f} KiB {statistic.count:9d} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def render_pstats_report(profile: cProfile.Profile, limit: int = REPORT_LINES) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+    return stream.getvalue()
+
+
+class Profiler:
+    """Profiles named blocks (one per processor) into files in ``directory``."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        trace_allocations: bool = False,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        trace_frames: int = DEFAULT_TRACE_FRAMES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.trace_frames = trace_frames
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> Optional['Profiler']:
+        """Build from the options added by add_profile_arguments; None unless profiling."""
+        if not args.profile_dir:
+            return None
+        return cls(args.profile_dir, args.profile_allocations)
+
+    def profile(self, name: str) -> '_ProfiledBlock':
+        """Profile a with-block and write ``<name>.*`` files when it ends, even on error."""
+        return _ProfiledBlock(self, name)
+
+    def write(self, name: str, profile: cProfile.Profile, sampler: _StackSampler) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.directory / f"{name}.prof"))
+        (self.directory / f"{name}.txt").write_text(
+            render_pstats_report(profile), encoding='utf-8'
+        )
+        (self.directory / f"{name}.collapsed").write_text(
+            render_collapsed(sampler.stacks), encoding='utf-8'
+        )
+        if sampler.snapshot is not None:
+            snapshot = sampler.snapshot.filter_traces(_IGNORED_TRACES)
+            (self.directory / f"{name}.alloc.txt").write_text(
+                render_allocation_report(snapshot), encoding='utf-8'
+            )
+            (self.directory / f"{name}.alloc.collapsed").write_text(
+                render_allocation_collapsed(snapshot), encoding='utf-8'
+            )
+        print(f"  Profile of {name} written to {self.directory / name}.*")
+
+
+class _ProfiledBlock:
+    """The context manager returned by Profiler.profile."""
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started_tracing = False
+        self.sampler: Optional[_StackSampler] = None
+        self.cprofile: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> None:
+        profiler = self.profiler
+        if profiler.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(profiler.trace_frames)
+                self.started_tracing = True
+            elif tracemalloc.get_traceback_limit() < profiler.trace_frames:
+                # e.g. started by --trace-memory with single-frame traces; restarting
+                # would drop the peak its stages are measuring, so keep its limit
+                print(
+                    f"  ⚠ Allocation traces of {self.name} have "
+                    f"{tracemalloc.get_traceback_limit()} frame(s): memory tracing was "
+                    "already running"
+                )
+
+        # The frame of the with-statement roots the sampled stacks
+        self.sampler = _StackSampler(
+            threading.get_ident(), sys._getframe(1), profiler.interval, profiler.trace_allocations
+        )
+        self.cprofile = cProfile.Profile()
+        self.sampler.start()
+        self.cprofile.enable()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        assert self.sampler is not None and self.cprofile is not None
+        self.cprofile.disable()
+        self.sampler.stop()
+        if self.started_tracing:
+            stop_tracing()
+        self.profiler.write(self.name, self.cprofile, self.sampler)
+
+
+def profiled(profiler: Optional[Profiler], name: str) -> ContextManager[None]:
+    """``profiler.profile(name)``, or a no-op when not profiling."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.profile(name)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the profiling options shared by the processor scripts."""
+    parser.add_argument(
+        '--profile-dir',
+        help="profile each processor: write cProfile stats and sampled call stacks "
+        "(collapsed format, for flamegraph.pl or speedscope) to this directory",
+    )
+    parser.add_argument(
+        '--profile-allocations',
+        action='store_true',
+        help="with --profile-dir, also write tracemalloc allocation traces taken near "
+        "each processor's memory peak (much slower)",
+    )
@@ -0,0 +1,396 @@
+"""
+In-memory inverted index over code descriptions.
+
+Each code is one document: its short and long description, lower-cased and
+split into word tokens. Two posting tables are built: words to the
+documents containing them, and trigrams of the words padded with spaces
+(' di', 'dia', ..., 'es ') to the vocabulary words containing them. A
+posting list is a sorted list of ids, stored as the gaps between
+consecutive ids in LEB128 varint bytes, so the common short gaps take one
+byte. Every list lives in one uint8 array and is decoded with a few numpy
+operations when a query touches it.
+
+Queries are scored BM25-style over the words, without term frequencies:
+each query word found in a document adds its idf, damped for long
+descriptions. A query word that is not in the vocabulary, usually a partial
+or misspelled one ('neuropath', 'diabetis'), is matched through the trigram
+table to the vocabulary words most like it (by the Jaccard similarity of
+their trigrams), and each of those counts at its similarity.
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.sidecar import read_table_records
+
+# Master tables searched: (table, code column, code set, short, long description column)
+SEARCH_TABLES: Tuple[Tuple[str, str, str, str, str], ...] = (
+    ('icd10_code_master', 'icd10_code', 'ICD10', 'short_description', 'long_description'),
+    ('cpt_code_master', 'cpt_code', 'CPT', 'short_description', 'long_description'),
+    ('hcpcs_code_master', 'hcpcs_code', 'HCPCS', 'short_description', 'long_description'),
+    ('modifier_code', 'modifier_code', 'MODIFIER', 'short_description', 'description'),
+    ('adjustment_reason_code', 'code', 'CARC_RARC', 'short_description', 'description'),
+)
+CODE_SETS = tuple(code_set for _, _, code_set, _, _ in SEARCH_TABLES)
+
+WORD_PATTERN = r'[a-z0-9]+'
+_WORD_RE = re.compile(WORD_PATTERN)
+
+# BM25 length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Vocabulary words an unknown query word may stand for, and how alike they must be
+FUZZY_WORDS = 10
+FUZZY_MIN_SIMILARITY = 0.4
+
+DEFAULT_LIMIT = 20
+
+
+class SearchHit(NamedTuple):
+    code: str
+    code_set: str
+    description: str
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric words: 'Type 2 diabetes, w/o' -> type, 2, diabetes, w, o."""
+    return _WORD_RE.findall(text.lower())
+
+
+def word_trigrams(word: str) -> List[str]:
+    """Trigrams of a word padded with a space on each side."""
+    padded = f" {word} "
+    return [padded[index:index + 3] for index in range(len(padded) - 2)]
+
+
+def varint_lengths(values: np.ndarray) -> np.ndarray:
+    """Bytes each non-negative integer takes as a varint."""
+    lengths = np.ones(len(values), dtype=np.int64)
+    for bits in (7, 14, 21, 28, 35):
+        lengths += values >= (1 << bits)
+    return lengths
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """LEB128 bytes of non-negative integers (7 bits per byte, high bit = more follow)."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = varint_lengths(values)
+    starts = np.cumsum(lengths) - lengths
+    repeated = np.repeat(values, lengths)
+    # Position of each output byte within its value
+    shift = np.arange(len(repeated), dtype=np.int64) - np.repeat(starts, lengths)
+    more = shift < np.repeat(lengths, lengths) - 1
+    payload = (repeated >> (7 * shift).astype(np.uint64)) & 0x7F
+    return (payload | (more.astype(np.uint64) << 7)).astype(np.uint8)
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Inverse of encode_varints, as int64."""
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    last = data < 0x80
+    if last.all():
+        # Dense lists (the frequent terms) are all one-byte gaps
+        return data.astype(np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    group = np.cumsum(np.concatenate(([0], last[:-1].astype(np.int64))))
+    shift = np.arange(len(data), dtype=np.int64) - starts[group]
+    parts = (data & 0x7F).astype(np.int64) << (7 * shift)
+    return np.add.reduceat(parts, starts)
+
+
+def sorted_unique(keys: np.ndarray) -> np.ndarray:
+    """np.unique by sorting, which is faster than hashing for millions of integers."""
+    keys = np.sort(keys)
+    if not len(keys):
+        return keys
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+
+def pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 bytes of the strings back to back, and the offsets between them."""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    blob = data.tobytes()
+    bounds = offsets.tolist()
+    return np.array(
+        [blob[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])],
+        dtype=object,
+    )
+
+
+class PostingTable:
+    """Sorted terms with the varint gap-encoded document ids of each."""
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, data: np.ndarray,
+                 counts: np.ndarray) -> None:
+        self.terms = terms
+        self.offsets = offsets
+        self.data = data
+        # Documents per term, for idf
+        self.counts = counts
+        self._positions = {term: position for position, term in enumerate(terms.tolist())}
+
+    @classmethod
+    def build(
+        cls, documents: np.ndarray, term_ids: np.ndarray, vocabulary: np.ndarray
+    ) -> 'PostingTable':
+        """
+        From parallel arrays of (document id, term id) pairs, duplicates
+        allowed; term ids index the sorted ``vocabulary``.
+        """
+        documents = np.asarray(documents, dtype=np.int64)
+        # One integer per pair sorts and deduplicates by term, then document
+        width = int(documents.max()) + 1 if len(documents) else 1
+        keys = sorted_unique(term_ids.astype(np.int64) * width + documents)
+        term_ids, docs = np.divmod(keys, width)
+
+        first = np.ones(len(docs), dtype=bool)
+        first[1:] = term_ids[1:] != term_ids[:-1]
+        gaps = docs.copy()
+        gaps[1:] -= docs[:-1]
+        # Each list starts from its first id, not from the previous term's last
+        gaps[first] = docs[first]
+
+        encoded = encode_varints(gaps)
+        byte_offsets = np.concatenate(([0], np.cumsum(varint_lengths(gaps))))
+
+        list_starts = np.flatnonzero(first)
+        offsets = np.concatenate((byte_offsets[list_starts], [byte_offsets[-1]]))
+        counts = np.diff(np.concatenate((list_starts, [len(docs)])))
+        terms_present = np.asarray(vocabulary, dtype=object)[term_ids[list_starts]]
+        return cls(terms_present, offsets, encoded, counts)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def position(self, term: str) -> Optional[int]:
+        return self._positions.get(term)
+
+    def postings(self, position: int) -> np.ndarray:
+        """Document ids of the term at ``position``."""
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return np.cumsum(decode_varints(self.data[start:end]))
+
+
+class DescriptionIndex:
+    """Ranked description search over the codes of every code set."""
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        code_sets: np.ndarray,
+        descriptions: np.ndarray,
+        lengths: np.ndarray,
+        words: PostingTable,
+        trigrams: PostingTable,
+        word_gram_counts: np.ndarray,
+    ) -> None:
+        self.codes = codes
+        self.code_sets = code_sets
+        self.descriptions = descriptions
+        self.words = words
+        self.trigrams = trigrams
+        # Distinct trigrams of each vocabulary word, for the Jaccard similarity
+        self.word_gram_counts = word_gram_counts
+        self.lengths = lengths
+        average = lengths.mean() if len(lengths) else 1.0
+        self._length_norm = (BM25_K1 + 1) / (
+            1 + BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(average, 1.0))
+        )
+
+    @classmethod
+    def build(
+        cls,
+        codes: Sequence[str],
+        code_sets: Sequence[str],
+        short_descriptions: Sequence[str],
+        long_descriptions: Sequence[str],
+    ) -> 'DescriptionIndex':
+        """Tokenize the descriptions and build both posting tables."""
+        short = pd.Series(short_descriptions, dtype=object).fillna('').astype(str)
+        long = pd.Series(long_descriptions, dtype=object).fillna('').astype(str)
+        text = (short + ' ' + long).str.lower()
+
+        tokens = text.str.findall(WORD_PATTERN).explode().dropna()
+        word_ids, vocabulary = pd.factorize(tokens, sort=True)
+        documents = tokens.index.to_numpy(dtype=np.int64)
+        words = PostingTable.build(documents, word_ids, vocabulary)
+
+        # Each distinct (document, word) pair, as integers
+        width = len(text) or 1
+        pairs = sorted_unique(word_ids.astype(np.int64) * width + documents)
+        lengths = np.bincount(pairs % width, minlength=len(text))
+
+        # The words' trigrams; the vocabulary is sorted, so word ids are table positions
+        grams = pd.Series(words.terms, dtype=object).map(word_trigrams).explode()
+        gram_ids, gram_vocabulary = pd.factorize(grams, sort=True)
+        gram_words = grams.index.to_numpy(dtype=np.int64)
+        trigrams = PostingTable.build(gram_words, gram_ids, gram_vocabulary)
+        word_width = len(words) or 1
+        word_grams = sorted_unique(gram_ids.astype(np.int64) * word_width + gram_words)
+        word_gram_counts = np.bincount(word_grams % word_width, minlength=len(words))
+
+        set_ids = {code_set: index for index, code_set in enumerate(CODE_SETS)}
+        return cls(
+            np.asarray(codes, dtype=object),
+            np.array([set_ids[code_set] for code_set in code_sets], dtype=np.uint8),
+            short.to_numpy(dtype=object),
+            lengths.astype(np.float32),
+            words,
+            trigrams,
+            word_gram_counts.astype(np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _idf(self, count: int) -> float:
+        documents = len(self.codes)
+        return math.log(1 + (documents - count + 0.5) / (count + 0.5))
+
+    def _add_word_scores(self, word: str, total: np.ndarray) -> bool:
+        position = self.words.position(word)
+        if position is None:
+            return False
+        postings = self.words.postings(position)
+        total[postings] += self._idf(int(self.words.counts[position])) * self._length_norm[postings]
+        return True
+
+    def similar_words(self, word: str) -> List[Tuple[str, float]]:
+        """Vocabulary words most like ``word`` by trigrams, with their similarity."""
+        grams = set(word_trigrams(word))
+        matched = np.zeros(len(self.words), dtype=np.int32)
+        for gram in grams:
+            position = self.trigrams.position(gram)
+            if position is not None:
+                matched[self.trigrams.postings(position)] += 1
+        similarity = matched / (len(grams) + self.word_gram_counts - matched)
+        candidates = np.flatnonzero(similarity >= FUZZY_MIN_SIMILARITY)
+        if len(candidates) > FUZZY_WORDS:
+            best = np.argpartition(-similarity[candidates], FUZZY_WORDS - 1)[:FUZZY_WORDS]
+            candidates = candidates[best]
+        return [(self.words.terms[position], float(similarity[position])) for position in candidates]
+
+    def _fuzzy_scores(self, word: str) -> np.ndarray:
+        # A document counts its best match among the similar words
+        best = np.zeros(len(self.codes), dtype=np.float32)
+        for similar, similarity in self.similar_words(word):
+            position = self.words.position(similar)
+            assert position is not None
+            postings = self.words.postings(position)
+            weight = similarity * self._idf(int(self.words.counts[position]))
+            best[postings] = np.maximum(best[postings], weight)
+        return best * self._length_norm
+
+    def scores(self, query: str) -> np.ndarray:
+        """Score of every document for ``query``."""
+        total = np.zeros(len(self.codes), dtype=np.float32)
+        for word in dict.fromkeys(tokenize(query)):
+            if not self._add_word_scores(word, total):
+                total += self._fuzzy_scores(word)
+        return total
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        code_sets: Optional[Iterable[str]] = None,
+    ) -> List[SearchHit]:
+        """The best matching codes, highest score first; ties go to the shorter code."""
+        scores = self.scores(query)
+        if code_sets is not None:
+            allowed = [CODE_SETS.index(code_set) for code_set in code_sets]
+            scores[~np.isin(self.code_sets, allowed)] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = sorted(
+            candidates.tolist(),
+            key=lambda doc: (-scores[doc], len(self.codes[doc]), self.codes[doc]),
+        )
+        return [
+            SearchHit(
+                self.codes[doc],
+                CODE_SETS[self.code_sets[doc]],
+                self.descriptions[doc],
+                float(scores[doc]),
+            )
+            for doc in ranked[:limit]
+        ]
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the index as one .npz file; ``load`` reads it back without re-tokenizing."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays: Dict[str, np.ndarray] = {
+            'code_sets': self.code_sets,
+            'lengths': self.lengths,
+            'word_gram_counts': self.word_gram_counts,
+        }
+        # Strings are stored packed; fixed-width numpy strings would pad every one
+        strings = {'codes': self.codes, 'descriptions': self.descriptions}
+        for name, table in (('words', self.words), ('trigrams', self.trigrams)):
+            strings[f'{name}_terms'] = table.terms
+            arrays[f'{name}_offsets'] = table.offsets
+            arrays[f'{name}_data'] = table.data
+            arrays[f'{name}_counts'] = table.counts
+        for name, values in strings.items():
+            arrays[f'{name}_text'], arrays[f'{name}_text_offsets'] = pack_strings(values)
+        with open(path, 'wb') as file:
+            np.savez(file, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'DescriptionIndex':
+        with np.load(path, allow_pickle=False) as arrays:
+
+            def strings(name: str) -> np.ndarray:
+                return unpack_strings(arrays[f'{name}_text'], arrays[f'{name}_text_offsets'])
+
+            tables = [
+                PostingTable(
+                    strings(f'{name}_terms'),
+                    arrays[f'{name}_offsets'],
+                    arrays[f'{name}_data'],
+                    arrays[f'{name}_counts'],
+                )
+                for name in ('words', 'trigrams')
+            ]
+            return cls(
+                strings('codes'),
+                arrays['code_sets'],
+                strings('descriptions'),
+                arrays['lengths'],
+                *tables,
+                arrays['word_gram_counts'],
+            )
+
+
+def read_search_documents(directory: Union[str, Path]) -> pd.DataFrame:
+    """code, code_set, short_description and long_description of every SEARCH_TABLES table."""
+    frames = []
+    for table, code_column, code_set, short_column, long_column in SEARCH_TABLES:
+        records = read_table_records(directory, table)
+        if records is None:
+            continue
+        frames.append(pd.DataFrame({
+            'code': records[code_column].astype(str),
+            'code_set': code_set,
+            'short_description': records[short_column],
+            'long_description': records[long_column],
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['code', 'code_set', 'short_description', 'long_description'])
+    return pd.concat(frames, ignore_index=True)
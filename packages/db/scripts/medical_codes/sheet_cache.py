@@ -0,0 +1,165 @@
+"""
+Columnar cache of converted Excel sheets, keyed by workbook content.
+
+Converting a large sheet cell by cell is the slowest step of an Excel load.
+The first read of a sheet writes its string cells into an Arrow IPC
+(Feather v2) file, named by the workbook's SHA-256 and the sheet name.
+Later reads of an unchanged workbook memory-map that file and slice it
+into chunks without touching the workbook. The workbook's sheet names are
+cached alongside, so a sheet can be resolved by position on a cache hit.
+
+Requires pyarrow; without it, SheetCache.available() is False and readers
+go straight to the workbook.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+PathLike = Union[str, Path]
+
+# Bump when the cached layout or the cell-to-string conversion changes
+SHEET_CACHE_VERSION = 1
+
+
+class CachedSheet:
+    """A memory-mapped cached sheet: all-string columns named by the sheet header."""
+
+    def __init__(self, table: Any) -> None:
+        self._table = table
+
+    @property
+    def header(self) -> List[str]:
+        return list(self._table.column_names)
+
+    @property
+    def num_rows(self) -> int:
+        return int(self._table.num_rows)
+
+    def iter_columns(
+        self, positions: Sequence[Optional[int]], chunk_rows: int
+    ) -> Iterator[Tuple[int, List[np.ndarray]]]:
+        """
+        Yield ``(rows, columns)`` for consecutive slices of up to ``chunk_rows``
+        rows: the projected columns as object arrays (None for blanks and for
+        positions the sheet does not have), keeping only rows where at least
+        one projected cell is set.
+        """
+        width = self._table.num_columns
+        for start in range(0, max(self.num_rows, 1), chunk_rows):
+            part = self._table.slice(start, chunk_rows)
+            length = part.num_rows
+            columns = [
+                part.column(position).combine_chunks().to_numpy(zero_copy_only=False)
+                if position is not None and position < width
+                else np.full(length, None, dtype=object)
+                for position in positions
+            ]
+            if columns:
+                keep = np.zeros(length, dtype=bool)
+                for column in columns:
+                    keep |= np.not_equal(column, None)
+                if not keep.all():
+                    columns = [column[keep] for column in columns]
+                    length = int(keep.sum())
+            yield length, columns
+
+
+class SheetWriter:
+    """Writes one sheet's rows to a temporary file, published atomically on commit."""
+
+    def __init__(self, path: Path, header: Sequence[str]) -> None:
+        import pyarrow as pa
+        import pyarrow.ipc
+
+        self._pa = pa
+        self.path = path
+        self._temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self._schema = pa.schema([pa.field(name, pa.string()) for name in header])
+        self._writer: Any = pyarrow.ipc.new_file(str(self._temp_path), self._schema)
+
+    def write(self, rows: Sequence[Sequence[Optional[str]]]) -> None:
+        """Append rows whose width matches the header."""
+        if not rows:
+            return
+        arrays = [
+            self._pa.array(list(column), type=self._pa.string()) for column in zip(*rows)
+        ]
+        self._writer.write_batch(self._pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def commit(self) -> Path:
+        self._writer.close()
+        self._writer = None
+        os.replace(self._temp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard a partly written sheet, e.g. when the reader stopped early."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._temp_path.exists():
+            self._temp_path.unlink()
+
+
+class SheetCache:
+    """Arrow IPC files of converted sheets per (workbook hash, sheet name)."""
+
+    def __init__(self, directory: PathLike) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec('pyarrow') is not None
+
+    def _stem(self, workbook_hash: str) -> str:
+        return f"{workbook_hash[:24]}-v{SHEET_CACHE_VERSION}"
+
+    def sheet_path(self, workbook_hash: str, sheet_name: str) -> Path:
+        # Sheet names may hold any character; the digest keeps sanitized names distinct
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', sheet_name)
+        digest = hashlib.sha256(sheet_name.encode('utf-8')).hexdigest()[:8]
+        return self.directory / f"{self._stem(workbook_hash)}-{safe}-{digest}.arrow"
+
+    def names_path(self, workbook_hash: str) -> Path:
+        return self.directory / f"{self._stem(workbook_hash)}-sheets.json"
+
+    def load_sheet_names(self, workbook_hash: str) -> Optional[List[str]]:
+        try:
+            with open(self.names_path(workbook_hash), encoding='utf-8') as file:
+                return list(json.load(file)['sheets'])
+        except Exception:
+            return None
+
+    def store_sheet_names(self, workbook_hash: str, names: Sequence[str]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.names_path(workbook_hash)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'sheets': list(names)}, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def open_sheet(self, workbook_hash: str, sheet_name: str) -> Optional[CachedSheet]:
+        """Memory-map a cached sheet; None on a miss or an unreadable entry."""
+        path = self.sheet_path(workbook_hash, sheet_name)
+        if not path.exists():
+            return None
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+
+            # read_all over a memory map references the file's pages, no copy
+            return CachedSheet(pyarrow.ipc.open_file(pa.memory_map(str(path), 'r')).read_all())
+        except Exception:
+            # A truncated or incompatible entry is just a miss; it is rewritten
+            return None
+
+    def writer(self, workbook_hash: str, sheet_name: str, header: Sequence[str]) -> SheetWriter:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return SheetWriter(self.sheet_path(workbook_hash, sheet_name), header)
@@ -0,0 +1,132 @@
+"""
+Structured record files written next to the generated SQL.
+
+Loaders can stream these instead of parsing VALUES tuples back out of the
+SQL text. Each table goes to its own newline-delimited JSON file (or a
+Parquet file when pyarrow is installed). Every row carries all of the table's
+columns, constants included. The directory's manifest.json lists the files
+together with their row counts, column types, conflict keys and checksums.
+"""
+
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from medical_codes.cache import file_sha256
+from medical_codes.tables import TableSpec
+
+SIDECAR_FORMATS = ('jsonl', 'parquet')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def default_sidecar_dir(output_file: Union[str, Path]) -> Path:
+    """``populate_x.sql`` -> ``populate_x_records/`` beside it."""
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}_records")
+
+
+def table_frame(spec: TableSpec, records: pd.DataFrame) -> pd.DataFrame:
+    """Return the records with the spec's constant columns filled in, in table order."""
+    constants = {name: [value] * len(records) for name, value in spec.constants.items()}
+    frame = records.assign(**constants) if constants else records
+    return frame.loc[:, list(spec.column_names)].reset_index(drop=True)
+
+
+def _write_parquet(spec: TableSpec, frame: pd.DataFrame, path: Path) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet sidecars require pyarrow (pip install pyarrow)") from e
+
+    arrow_types = {
+        'text': pa.string(),
+        'uuid': pa.string(),
+        'boolean': pa.bool_(),
+        'integer': pa.int64(),
+        'numeric': pa.float64(),
+        'date': pa.date32(),
+    }
+    frame = frame.copy()
+    for column in spec.columns:
+        if column.sql_type == 'date':
+            frame[column.name] = pd.to_datetime(frame[column.name]).dt.date
+    schema = pa.schema([(column.name, arrow_types[column.sql_type]) for column in spec.columns])
+    pq.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False), path)
+
+
+class SidecarWriter:
+    """Writes one record file per table and a manifest describing them."""
+
+    def __init__(self, directory: Union[str, Path], file_format: str = 'jsonl') -> None:
+        if file_format not in SIDECAR_FORMATS:
+            raise ValueError(f"Unknown sidecar format: {file_format}")
+        self.directory = Path(directory)
+        self.file_format = file_format
+        self.tables: List[Dict[str, Any]] = []
+
+    def write(self, spec: TableSpec, records: pd.DataFrame) -> Path:
+        """Write the records for ``spec.table`` and register them in the manifest."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{spec.table}.{self.file_format}"
+        frame = table_frame(spec, records)
+        if self.file_format == 'parquet':
+            _write_parquet(spec, frame, path)
+        else:
+            frame.to_json(path, orient='records', lines=True, force_ascii=False)
+
+        self.register({
+            'table': spec.table,
+            'path': path.name,
+            'format': self.file_format,
+            'rows': len(frame),
+            'sha256': file_sha256(path),
+            'columns': [{'name': column.name, 'type': column.sql_type} for column in spec.columns],
+            'conflict_columns': list(spec.conflict_columns),
+            'update_columns': list(spec.update_columns),
+        })
+        return path
+
+    def register(self, entry: Dict[str, Any]) -> None:
+        """Add a manifest entry, replacing any earlier entry for the same table."""
+        self.tables = [table for table in self.tables if table['table'] != entry['table']]
+        self.tables.append(entry)
+
+    def write_manifest(self, generator: str) -> Path:
+        """Write manifest.json listing every table written so far."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'generator': generator,
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'tables': self.tables,
+        }
+        path = self.directory / MANIFEST_NAME
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+            file.write('\n')
+        return path
+
+
+def read_manifest(directory: Union[str, Path]) -> Dict[str, Any]:
+    with open(Path(directory) / MANIFEST_NAME, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def read_table_records(directory: Union[str, Path], table: str) -> Optional[pd.DataFrame]:
+    """Read one table's records back from a sidecar directory, or None if it has none."""
+    directory = Path(directory)
+    if not (directory / MANIFEST_NAME).exists():
+        return None
+    for entry in read_manifest(directory)['tables']:
+        if entry['table'] != table:
+            continue
+        path = directory / entry['path']
+        if entry['format'] == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_json(path, orient='records', lines=True, dtype=False, convert_dates=False)
+    return None
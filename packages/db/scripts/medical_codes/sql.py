@@ -0,0 +1,208 @@
+"""Vectorized rendering of batched INSERT ... ON CONFLICT statements."""
+
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.tables import TableSpec
+from medical_codes.text import replace_all
+
+# Rows per INSERT statement unless the caller asks otherwise. Keeps each
+# statement's parse/plan memory and lock window bounded on large code sets.
+DEFAULT_BATCH_ROWS = 1000
+
+# SQL literals of false and true, indexed by the value
+_BOOL_LITERALS = np.array(['false', 'true'], dtype=object)
+
+
+def sql_text(values: pd.Series) -> pd.Series:
+    """Render a text column as quoted SQL literals, with NULL for missing values."""
+    if isinstance(values.dtype, pd.StringDtype):
+        # Arrow-backed on pandas 3, where the replace and the concatenation run in C++
+        quoted = "'" + values.str.replace("'", "''", regex=False) + "'"
+        return quoted.fillna('NULL')
+
+    missing = values.isna().to_numpy()
+    text = values.to_numpy(dtype=object)
+    if missing.any():
+        text = np.where(missing, '', text)
+
+    escaped = replace_all(text, (("'", "''"),))
+    quoted = "'" + np.array(escaped, dtype=object) + "'"
+    return pd.Series(np.where(missing, 'NULL', quoted), index=values.index, dtype=object)
+
+
+def sql_bool(values: pd.Series) -> pd.Series:
+    """Render a boolean column as SQL true/false literals."""
+    literals = _BOOL_LITERALS[values.to_numpy(dtype=bool).view(np.uint8)]
+    return pd.Series(literals, index=values.index, dtype=object)
+
+
+def sql_literal(value: Any, sql_type: str) -> str:
+    """Render a single constant value of the given column type."""
+    if value is None:
+        return 'NULL'
+    if sql_type == 'boolean':
+        return 'true' if value else 'false'
+    if sql_type in ('integer', 'numeric'):
+        return str(value)
+    quoted = "'" + str(value).replace("'", "''") + "'"
+    return quoted + '::date' if sql_type == 'date' else quoted
+
+
+def sql_column(values: pd.Series, sql_type: str) -> pd.Series:
+    """Render a records column as SQL literals of the given column type."""
+    if sql_type == 'boolean':
+        return sql_bool(values)
+    if sql_type in ('integer', 'numeric'):
+        missing = values.isna()
+        return values.astype(object).where(~missing, 'NULL').astype(str).astype(object)
+    quoted = sql_text(values)
+    if sql_type == 'date':
+        return quoted.where(quoted == 'NULL', quoted + '::date')
+    return quoted
+
+
+def _value_cells(columns: Sequence[Union[pd.Series, str]]) -> np.ndarray:
+    """
+    Lay rendered columns out as a (rows, cells) object array whose rows,
+    joined, are the VALUES tuples: the literals of each row alternate with
+    the text between them, constant literals included.
+    """
+    segments: List[Any] = []
+    text = '(\n    '
+    rows = None
+    for index, column in enumerate(columns):
+        if index:
+            text += ',\n    '
+        if isinstance(column, str):
+            text += column
+        else:
+            segments += [text, column.to_numpy(dtype=object)]
+            text = ''
+            rows = len(column)
+
+    if rows is None:
+        raise ValueError("format_value_rows needs at least one column Series")
+    segments.append(text + '\n)')
+    cells = np.empty((rows, len(segments)), dtype=object)
+    for index, segment in enumerate(segments):
+        cells[:, index] = segment
+    return cells
+
+
+def format_value_rows(columns: Sequence[Union[pd.Series, str]]) -> List[str]:
+    """
+    Join rendered columns into one VALUES tuple per row.
+
+    Each entry is either a Series of SQL literals or a constant literal such as
+    'NULL'. The layout matches the one-value-per-line tuples the loaders parse.
+    """
+    return [''.join(row) for row in _value_cells(columns).tolist()]
+
+
+def _value_columns(spec: TableSpec, records: pd.DataFrame) -> List[Union[pd.Series, str]]:
+    return [
+        sql_literal(spec.constants[column.name], column.sql_type)
+        if column.name in spec.constants
+        else sql_column(records[column.name], column.sql_type)
+        for column in spec.columns
+    ]
+
+
+def render_value_rows(spec: TableSpec, records: pd.DataFrame) -> List[str]:
+    """Render every record as a VALUES tuple covering all of the table's columns."""
+    return format_value_rows(_value_columns(spec, records))
+
+
+def insert_prefix(spec: TableSpec) -> str:
+    """Return the ``INSERT INTO ... VALUES`` head of a statement."""
+    columns = ',\n    '.join(spec.column_names)
+    return f"INSERT INTO {spec.table} (\n    {columns}\n) VALUES\n"
+
+
+def conflict_clause(spec: TableSpec) -> str:
+    """Return the ``ON CONFLICT ... DO UPDATE`` tail of a statement."""
+    updates = ''.join(f"    {column} = EXCLUDED.{column},\n" for column in spec.update_columns)
+    conflict = ', '.join(spec.conflict_columns)
+    return f"\nON CONFLICT ({conflict}) DO UPDATE SET\n{updates}    updated_at = NOW();\n"
+
+
+def _byte_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+def iter_row_batches(
+    rows: Iterable[str],
+    batch_rows: Optional[int] = None,
+    batch_bytes: Optional[int] = None,
+    overhead_bytes: int = 0,
+) -> Iterator[List[str]]:
+    """
+    Group rendered rows into batches of at most ``batch_rows`` rows and
+    ``batch_bytes`` UTF-8 bytes (including ``overhead_bytes`` per statement).
+
+    A single row larger than the byte budget still gets a batch of its own.
+    Falsy limits are ignored.
+    """
+    batch: List[str] = []
+    size = overhead_bytes
+    for row in rows:
+        row_bytes = _byte_length(row) + 1  # plus the separating comma
+        if batch and (
+            (batch_rows and len(batch) >= batch_rows)
+            or (batch_bytes and size + row_bytes > batch_bytes)
+        ):
+            yield batch
+            batch = []
+            size = overhead_bytes
+        batch.append(row)
+        size += row_bytes
+
+    if batch:
+        yield batch
+
+
+def render_insert_statements(
+    spec: TableSpec,
+    records: pd.DataFrame,
+    batch_rows: Optional[int] = DEFAULT_BATCH_ROWS,
+    batch_bytes: Optional[int] = None,
+) -> str:
+    """
+    Render records as one or more ``INSERT ... ON CONFLICT`` statements.
+
+    Each batch is a complete, independently retryable upsert carrying its own
+    ON CONFLICT clause. Pass ``batch_rows=None`` and ``batch_bytes=None`` for a
+    single statement.
+    """
+    if (batch_rows or 0) < 0 or (batch_bytes or 0) < 0:
+        raise ValueError(
+            f"batch limits must be 0 or more, got rows={batch_rows} bytes={batch_bytes}"
+        )
+    head = insert_prefix(spec)
+    tail = conflict_clause(spec)
+    if batch_bytes:
+        batches = iter_row_batches(
+            render_value_rows(spec, records),
+            batch_rows,
+            batch_bytes,
+            overhead_bytes=_byte_length(head) + _byte_length(tail),
+        )
+        return ''.join(head + ','.join(batch) + tail for batch in batches)
+
+    # Without a byte budget the batches are known up front: each row's first
+    # and last cells, which are fixed text, take on the statement head or the
+    # separating comma and any statement tail, and the output is a single join
+    cells = _value_cells(_value_columns(spec, records))
+    rows = len(cells)
+    if not rows:
+        return ''
+    step = batch_rows or rows
+    opening, closing = cells[0, 0], cells[0, -1]
+    cells[:, 0] = ',' + opening
+    cells[::step, 0] = head + opening
+    cells[step - 1::step, -1] = closing + tail
+    cells[-1, -1] = closing + tail
+    return ''.join(cells.ravel().tolist())
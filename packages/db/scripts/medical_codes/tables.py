@@ -0,0 +1,262 @@
+"""
+Column layouts of the master tables the processors populate.
+
+A TableSpec lists every column written by the generated INSERT statements, in
+order, with its SQL type. Columns in ``constants`` hold the same value on
+every row; the rest come from the processor's records DataFrame.
+"""
+
+from typing import Any, Dict, NamedTuple, Tuple
+
+
+class Column(NamedTuple):
+    name: str
+    sql_type: str  # text, boolean, integer, numeric, date or uuid
+
+
+class TableSpec(NamedTuple):
+    table: str
+    columns: Tuple[Column, ...]
+    conflict_columns: Tuple[str, ...]
+    update_columns: Tuple[str, ...]
+    constants: Dict[str, Any]
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return tuple(column.name for column in self.columns)
+
+    @property
+    def record_columns(self) -> Tuple[str, ...]:
+        """Columns that vary per row and must be present in the records."""
+        return tuple(column.name for column in self.columns if column.name not in self.constants)
+
+
+def _columns(*definitions: str) -> Tuple[Column, ...]:
+    return tuple(Column(*definition.split(':')) for definition in definitions)
+
+
+ICD10_CODE_MASTER = TableSpec(
+    table='icd10_code_master',
+    columns=_columns(
+        'icd10_code:text',
+        'short_description:text',
+        'long_description:text',
+        'chapter:text',
+        'chapter_range:text',
+        'section:text',
+        'category:text',
+        'code_type:text',
+        'laterality:text',
+        'encounter:text',
+        'age_group:text',
+        'gender:text',
+        'reporting_required:boolean',
+        'public_health_reporting:boolean',
+        'manifestation_code:boolean',
+        'is_billable:boolean',
+        'is_header:boolean',
+        'requires_additional_digit:boolean',
+        'usage_count:integer',
+        'last_used_date:date',
+        'is_active:boolean',
+        'effective_date:date',
+        'termination_date:date',
+    ),
+    conflict_columns=('icd10_code',),
+    update_columns=(
+        'short_description',
+        'long_description',
+        'chapter',
+        'chapter_range',
+        'is_billable',
+        'is_header',
+        'requires_additional_digit',
+    ),
+    constants={
+        'section': None,
+        'code_type': 'diagnosis',
+        'laterality': None,
+        'encounter': None,
+        'age_group': None,
+        'gender': None,
+        'reporting_required': False,
+        'public_health_reporting': False,
+        'manifestation_code': False,
+        'usage_count': 0,
+        'last_used_date': None,
+        'is_active': True,
+        'effective_date': '2026-01-01',
+        'termination_date': None,
+    },
+)
+
+HCPCS_CODE_MASTER = TableSpec(
+    table='hcpcs_code_master',
+    columns=_columns(
+        'hcpcs_code:text',
+        'short_description:text',
+        'long_description:text',
+        'category:text',
+        'action_code:text',
+        'coverage_status:text',
+        'pricing_indicator:text',
+        'multiple_pricing_indicator:text',
+        'is_active:boolean',
+        'effective_date:date',
+        'termination_date:date',
+    ),
+    conflict_columns=('hcpcs_code',),
+    update_columns=(
+        'short_description',
+        'long_description',
+        'category',
+        'action_code',
+        'is_active',
+    ),
+    constants={
+        'coverage_status': None,
+        'pricing_indicator': None,
+        'multiple_pricing_indicator': None,
+        'effective_date': '2025-01-01',
+        'termination_date': None,
+    },
+)
+
+CPT_CODE_MASTER = TableSpec(
+    table='cpt_code_master',
+    columns=_columns(
+        'cpt_code:text',
+        'short_description:text',
+        'long_description:text',
+        'category:text',
+        'section:text',
+        'subsection:text',
+        'rvu_work:numeric',
+        'rvu_practice_expense:numeric',
+        'rvu_malpractice:numeric',
+        'rvu_total:numeric',
+        'bilateral_surgery:boolean',
+        'assistant_surgeon:boolean',
+        'co_surgeon:boolean',
+        'multiple_proc:boolean',
+        'global_period:text',
+        'prior_auth_commonly_required:boolean',
+        'modifier_51_exempt:boolean',
+        'usage_count:integer',
+        'last_used_date:date',
+        'is_active:boolean',
+        'effective_date:date',
+        'termination_date:date',
+    ),
+    conflict_columns=('cpt_code',),
+    update_columns=('short_description', 'long_description', 'section', 'subsection'),
+    constants={
+        'rvu_work': None,
+        'rvu_practice_expense': None,
+        'rvu_malpractice': None,
+        'rvu_total': None,
+        'bilateral_surgery': False,
+        'assistant_surgeon': False,
+        'co_surgeon': False,
+        'multiple_proc': False,
+        'global_period': None,
+        'prior_auth_commonly_required': False,
+        'modifier_51_exempt': False,
+        'usage_count': 0,
+        'last_used_date': None,
+        'is_active': True,
+        'effective_date': '2025-01-01',
+        'termination_date': None,
+    },
+)
+
+ADJUSTMENT_REASON_CODE = TableSpec(
+    table='adjustment_reason_code',
+    columns=_columns(
+        'code:text',
+        'code_type:text',
+        'category:text',
+        'description:text',
+        'short_description:text',
+        'payer_id:uuid',
+        'payer_specific_code:text',
+        'financial_class:text',
+        'requires_patient_notification:boolean',
+        'appealable:boolean',
+        'is_active:boolean',
+        'effective_date:date',
+        'expiration_date:date',
+    ),
+    conflict_columns=('code', 'code_type'),
+    update_columns=(
+        'description',
+        'short_description',
+        'category',
+        'financial_class',
+        'requires_patient_notification',
+        'appealable',
+    ),
+    constants={
+        'payer_id': None,
+        'payer_specific_code': None,
+        'is_active': True,
+        'effective_date': '2025-01-01',
+        'expiration_date': None,
+    },
+)
+
+MODIFIER_CODE = TableSpec(
+    table='modifier_code',
+    columns=_columns(
+        'modifier_code:text',
+        'description:text',
+        'short_description:text',
+        'category:text',
+        'type:text',
+        'level_i_indicator:text',
+        'level_ii_indicator:text',
+        'is_active:boolean',
+        'effective_date:date',
+        'termination_date:date',
+    ),
+    conflict_columns=('modifier_code',),
+    update_columns=(
+        'description',
+        'short_description',
+        'category',
+        'type',
+        'level_i_indicator',
+        'level_ii_indicator',
+    ),
+    constants={
+        'is_active': True,
+        'effective_date': '2025-01-01',
+        'termination_date': None,
+    },
+)
+
+# Derived from icd10_code_master by medical_codes.hierarchy; not in the drizzle schema
+ICD10_CODE_HIERARCHY = TableSpec(
+    table='icd10_code_hierarchy',
+    columns=_columns(
+        'icd10_code:text',
+        'parent_code:text',
+        'depth:integer',
+        'path:text',
+    ),
+    conflict_columns=('icd10_code',),
+    update_columns=('parent_code', 'depth', 'path'),
+    constants={},
+)
+
+ICD10_CODE_CLOSURE = TableSpec(
+    table='icd10_code_closure',
+    columns=_columns(
+        'ancestor_code:text',
+        'descendant_code:text',
+        'distance:integer',
+    ),
+    conflict_columns=('ancestor_code', 'descendant_code'),
+    update_columns=('distance',),
+    constants={},
+)
@@ -0,0 +1,51 @@
+"""Column-wise text cleaning shared by the processors."""
+
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+
+def clean_text_column(values: pd.Series, max_length: Optional[int] = None) -> pd.Series:
+    """
+    Vectorized counterpart of the scripts' clean_text, without SQL escaping.
+
+    Strips surrounding whitespace and optionally truncates; missing values stay
+    missing. Escaping is left to the serializer so truncation never splits an
+    escaped quote.
+    """
+    present = values.notna()
+    # Object dtype keeps the .str methods on the fast path across pandas versions
+    text = values[present].astype(str).astype(object).str.strip()
+    if max_length is not None:
+        text = text.str.slice(0, max_length)
+    return text.reindex(values.index)
+
+
+def replace_all(values: Sequence[str], replacements: Sequence[Tuple[str, str]]) -> List[str]:
+    """
+    Apply ``str.replace`` for each (old, new) pair to every value.
+
+    The column is joined on NUL (which cannot occur in Postgres text) so each
+    replacement is one C-level pass over a single buffer instead of one Python
+    call per value; if a value does contain NUL it falls back to per value.
+    """
+    if not len(values):
+        return []
+    try:
+        joined = '\x00'.join(values)
+    except TypeError:
+        values = [str(value) for value in values]
+        joined = '\x00'.join(values)
+    for old, new in replacements:
+        joined = joined.replace(old, new)
+    replaced = joined.split('\x00')
+    if len(replaced) == len(values):
+        return replaced
+
+    result = []
+    for value in values:
+        value = str(value)
+        for old, new in replacements:
+            value = value.replace(old, new)
+        result.append(value)
+    return result
@@ -0,0 +1,287 @@
+"""
+Prefix trie over the code sets, written as one memory-mappable file.
+
+Every ICD-10, CPT, HCPCS and modifier code is inserted one character per
+level. Nodes are numbered in creation order and stored as flat arrays, with
+each node's outgoing edges contiguous and sorted by label (the CSR layout):
+
+    edge_start[node] .. edge_start[node + 1]   the node's edges
+    edge_label[edge], edge_target[edge]        the character and child node
+    top[node * top_k .. + top_k]               best codes under the node
+
+Codes are inserted best first (highest weight, then shortest, then in code
+order), so each node keeps the first ``top_k`` codes that pass through it
+and completing a prefix is a walk of one edge per character followed by one
+slice of ``top``: no database round trip and nothing to rank at query time.
+
+File layout, little-endian, each array starting on an 8-byte boundary:
+
+    header          magic, version, top_k, node_count, edge_count,
+                    code_count, text_size
+    edge_start      uint32[node_count + 1]
+    edge_label      uint8[edge_count]
+    edge_target     uint32[edge_count]
+    top             uint32[node_count * top_k], NO_CODE where unused
+    code_set        uint8[code_count], an index into CODE_SETS
+    text_start      uint32[2 * code_count + 1], code i is text 2i and its
+                    description text 2i + 1
+    text            UTF-8
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.sidecar import read_table_records
+
+MAGIC = b'CODETRIE'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8s6I')
+
+DEFAULT_TOP_K = 10
+NO_CODE = 0xFFFFFFFF
+
+# Values of code_set; the names match hot_codes_cache.code_type where it has them
+CODE_SETS = ('ICD10', 'CPT', 'HCPCS', 'MODIFIER')
+
+# Master tables in the sidecar record directories: (table, code column, code set)
+TRIE_TABLES: Tuple[Tuple[str, str, str], ...] = (
+    ('icd10_code_master', 'icd10_code', 'ICD10'),
+    ('cpt_code_master', 'cpt_code', 'CPT'),
+    ('hcpcs_code_master', 'hcpcs_code', 'HCPCS'),
+    ('modifier_code', 'modifier_code', 'MODIFIER'),
+)
+
+
+class TrieEntry(NamedTuple):
+    """One code to insert; a higher weight ranks it above other completions."""
+
+    code: str
+    code_set: str
+    description: str
+    weight: float = 0.0
+
+
+class Completion(NamedTuple):
+    code: str
+    code_set: str
+    description: str
+
+
+def normalize_prefix(text: str) -> str:
+    """Codes are stored upper case without the ICD-10 dot: ' e11.6' -> 'E116'."""
+    return text.strip().upper().replace('.', '')
+
+
+def read_trie_entries(
+    directory: Union[str, Path], weights: Optional[Dict[str, float]] = None
+) -> List[TrieEntry]:
+    """
+    The active codes of every TRIE_TABLES table in a sidecar directory.
+    ``weights`` maps codes to a usage weight; without one a code's
+    usage_count is used.
+    """
+    entries: List[TrieEntry] = []
+    for table, code_column, code_set in TRIE_TABLES:
+        records = read_table_records(directory, table)
+        if records is None:
+            continue
+        if 'is_active' in records:
+            records = records[records['is_active'].fillna(True).astype(bool)]
+        codes = records[code_column].astype(str)
+        weight = pd.Series(0.0, index=records.index)
+        if 'usage_count' in records:
+            weight = pd.to_numeric(records['usage_count'], errors='coerce').fillna(0.0)
+        if weights:
+            weight = codes.map(weights).fillna(weight)
+        descriptions = records['short_description'].fillna('').astype(str)
+        entries.extend(
+            TrieEntry(code, code_set, description, float(code_weight))
+            for code, description, code_weight in zip(codes, descriptions, weight)
+        )
+    return entries
+
+
+def _align(size: int) -> int:
+    return -size % 8
+
+
+def build_code_trie(
+    entries: Iterable[TrieEntry],
+    top_k: int = DEFAULT_TOP_K,
+    skipped: Optional[List[TrieEntry]] = None,
+) -> bytes:
+    """
+    Build the trie file contents for ``entries``. Edge labels are single
+    bytes, so codes with non-ASCII characters are left out; they are added
+    to ``skipped``, if given.
+    """
+    if not 0 < top_k < 256:
+        raise ValueError(f"top_k must be between 1 and 255, not {top_k}")
+    kept: List[TrieEntry] = []
+    for entry in entries:
+        if not entry.code:
+            continue
+        if normalize_prefix(entry.code).isascii():
+            kept.append(entry)
+        elif skipped is not None:
+            skipped.append(entry)
+    ranked = sorted(
+        kept, key=lambda entry: (-entry.weight, len(entry.code), entry.code, entry.code_set)
+    )
+    set_ids = {name: index for index, name in enumerate(CODE_SETS)}
+
+    children: List[Dict[int, int]] = [{}]
+    tops: List[List[int]] = [[]]
+    for code_id, entry in enumerate(ranked):
+        node = 0
+        if len(tops[0]) < top_k:
+            tops[0].append(code_id)
+        for label in normalize_prefix(entry.code).encode('ascii'):
+            child = children[node].get(label)
+            if child is None:
+                child = len(children)
+                children[node][label] = child
+                children.append({})
+                tops.append([])
+            node = child
+            if len(tops[node]) < top_k:
+                tops[node].append(code_id)
+
+    edge_start = np.zeros(len(children) + 1, dtype='<u4')
+    labels: List[int] = []
+    targets: List[int] = []
+    for node, edges in enumerate(children):
+        for label in sorted(edges):
+            labels.append(label)
+            targets.append(edges[label])
+        edge_start[node + 1] = len(labels)
+
+    top = np.full((len(children), top_k), NO_CODE, dtype='<u4')
+    for node, codes in enumerate(tops):
+        top[node, :len(codes)] = codes
+
+    texts = []
+    for entry in ranked:
+        texts.append(entry.code.encode('utf-8'))
+        texts.append(entry.description.encode('utf-8'))
+    text_start = np.zeros(len(texts) + 1, dtype='<u4')
+    text_start[1:] = np.cumsum([len(text) for text in texts])
+    text = b''.join(texts)
+
+    sections = [
+        edge_start.tobytes(),
+        np.array(labels, dtype='u1').tobytes(),
+        np.array(targets, dtype='<u4').tobytes(),
+        top.tobytes(),
+        np.array([set_ids[entry.code_set] for entry in ranked], dtype='u1').tobytes(),
+        text_start.tobytes(),
+        text,
+    ]
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, top_k, len(children), len(labels), len(ranked), len(text)
+    )
+    parts = [header, b'\0' * _align(len(header))]
+    for section in sections:
+        parts.append(section)
+        parts.append(b'\0' * _align(len(section)))
+    return b''.join(parts)
+
+
+def write_code_trie(
+    entries: Iterable[TrieEntry],
+    path: Union[str, Path],
+    top_k: int = DEFAULT_TOP_K,
+    skipped: Optional[List[TrieEntry]] = None,
+) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(build_code_trie(entries, top_k, skipped))
+    return path
+
+
+class CodeTrie:
+    """
+    Read-only view of a trie file. The file is memory-mapped and its arrays
+    are numpy views onto the mapping, so opening it reads nothing up front.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, top_k, nodes, edges, codes, text_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} code trie file")
+        self.top_k = top_k
+
+        offset = _HEADER.size + _align(_HEADER.size)
+
+        def view(dtype: str, count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes + _align(array.nbytes)
+            return array
+
+        self.edge_start = view('<u4', nodes + 1)
+        self.edge_label = view('u1', edges)
+        self.edge_target = view('<u4', edges)
+        self.top = view('<u4', nodes * top_k).reshape(nodes, top_k)
+        self.code_set = view('u1', codes)
+        self.text_start = view('<u4', 2 * codes + 1)
+        self._text_offset = offset
+
+    def __enter__(self) -> 'CodeTrie':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The numpy views keep the buffer exported; drop them before closing
+        for name in ('edge_start', 'edge_label', 'edge_target', 'top', 'code_set', 'text_start'):
+            setattr(self, name, None)
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return len(self.code_set)
+
+    def _text(self, index: int) -> str:
+        start = self._text_offset + int(self.text_start[index])
+        end = self._text_offset + int(self.text_start[index + 1])
+        return self._mmap[start:end].decode('utf-8')
+
+    def entry(self, code_id: int) -> Completion:
+        return Completion(
+            self._text(2 * code_id),
+            CODE_SETS[self.code_set[code_id]],
+            self._text(2 * code_id + 1),
+        )
+
+    def find_node(self, prefix: str) -> Optional[int]:
+        """The node reached by ``prefix``, or None when no code starts with it."""
+        node = 0
+        for label in normalize_prefix(prefix).encode('ascii', 'replace'):
+            start, end = int(self.edge_start[node]), int(self.edge_start[node + 1])
+            # At most a few dozen sorted labels per node
+            position = self.edge_label[start:end].tobytes().find(bytes((label,)))
+            if position < 0:
+                return None
+            node = int(self.edge_target[start + position])
+        return node
+
+    def complete_ids(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        node = self.find_node(prefix)
+        if node is None:
+            return []
+        ids = self.top[node, :limit or self.top_k]
+        return [int(code_id) for code_id in ids if code_id != NO_CODE]
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[Completion]:
+        """The best codes starting with ``prefix``, at most ``top_k`` of them."""
+        return [self.entry(code_id) for code_id in self.complete_ids(prefix, limit)]
+
@@ -0,0 +1,278 @@
+"""
+Batch validation of claim lines against the code dictionary.
+
+Claim lines come in as columns (procedure codes, service dates, one column
+per diagnosis and modifier position, as in the claim_line table) and go out
+as one uint32 error mask per line, a bit per ERROR_NAMES entry.
+
+Nothing is checked line by line. Each column is factorized first: a day's
+claims repeat a few thousand codes and a few dates millions of times, so
+only the distinct values are normalized, parsed and binary-searched in the
+memory-mapped CodeDictionary (medical_codes/dictionary.py). Their flags and
+dates are then gathered back onto the lines and every rule is one array
+expression over all of them.
+
+The flags are the ones stored in the dictionary. An ICD-10 code is billable
+when the order file does not mark it as a header (is_header, not the
+structural is_billable guess); requires_additional_digit comes from the
+code structure (classification.icd10_properties); is_active and the
+termination date come from the source files.
+
+The not yet effective errors only fire for codes with a real effective
+date. The processors write one placeholder effective date for a whole
+master table, and the dictionary stores those as NO_DATE, so a claim
+with a service date before the placeholder (e.g. a late-filed 2025 claim
+against the 2026 ICD-10 release) is not rejected for it.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from medical_codes.classification import Codes
+from medical_codes.dictionary import (
+    FLAG_ACTIVE,
+    FLAG_HEADER,
+    FLAG_REQUIRES_ADDITIONAL_DIGIT,
+    NO_DATE,
+    NOT_FOUND,
+    RECORD_DTYPE,
+    CodeDictionary,
+    date_days,
+    normalize_codes,
+)
+from medical_codes.modifiers import ModifierCatalog
+
+ERROR_SERVICE_DATE_INVALID = 1 << 0
+ERROR_PROCEDURE_MISSING = 1 << 1
+ERROR_PROCEDURE_UNKNOWN = 1 << 2
+ERROR_PROCEDURE_INACTIVE = 1 << 3
+ERROR_PROCEDURE_NOT_EFFECTIVE = 1 << 4
+ERROR_DIAGNOSIS_MISSING = 1 << 5
+ERROR_DIAGNOSIS_UNKNOWN = 1 << 6
+ERROR_DIAGNOSIS_NOT_BILLABLE = 1 << 7
+ERROR_DIAGNOSIS_INCOMPLETE = 1 << 8
+ERROR_DIAGNOSIS_INACTIVE = 1 << 9
+ERROR_DIAGNOSIS_NOT_EFFECTIVE = 1 << 10
+ERROR_MODIFIER_UNKNOWN = 1 << 11
+ERROR_MODIFIER_INACTIVE = 1 << 12
+ERROR_MODIFIER_NOT_EFFECTIVE = 1 << 13
+ERROR_MODIFIER_COMBINATION = 1 << 14
+
+ERROR_NAMES: Dict[int, str] = {
+    ERROR_SERVICE_DATE_INVALID: 'service_date_invalid',
+    ERROR_PROCEDURE_MISSING: 'procedure_missing',
+    ERROR_PROCEDURE_UNKNOWN: 'procedure_unknown',
+    ERROR_PROCEDURE_INACTIVE: 'procedure_inactive',
+    ERROR_PROCEDURE_NOT_EFFECTIVE: 'procedure_not_effective',
+    ERROR_DIAGNOSIS_MISSING: 'diagnosis_missing',
+    ERROR_DIAGNOSIS_UNKNOWN: 'diagnosis_unknown',
+    ERROR_DIAGNOSIS_NOT_BILLABLE: 'diagnosis_not_billable',
+    ERROR_DIAGNOSIS_INCOMPLETE: 'diagnosis_incomplete',
+    ERROR_DIAGNOSIS_INACTIVE: 'diagnosis_inactive',
+    ERROR_DIAGNOSIS_NOT_EFFECTIVE: 'diagnosis_not_effective',
+    ERROR_MODIFIER_UNKNOWN: 'modifier_unknown',
+    ERROR_MODIFIER_INACTIVE: 'modifier_inactive',
+    ERROR_MODIFIER_NOT_EFFECTIVE: 'modifier_not_effective',
+    ERROR_MODIFIER_COMBINATION: 'modifier_combination',
+}
+
+# A complete code in a 7th character category: three character category,
+# up to three more characters and the extension
+ICD10_FULL_LENGTH = 7
+
+# Procedure codes are looked up as CPT first, then as HCPCS Level II
+PROCEDURE_CODE_SETS = ('CPT', 'HCPCS')
+
+# Column names of the claim_line table
+CLAIM_LINE_PROCEDURE = 'cpt_code'
+CLAIM_LINE_SERVICE_DATE = 'service_date'
+CLAIM_LINE_DIAGNOSES = tuple(f'diagnosis_code_{position}' for position in range(1, 5))
+CLAIM_LINE_MODIFIERS = tuple(f'modifier_{position}' for position in range(1, 5))
+
+
+def _factorize(values: Codes) -> Tuple[np.ndarray, np.ndarray]:
+    """(distinct value id per line, -1 where missing; distinct values)."""
+    # In the column's own dtype: converting Arrow strings to objects first costs more
+    # than the factorization
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    line_ids, distinct = pd.factorize(series, use_na_sentinel=True)
+    return line_ids, np.asarray(distinct, dtype=object)
+
+
+class CodeColumn:
+    """
+    A column of codes resolved against the dictionary once per distinct
+    code. ``line_ids`` maps each line to its distinct code; the arrays have
+    one more row than there are distinct codes, for absent codes, which the
+    -1 id of a missing value picks. Unknown and absent codes have no flags
+    and NO_DATE dates.
+    """
+
+    def __init__(
+        self, dictionary: CodeDictionary, codes: Codes, code_sets: Sequence[str]
+    ) -> None:
+        self.line_ids, distinct = _factorize(codes)
+        normalized = normalize_codes(distinct)
+        positions = np.full(len(distinct) + 1, NOT_FOUND, dtype=np.int64)
+        for code_set in code_sets:
+            missing = np.flatnonzero(positions[:-1] == NOT_FOUND)
+            if not len(missing):
+                break
+            positions[missing] = dictionary.find_many(normalized[missing], code_set)
+        self.found = positions != NOT_FOUND
+        records = np.zeros(len(positions), dtype=RECORD_DTYPE)
+        records['effective_date'] = records['termination_date'] = NO_DATE
+        records[self.found] = dictionary.records[positions[self.found]]
+        self.flags = records['flags']
+        self.effective_date = records['effective_date']
+        self.termination_date = records['termination_date']
+        self.length = np.append(np.char.str_len(normalized), 0)
+        self.present = self.length > 0
+
+    def has(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+    def line_errors(
+        self,
+        code_errors: np.ndarray,
+        service_days: np.ndarray,
+        inactive_error: int,
+        not_effective_error: int,
+    ) -> np.ndarray:
+        """
+        Each line's ``code_errors`` (one mask per distinct code), plus the
+        inactive and not yet effective errors as of the line's service date.
+        Codes stored with NO_DATE, including those whose table only had a
+        placeholder date, are never terminated or not yet effective.
+        """
+        code_errors = code_errors | np.where(
+            self.found & ~self.has(FLAG_ACTIVE), inactive_error, 0
+        ).astype(np.uint32)
+        errors = code_errors[self.line_ids]
+        dated = service_days != NO_DATE
+        # Gather dates only when some code has them; most have no termination date
+        if (self.termination_date != NO_DATE).any():
+            termination = self.termination_date[self.line_ids]
+            terminated = dated & (termination != NO_DATE) & (service_days > termination)
+            errors[terminated] |= inactive_error
+        if (self.effective_date != NO_DATE).any():
+            # NO_DATE is below every service date
+            errors[dated & (service_days < self.effective_date[self.line_ids])] |= (
+                not_effective_error
+            )
+        return errors
+
+
+def service_date_days(dates: Codes) -> np.ndarray:
+    """Days since 1970-01-01 of each service date, NO_DATE where missing or invalid."""
+    line_ids, distinct = _factorize(dates)
+    # As in CodeColumn, the extra last day is picked by missing dates
+    days = np.append(date_days(pd.Series(distinct, dtype=object)), np.int32(NO_DATE))
+    return days[line_ids]
+
+
+def _unknown_errors(column: CodeColumn, unknown_error: int, missing_error: int = 0) -> np.ndarray:
+    return (
+        np.where(column.present & ~column.found, unknown_error, 0)
+        | np.where(column.present, 0, missing_error)
+    ).astype(np.uint32)
+
+
+def validate_claim_lines(
+    dictionary: CodeDictionary,
+    procedure_codes: Codes,
+    service_dates: Codes,
+    diagnosis_codes: Sequence[Codes] = (),
+    modifiers: Sequence[Codes] = (),
+    modifier_catalog: Optional[ModifierCatalog] = None,
+) -> np.ndarray:
+    """
+    Error mask of each claim line. ``diagnosis_codes`` and ``modifiers``
+    are one column per position; empty or missing entries are skipped, but
+    a line needs a procedure code and a first diagnosis code. With a
+    ``modifier_catalog`` the modifiers of each line are also checked
+    against its exclusive groups.
+    """
+    service_days = service_date_days(service_dates)
+    errors = np.where(service_days == NO_DATE, ERROR_SERVICE_DATE_INVALID, 0).astype(np.uint32)
+
+    procedure = CodeColumn(dictionary, procedure_codes, PROCEDURE_CODE_SETS)
+    errors |= procedure.line_errors(
+        _unknown_errors(procedure, ERROR_PROCEDURE_UNKNOWN, ERROR_PROCEDURE_MISSING),
+        service_days,
+        ERROR_PROCEDURE_INACTIVE,
+        ERROR_PROCEDURE_NOT_EFFECTIVE,
+    )
+
+    if not diagnosis_codes:
+        errors |= ERROR_DIAGNOSIS_MISSING
+    for index, codes in enumerate(diagnosis_codes):
+        diagnosis = CodeColumn(dictionary, codes, ('ICD10',))
+        code_errors = _unknown_errors(
+            diagnosis, ERROR_DIAGNOSIS_UNKNOWN, ERROR_DIAGNOSIS_MISSING if index == 0 else 0
+        )
+        # is_header is the order file's own "not valid for submission" flag
+        not_billable = diagnosis.found & diagnosis.has(FLAG_HEADER)
+        incomplete = (
+            diagnosis.has(FLAG_REQUIRES_ADDITIONAL_DIGIT) & (diagnosis.length < ICD10_FULL_LENGTH)
+        )
+        code_errors[not_billable] |= ERROR_DIAGNOSIS_NOT_BILLABLE
+        code_errors[incomplete] |= ERROR_DIAGNOSIS_INCOMPLETE
+        errors |= diagnosis.line_errors(
+            code_errors, service_days, ERROR_DIAGNOSIS_INACTIVE, ERROR_DIAGNOSIS_NOT_EFFECTIVE
+        )
+
+    for codes in modifiers:
+        modifier = CodeColumn(dictionary, codes, ('MODIFIER',))
+        errors |= modifier.line_errors(
+            _unknown_errors(modifier, ERROR_MODIFIER_UNKNOWN),
+            service_days,
+            ERROR_MODIFIER_INACTIVE,
+            ERROR_MODIFIER_NOT_EFFECTIVE,
+        )
+    if modifier_catalog is not None and len(modifiers) > 1:
+        errors[modifier_catalog.invalid_lines(modifiers)] |= ERROR_MODIFIER_COMBINATION
+    return errors
+
+
+def validate_claim_line_frame(
+    dictionary: CodeDictionary,
+    lines: pd.DataFrame,
+    modifier_catalog: Optional[ModifierCatalog] = None,
+) -> np.ndarray:
+    """``validate_claim_lines`` over the claim_line columns present in ``lines``."""
+    missing = [
+        column for column in (CLAIM_LINE_PROCEDURE, CLAIM_LINE_SERVICE_DATE)
+        if column not in lines
+    ]
+    if missing:
+        raise ValueError(f"Claim lines are missing required columns: {missing}")
+    return validate_claim_lines(
+        dictionary,
+        lines[CLAIM_LINE_PROCEDURE],
+        lines[CLAIM_LINE_SERVICE_DATE],
+        [lines[column] for column in CLAIM_LINE_DIAGNOSES if column in lines],
+        [lines[column] for column in CLAIM_LINE_MODIFIERS if column in lines],
+        modifier_catalog,
+    )
+
+
+def error_names(errors: int) -> List[str]:
+    """Names of the errors set in one line's mask."""
+    return [name for error, name in ERROR_NAMES.items() if errors & error]
+
+
+def error_labels(errors: np.ndarray, separator: str = '|') -> np.ndarray:
+    """Joined error names per line ('' when valid), naming each distinct mask once."""
+    masks, line_ids = np.unique(errors, return_inverse=True)
+    labels = np.array([separator.join(error_names(int(mask))) for mask in masks], dtype=object)
+    return labels[line_ids.reshape(-1)]
+
+
+def count_errors(errors: np.ndarray) -> Dict[str, int]:
+    """Number of lines with each error."""
+    return {
+        name: int(np.count_nonzero(errors & error)) for error, name in ERROR_NAMES.items()
+    }
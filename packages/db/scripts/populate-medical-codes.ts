@@ -9,6 +9,7 @@ import { drizzle } from 'drizzle-orm/aws-data-api/pg';
 import { RDSDataClient } from '@aws-sdk/client-rds-data';
 import fs from 'node:fs';
 import path from 'node:path';
+import readline from 'node:readline';
 import { v4 as uuid } from 'uuid';
 import {
   icd10CodeMaster,
@@ -66,6 +67,130 @@ interface HCPCSCode {
   effectiveDate: string;
 }
 
+interface SidecarManifest {
+  version: number;
+  generator: string;
+  tables: {
+    table: string;
+    path: string;
+    format: string;
+    rows: number;
+  }[];
+}
+
+type SidecarRow = Record<string, string | boolean | number | null>;
+
+async function* readJSONLines(filePath: string): AsyncGenerator<SidecarRow> {
+  const lines = readline.createInterface({
+    input: fs.createReadStream(filePath, { encoding: 'utf-8' }),
+    crlfDelay: Infinity,
+  });
+
+  for await (const line of lines) {
+    if (line.trim()) {
+      yield JSON.parse(line) as SidecarRow;
+    }
+  }
+}
+
+/**
+ * Whether the manifest belongs to the current SQL file. The processor writes
+ * the manifest after the SQL, so one older than the SQL file is left over
+ * from an earlier run (for instance before a --no-sidecar run) and its
+ * records are stale.
+ */
+function isCurrentManifest(manifestPath: string, sqlFilePath: string): boolean {
+  if (!fs.existsSync(sqlFilePath)) {
+    return true;
+  }
+  if (fs.statSync(manifestPath).mtimeMs >= fs.statSync(sqlFilePath).mtimeMs) {
+    return true;
+  }
+  console.log('Record manifest is older than the SQL file; parsing the SQL file instead');
+  return false;
+}
+
+/**
+ * Whether the record files listed in the manifest can be read here. Only
+ * JSONL is; Parquet records (--sidecar-format parquet) are for the Python
+ * tools, so for those the SQL file is parsed instead.
+ */
+function hasJSONLRecords(manifestPath: string): boolean {
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf-8')) as SidecarManifest;
+  const formats = Array.from(new Set(manifest.tables.map((entry) => entry.format)));
+  if (formats.every((format) => format === 'jsonl')) {
+    return true;
+  }
+  console.log(`Record files are ${formats.join(', ')}, not jsonl; parsing the SQL file instead`);
+  return false;
+}
+
+/**
+ * Read the per-table record files written next to the SQL by the Python
+ * processor, instead of parsing the VALUES tuples back out of the SQL text.
+ */
+async function readSidecarRecords(manifestPath: string): Promise<{
+  icd10Codes: ICD10Code[],
+  cptCodes: CPTCode[],
+  hcpcsCodes: HCPCSCode[]
+}> {
+  console.log(`Reading record manifest: ${manifestPath}`);
+
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf-8')) as SidecarManifest;
+  const directory = path.dirname(manifestPath);
+  const icd10Codes: ICD10Code[] = [];
+  const cptCodes: CPTCode[] = [];
+  const hcpcsCodes: HCPCSCode[] = [];
+
+  for (const entry of manifest.tables) {
+    if (entry.format !== 'jsonl') {
+      throw new Error(`Unsupported record file format for ${entry.table}: ${entry.format}`);
+    }
+    const filePath = path.join(directory, entry.path);
+
+    if (entry.table === 'icd10_code_master') {
+      for await (const row of readJSONLines(filePath)) {
+        icd10Codes.push({
+          code: row.icd10_code as string,
+          shortDescription: row.short_description as string,
+          longDescription: row.long_description as string,
+          chapter: row.chapter as string,
+          chapterRange: row.chapter_range as string,
+          category: row.category as string,
+          isBillable: row.is_billable as boolean,
+          requiresAdditionalDigit: row.requires_additional_digit as boolean,
+          effectiveDate: row.effective_date as string,
+        });
+      }
+    } else if (entry.table === 'cpt_code_master') {
+      for await (const row of readJSONLines(filePath)) {
+        cptCodes.push({
+          code: row.cpt_code as string,
+          shortDescription: row.short_description as string,
+          longDescription: row.long_description as string,
+          category: row.category as string,
+          effectiveDate: row.effective_date as string,
+        });
+      }
+    } else if (entry.table === 'hcpcs_code_master') {
+      for await (const row of readJSONLines(filePath)) {
+        hcpcsCodes.push({
+          code: row.hcpcs_code as string,
+          shortDescription: row.short_description as string,
+          longDescription: row.long_description as string,
+          category: row.category as string,
+          level: 'II', // HCPCS Level II
+          actionCode: (row.action_code as string | null) || undefined,
+          effectiveDate: row.effective_date as string,
+        });
+      }
+    }
+  }
+
+  console.log(`Read ${icd10Codes.length} ICD-10 codes, ${cptCodes.length} CPT codes, and ${hcpcsCodes.length} HCPCS codes`);
+  return { icd10Codes, cptCodes, hcpcsCodes };
+}
+
 function parseSQLFile(filePath: string): {
   icd10Codes: ICD10Code[],
   cptCodes: CPTCode[],
@@ -361,16 +486,28 @@ async function main() {
       __dirname,
       "populate_medical_codes_updated.sql"
     );
+    const manifestPath = path.join(
+      __dirname,
+      "populate_medical_codes_updated_records",
+      "manifest.json"
+    );
+
+    const useRecords =
+      fs.existsSync(manifestPath) &&
+      isCurrentManifest(manifestPath, sqlFilePath) &&
+      hasJSONLRecords(manifestPath);
 
-    if (!fs.existsSync(sqlFilePath)) {
+    if (!useRecords && !fs.existsSync(sqlFilePath)) {
       console.error(`SQL file not found: ${sqlFilePath}`);
       console.log("Please run the Python script first to generate the SQL file:");
       console.log("python3 process-medical-codes-updated.py");
       throw new Error("SQL file not found");
     }
 
-    // Parse the SQL file
-    const { icd10Codes, cptCodes, hcpcsCodes } = parseSQLFile(sqlFilePath);
+    // Prefer the structured record files; fall back to parsing the SQL file
+    const { icd10Codes, cptCodes, hcpcsCodes } = useRecords
+      ? await readSidecarRecords(manifestPath)
+      : parseSQLFile(sqlFilePath);
 
     if (icd10Codes.length === 0 && cptCodes.length === 0 && hcpcsCodes.length === 0) {
       console.error("No codes found in SQL file");
@@ -4,92 +4,44 @@ Script to process XLSX file containing CARC and RARC codes
 and generate SQL INSERT statements for the adjustment_reason_code table.
 """
 
+import argparse
+import itertools
 import pandas as pd
 import re
 import sys
 import uuid
 from pathlib import Path
 
+from medical_codes.carc_rarc import classify_adjustment_description
+from medical_codes.excel import Workbook
+from medical_codes.loader import LoadError
+from medical_codes.metrics import (
+    DROP_BLANK,
+    DROP_DUPLICATE,
+    ProcessorMetrics,
+    RunMetrics,
+    add_metrics_arguments,
+    default_metrics_file,
+)
+from medical_codes.output import TableOutput, add_output_arguments
+from medical_codes.profiling import Profiler, add_profile_arguments, profiled
+from medical_codes.sheet_cache import SheetCache
+from medical_codes.tables import ADJUSTMENT_REASON_CODE
+
 def clean_text(text):
-    """Clean and sanitize text for SQL insertion."""
+    """Clean text for SQL insertion; quoting happens when the SQL is rendered."""
     if pd.isna(text):
         return None
     text = str(text).strip()
-    # Escape single quotes for SQL
-    text = text.replace("'", "''")
     # Limit length to prevent issues
     if len(text) > 2000:
         text = text[:2000]
     return text
 
-def determine_category(code_type, description):
-    """Determine the category based on code type and description."""
-    desc_lower = description.lower() if description else ''
-    
-    # Map keywords to categories
-    if any(word in desc_lower for word in ['patient', 'deductible', 'copay', 'coinsurance']):
-        return 'Patient Responsibility'
-    elif any(word in desc_lower for word in ['coverage', 'benefit', 'covered']):
-        return 'Coverage'
-    elif any(word in desc_lower for word in ['medical necessity', 'medically necessary']):
-        return 'Medical Necessity'
-    elif any(word in desc_lower for word in ['limit', 'maximum', 'exceeded']):
-        return 'Benefit Limit'
-    elif any(word in desc_lower for word in ['administrative', 'processing', 'clerical']):
-        return 'Administrative'
-    elif any(word in desc_lower for word in ['duplicate', 'previously paid']):
-        return 'Duplicate'
-    elif any(word in desc_lower for word in ['authorization', 'prior auth']):
-        return 'Authorization'
-    elif any(word in desc_lower for word in ['coordination', 'other insurance', 'cob']):
-        return 'COB'
-    elif any(word in desc_lower for word in ['contractual', 'contract', 'allowable']):
-        return 'Contractual'
-    elif any(word in desc_lower for word in ['documentation', 'records', 'missing']):
-        return 'Documentation'
-    elif any(word in desc_lower for word in ['eligibility', 'eligible']):
-        return 'Eligibility'
-    elif any(word in desc_lower for word in ['timely filing', 'claim filing', 'late']):
-        return 'Timely Filing'
-    elif any(word in desc_lower for word in ['coding', 'procedure code', 'diagnosis']):
-        return 'Coding Error'
-    elif any(word in desc_lower for word in ['bundling', 'bundled', 'inclusive']):
-        return 'Bundling'
-    elif any(word in desc_lower for word in ['appeal', 'review']):
-        return 'Appeal Rights'
-    elif any(word in desc_lower for word in ['routing', 'forward']):
-        return 'Routing'
-    else:
-        return 'Administrative'  # Default category
-
-def determine_financial_class(code_type, description):
-    """Determine financial class based on description."""
-    desc_lower = description.lower() if description else ''
-    
-    if any(word in desc_lower for word in ['patient', 'deductible', 'copay', 'coinsurance']):
-        return 'patient_responsibility'
-    elif any(word in desc_lower for word in ['contractual', 'allowable', 'contract']):
-        return 'contractual'
-    elif any(word in desc_lower for word in ['write', 'adjustment', 'non-covered']):
-        return 'adjustment'
-    else:
-        return 'other'
-
-def determine_appealable(description):
-    """Determine if the adjustment reason is appealable."""
-    desc_lower = description.lower() if description else ''
-    
-    # Non-appealable conditions
-    if any(word in desc_lower for word in ['duplicate', 'timely filing', 'late', 'administrative']):
-        return False
-    # Appealable conditions
-    elif any(word in desc_lower for word in ['medical necessity', 'coverage', 'denial', 'benefit']):
-        return True
-    else:
-        return False  # Default to not appealable
-
-def process_carc_rarc_file(file_path):
+def process_carc_rarc_file(file_path, output=None, sheet_cache=None, metrics=None):
     """Process CARC/RARC XLSX file and generate SQL INSERT statements."""
+    output = output or TableOutput()
+    metrics = metrics or ProcessorMetrics('carc_rarc')
     print(f"Processing CARC/RARC file: {file_path}")
 
     if not Path(file_path).exists():
@@ -97,147 +49,126 @@ def process_carc_rarc_file(file_path):
         return None, 0
 
     try:
-        # Read the Excel file - try different sheet names
-        df = None
-        sheet_names_to_try = [0, 'Sheet1', 'CARC-RARC', 'Codes', 'Data']
-        
-        for sheet in sheet_names_to_try:
+        # Open the workbook once and stream the first sheet that exists
+        with Workbook(file_path, cache=sheet_cache) as book:
             try:
-                df = pd.read_excel(file_path, sheet_name=sheet)
-                print(f"Successfully read sheet: {sheet}")
-                break
-            except:
-                continue
-        
-        if df is None:
-            print("Could not read any sheet from the Excel file")
-            return None, 0
-            
-        print(f"Columns in file: {list(df.columns)}")
-        print(f"Shape: {df.shape}")
-        print(f"First few rows:")
-        print(df.head())
-
-        # Auto-detect column names
-        code_col = None
-        desc_col = None
-        type_col = None
-
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if any(word in col_lower for word in ['code', 'number']) and code_col is None:
-                code_col = col
-            elif any(word in col_lower for word in ['description', 'desc', 'reason']) and desc_col is None:
-                desc_col = col
-            elif any(word in col_lower for word in ['type', 'carc', 'rarc']) and type_col is None:
-                type_col = col
-
-        # If we can't auto-detect, use positional
-        if not code_col:
-            code_col = df.columns[0]
-        if not desc_col:
-            desc_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-
-        print(f"Using code column: {code_col}")
-        print(f"Using description column: {desc_col}")
-        print(f"Using type column: {type_col}")
-
-        values = []
-        processed_codes = set()
-
-        for idx, row in df.iterrows():
-            if pd.isna(row.get(code_col)):
-                continue
-
-            code = clean_text(row[code_col])
-            description = clean_text(row.get(desc_col, '')) or ''
-            
-            # Skip if we've already processed this code
-            if code in processed_codes:
-                continue
-            processed_codes.add(code)
-
-            # Determine code type (CARC or RARC)
-            if type_col and not pd.isna(row.get(type_col)):
-                code_type_raw = str(row[type_col]).strip().upper()
-                if 'CARC' in code_type_raw:
-                    code_type = 'CARC'
-                elif 'RARC' in code_type_raw:
-                    code_type = 'RARC'
-                else:
-                    # Try to determine from code pattern
-                    if code.startswith(('CO', 'OA', 'PI', 'PR')):
-                        code_type = 'CARC'
-                    elif code.startswith(('N', 'M', 'A')):
-                        code_type = 'RARC'
-                    else:
-                        print(f"Warning: Could not determine type for code {code}, defaulting to CARC")
-                        code_type = 'CARC'
-            else:
-                # Determine from code pattern or position in file
-                if code.startswith(('CO', 'OA', 'PI', 'PR')) or (code.isdigit() and int(code) < 300):
-                    code_type = 'CARC'
-                else:
-                    code_type = 'RARC'
-
-            # Determine other fields
-            category = determine_category(code_type, description)
-            financial_class = determine_financial_class(code_type, description)
-            appealable = determine_appealable(description)
-            
-            # Truncate descriptions to fit schema limits
-            short_desc = description[:100] if description else ''
-            
-            # Determine if patient notification is required
-            requires_notification = 'patient' in description.lower() if description else False
-
-            values.append(f"""(
-    '{code}',
-    '{code_type}',
-    '{category}',
-    '{description}',
-    '{short_desc}',
-    NULL,
-    NULL,
-    '{financial_class}',
-    {str(requires_notification).lower()},
-    {str(appealable).lower()},
-    true,
-    '2025-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+                sheet = book.first_sheet([0, 'Sheet1', 'CARC-RARC', 'Codes', 'Data'])
+            except KeyError:
+                print("Could not read any sheet from the Excel file")
+                return None, 0
+            print(f"Successfully read sheet: {sheet}")
+
+            chunks = metrics.timed('read', book.iter_frames(sheet))
+            first_chunk = next(chunks)
+            print(f"Columns in file: {list(first_chunk.columns)}")
+            print(f"First few rows:")
+            print(first_chunk.head())
+
+            # Auto-detect column names
+            code_col = None
+            desc_col = None
+            type_col = None
+
+            for col in first_chunk.columns:
+                col_lower = str(col).lower()
+                if any(word in col_lower for word in ['code', 'number']) and code_col is None:
+                    code_col = col
+                elif any(word in col_lower for word in ['description', 'desc', 'reason']) and desc_col is None:
+                    desc_col = col
+                elif any(word in col_lower for word in ['type', 'carc', 'rarc']) and type_col is None:
+                    type_col = col
+
+            # If we can't auto-detect, use positional
+            if not code_col:
+                code_col = first_chunk.columns[0]
+            if not desc_col:
+                desc_col = first_chunk.columns[1] if len(first_chunk.columns) > 1 else first_chunk.columns[0]
+
+            print(f"Using code column: {code_col}")
+            print(f"Using description column: {desc_col}")
+            print(f"Using type column: {type_col}")
+
+            records = []
+            processed_codes = set()
+            rows_read = 0
+
+            with metrics.stage('transform') as stage:
+                for chunk in itertools.chain([first_chunk], chunks):
+                    rows_read += len(chunk)
+                    for idx, row in chunk.iterrows():
+                        if pd.isna(row.get(code_col)):
+                            stage.drop(DROP_BLANK)
+                            continue
+
+                        code = clean_text(row[code_col])
+                        description = clean_text(row.get(desc_col, '')) or ''
+
+                        # Skip if we've already processed this code
+                        if code in processed_codes:
+                            stage.drop(DROP_DUPLICATE)
+                            continue
+                        processed_codes.add(code)
+
+                        # Determine code type (CARC or RARC)
+                        if type_col and not pd.isna(row.get(type_col)):
+                            code_type_raw = str(row[type_col]).strip().upper()
+                            if 'CARC' in code_type_raw:
+                                code_type = 'CARC'
+                            elif 'RARC' in code_type_raw:
+                                code_type = 'RARC'
+                            else:
+                                # Try to determine from code pattern
+                                if code.startswith(('CO', 'OA', 'PI', 'PR')):
+                                    code_type = 'CARC'
+                                elif code.startswith(('N', 'M', 'A')):
+                                    code_type = 'RARC'
+                                else:
+                                    print(f"Warning: Could not determine type for code {code}, defaulting to CARC")
+                                    code_type = 'CARC'
+                        else:
+                            # Determine from code pattern or position in file
+                            if code.startswith(('CO', 'OA', 'PI', 'PR')) or (code.isdigit() and int(code) < 300):
+                                code_type = 'CARC'
+                            else:
+                                code_type = 'RARC'
+
+                        # Derive category, financial class, appealability and patient
+                        # notification from the description in a single keyword scan
+                        category, financial_class, appealable, requires_notification = (
+                            classify_adjustment_description(description)
+                        )
+
+                        # Truncate descriptions to fit schema limits
+                        short_desc = description[:100] if description else ''
+
+                        records.append((
+                            code,
+                            code_type,
+                            category,
+                            description,
+                            short_desc,
+                            financial_class,
+                            requires_notification,
+                            appealable,
+                        ))
+                stage.rows_in = rows_read
+                stage.rows_out = len(records)
+
+            print(f"Rows read: {rows_read}")
+
+        if not records:
             return None, 0
 
-        sql = f"""-- CARC/RARC Adjustment Reason Code Data
-INSERT INTO adjustment_reason_code (
-    code,
-    code_type,
-    category,
-    description,
-    short_description,
-    payer_id,
-    payer_specific_code,
-    financial_class,
-    requires_patient_notification,
-    appealable,
-    is_active,
-    effective_date,
-    expiration_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (code, code_type) DO UPDATE SET
-    description = EXCLUDED.description,
-    short_description = EXCLUDED.short_description,
-    category = EXCLUDED.category,
-    financial_class = EXCLUDED.financial_class,
-    requires_patient_notification = EXCLUDED.requires_patient_notification,
-    appealable = EXCLUDED.appealable,
-    updated_at = NOW();
-"""
+        records = pd.DataFrame.from_records(records, columns=ADJUSTMENT_REASON_CODE.record_columns)
+        with metrics.stage('serialize') as stage:
+            stage.rows_in = len(records)
+            sql = "-- CARC/RARC Adjustment Reason Code Data\n" + output.render(
+                ADJUSTMENT_REASON_CODE, records, file_path, update_source='X12'
+            )
+            stage.rows_out = len(records)
+            stage.bytes_out = len(sql.encode('utf-8'))
 
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing CARC/RARC file: {e}")
@@ -245,19 +176,53 @@ ON CONFLICT (code, code_type) DO UPDATE SET
         traceback.print_exc()
         return None, 0
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate CARC/RARC adjustment reason code SQL.")
+    parser.add_argument(
+        '--input',
+        default="/Users/michaeldadi/Downloads/CARC-RARC-Full-List-04-18-2025%20CY25-2%20release_0_0.xlsx",
+        help="CARC/RARC XLSX file",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(Path(__file__).parent.parent / "populate_carc_rarc_codes.sql"),
+        help="SQL file to write",
+    )
+    add_output_arguments(parser)
+    parser.add_argument(
+        '--cache-dir',
+        default=str(Path(__file__).parent / ".record-cache"),
+        help="directory for converted Excel sheets cached by workbook hash",
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="always read the workbook itself",
+    )
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to process the file."""
+    args = parse_args(argv)
+
     print("=" * 60)
     print("CARC/RARC Code Processing Script")
     print("=" * 60)
     print()
 
     # File path
-    carc_rarc_file = "/Users/michaeldadi/Downloads/CARC-RARC-Full-List-04-18-2025%20CY25-2%20release_0_0.xlsx"
+    carc_rarc_file = args.input
 
     # Output file
-    current_dir = Path(__file__).parent.parent
-    output_file = current_dir / "populate_carc_rarc_codes.sql"
+    output_file = Path(args.output)
+    output = TableOutput.from_args(args)
+    sheet_cache = None if args.no_cache else SheetCache(Path(args.cache_dir) / 'sheets')
+    run_metrics = RunMetrics.from_args(args)
+    metrics = run_metrics.processor('carc_rarc')
+    profiler = Profiler.from_args(args)
 
     print(f"Input file: {carc_rarc_file}")
     print(f"Output file: {output_file}")
@@ -265,22 +230,34 @@ def main():
 
     # Process CARC/RARC codes
     if Path(carc_rarc_file).exists():
-        carc_rarc_sql, count = process_carc_rarc_file(carc_rarc_file)
+        with profiled(profiler, 'carc_rarc'):
+            carc_rarc_sql, count = process_carc_rarc_file(
+                carc_rarc_file, output, sheet_cache, metrics
+            )
         if carc_rarc_sql:
             # Write to file
             try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write("-- CARC/RARC Adjustment Reason Code Data Population\n")
-                    f.write("-- Generated for adjustment_reason_code table\n\n")
-                    f.write(carc_rarc_sql)
-                    
+                with metrics.stage('write') as stage:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        f.write("-- CARC/RARC Adjustment Reason Code Data Population\n")
+                        f.write("-- Generated for adjustment_reason_code table\n\n")
+                        f.write(carc_rarc_sql)
+                    stage.rows_in = stage.rows_out = count
+                    stage.bytes_out = output_file.stat().st_size
+
                 print(f"\n✅ SQL file generated: {output_file}")
+                with metrics.stage('write'):
+                    manifest = output.finish(Path(__file__).name)
+                if manifest is not None:
+                    print(f"✅ Record files: {manifest.parent}")
                 print(f"📊 Total codes processed: {count}")
                 print()
                 print("Next steps:")
                 print("1. Review the generated SQL file")
                 print("2. Run: cd packages/db && yarn populate-carc-rarc")
                 print("   or execute the SQL file directly against your database")
+            except LoadError as e:
+                print(f"❌ Error loading into the database: {e}")
             except Exception as e:
                 print(f"❌ Error writing file: {e}")
         else:
@@ -288,5 +265,12 @@ def main():
     else:
         print(f"⚠ CARC/RARC file not found: {carc_rarc_file}")
 
+    metrics_file = args.metrics_file or default_metrics_file(output_file)
+    try:
+        path = run_metrics.write(metrics_file, Path(__file__).name)
+        print(f"📈 Stage metrics: {path}")
+    except OSError as e:
+        print(f"⚠ Could not write metrics file: {e}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
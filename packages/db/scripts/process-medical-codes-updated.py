@@ -6,128 +6,171 @@ Updated script to process medical codes from new file formats:
 - CPT: Keep existing Excel processing logic
 """
 
+import argparse
 import pandas as pd
-import re
 import sys
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def clean_text(text):
-    """Clean and sanitize text for SQL insertion."""
-    if pd.isna(text):
+from medical_codes.cache import RecordCache, cached_records
+from medical_codes.classification import icd10_chapter, icd10_properties
+from medical_codes.cpt import transform_cpt_chunks
+from medical_codes.excel import Workbook
+from medical_codes.hcpcs import transform_hcpcs_chunks
+from medical_codes.hierarchy import HIERARCHY_DDL, build_icd10_hierarchy
+from medical_codes.icd10 import (
+    ICD10_CODE_PATTERN,
+    ICD10_RECORD_COLUMNS,
+    iter_icd10_order_frames,
+    transform_icd10_chunks,
+    transform_icd10_order_file_parallel,
+)
+from medical_codes.loader import LoadError
+from medical_codes.metrics import (
+    ProcessorMetrics,
+    RunMetrics,
+    add_metrics_arguments,
+    default_metrics_file,
+)
+from medical_codes.output import TableOutput, add_output_arguments, non_negative_int
+from medical_codes.profiling import Profiler, add_profile_arguments, profiled
+from medical_codes.sheet_cache import SheetCache
+from medical_codes.tables import (
+    CPT_CODE_MASTER,
+    HCPCS_CODE_MASTER,
+    ICD10_CODE_CLOSURE,
+    ICD10_CODE_HIERARCHY,
+    ICD10_CODE_MASTER,
+)
+
+# Bump when a parsing or transform change alters the records, so cached
+# records built by an older version are not reused
+PROCESSOR_VERSION = '2026.2'
+
+def icd10_record(record):
+    """
+    Build the icd10_code_master values for one order file record, or None if
+    the code is invalid; the per-record counterpart of transform_icd10_frame
+    that the parallel parse runs in its workers.
+    """
+    code = record.code
+
+    # Validate ICD-10 format
+    if not ICD10_CODE_PATTERN.match(code):
         return None
-    text = str(text).strip()
-    # Escape single quotes for SQL
-    text = text.replace("'", "''")
-    # Limit length to prevent issues
-    if len(text) > 1000:
-        text = text[:1000]
-    return text
-
-def determine_icd10_properties(code):
-    """Determine ICD-10 code properties based on structure."""
-    # Billable determination
-    is_billable = True
-    if len(code) == 3:  # Category codes like A01
-        is_billable = False
-    elif len(code) == 4 and code.endswith('9'):  # Unspecified codes like A019
-        is_billable = False
-    elif 'X' in code:  # Placeholder codes
-        is_billable = False
-
-    # 7th character requirement
-    requires_additional_digit = False
-    if code.startswith(('S', 'T')) and len(code) >= 6:
-        requires_additional_digit = True
-    elif code.startswith(('M80', 'M84', 'M48.4', 'M48.5')):
-        requires_additional_digit = True
-
-    return is_billable, requires_additional_digit
-
-def determine_icd10_chapter_info(code):
-    """Determine ICD-10 chapter and category information."""
-    chapter_mapping = {
-        'A': ('Infectious and parasitic diseases', 'A00-B99'),
-        'B': ('Infectious and parasitic diseases', 'A00-B99'),
-        'C': ('Neoplasms', 'C00-D49'),
-        'D': ('Diseases of blood and immune system', 'D50-D89'),
-        'E': ('Endocrine, nutritional and metabolic diseases', 'E00-E89'),
-        'F': ('Mental and behavioral disorders', 'F01-F99'),
-        'G': ('Diseases of the nervous system', 'G00-G99'),
-        'H': ('Diseases of eye/ear and adnexa', 'H00-H95'),
-        'I': ('Diseases of the circulatory system', 'I00-I99'),
-        'J': ('Diseases of the respiratory system', 'J00-J99'),
-        'K': ('Diseases of the digestive system', 'K00-K95'),
-        'L': ('Diseases of skin and subcutaneous tissue', 'L00-L99'),
-        'M': ('Diseases of musculoskeletal system', 'M00-M99'),
-        'N': ('Diseases of the genitourinary system', 'N00-N99'),
-        'O': ('Pregnancy, childbirth and the puerperium', 'O00-O9A'),
-        'P': ('Perinatal conditions', 'P00-P96'),
-        'Q': ('Congenital malformations', 'Q00-Q99'),
-        'R': ('Symptoms, signs and abnormal findings', 'R00-R99'),
-        'S': ('Injury, poisoning (by body region)', 'S00-T88'),
-        'T': ('Injury, poisoning (by type)', 'S00-T88'),
-        'V': ('External causes - transport accidents', 'V00-Y99'),
-        'W': ('External causes - other accidents', 'V00-Y99'),
-        'X': ('External causes - intentional self-harm', 'V00-Y99'),
-        'Y': ('External causes - assault, undetermined', 'V00-Y99'),
-        'Z': ('Factors influencing health status', 'Z00-Z99')
-    }
-
-    chapter_info = chapter_mapping.get(code[0], ('Other', 'Unknown'))
-    return chapter_info[0], chapter_info[1]
-
-def determine_cpt_category(code, current_category=''):
-    """Determine CPT category based on code range."""
-    try:
-        code_num = int(code)
-        if 99201 <= code_num <= 99499:
-            return 'Evaluation and Management'
-        elif 10021 <= code_num <= 69990:
-            return 'Surgery'
-        elif 70010 <= code_num <= 79999:
-            return 'Radiology'
-        elif 80047 <= code_num <= 89398:
-            return 'Pathology and Laboratory'
-        elif 90281 <= code_num <= 99199:
-            return 'Medicine'
-        elif 99500 <= code_num <= 99607:
-            return 'Home Health Procedures/Services'
-        else:
-            return current_category or 'Other'
-    except ValueError:
-        return current_category or 'Other'
-
-def determine_hcpcs_category(code):
-    """Determine HCPCS Level II category based on first letter."""
-    if not code or len(code) == 0:
-        return 'Other'
-
-    first_char = code.strip()[0].upper()
-    category_mapping = {
-        'A': 'Transportation Services, Medical and Surgical Supplies',
-        'B': 'Enteral and Parenteral Therapy',
-        'C': 'Outpatient PPS',
-        'D': 'Dental Procedures',
-        'E': 'Durable Medical Equipment',
-        'G': 'Procedures/Professional Services (Temporary)',
-        'H': 'Alcohol and Drug Abuse Treatment Services',
-        'J': 'Drugs Administered Other Than Oral Method',
-        'K': 'Temporary Codes',
-        'L': 'Orthotic/Prosthetic Procedures',
-        'M': 'Medical Services',
-        'P': 'Pathology and Laboratory Services',
-        'Q': 'Temporary Codes',
-        'R': 'Diagnostic Radiology Services',
-        'S': 'Temporary National Codes',
-        'T': 'National T-Codes',
-        'V': 'Vision Services',
-    }
-
-    return category_mapping.get(first_char, 'Other')
-
-def process_icd10_txt_file(file_path):
-    """Process ICD-10 text file and generate SQL INSERT statements."""
+
+    # Determine properties: two table lookups and a few comparisons
+    is_billable, requires_additional_digit = icd10_properties(code)
+    chapter, chapter_range = icd10_chapter(code)
+
+    return (
+        code,
+        record.short_description[:100],
+        record.long_description[:1000],
+        chapter,
+        chapter_range,
+        code[:3],  # Category is the first 3 characters
+        is_billable,
+        record.is_header,
+        requires_additional_digit,
+    )
+
+def read_icd10_records(file_path, workers=1, metrics=None):
+    """Parse the ICD-10 order file into master table records.
+
+    With workers > 1 the file is parsed in parallel worker processes over
+    memory-mapped byte ranges. Otherwise it is read in blocks of lines that
+    are sliced and classified column by column.
+    """
+    metrics = metrics or ProcessorMetrics('icd10')
+    if workers > 1:
+        print(f"  Parsing with {workers} worker processes...")
+        # The workers parse and transform together, so this is one read stage
+        with metrics.stage('read') as stage:
+            rows = transform_icd10_order_file_parallel(file_path, icd10_record, workers)
+            stage.rows_out = len(rows)
+        with metrics.stage('transform') as stage:
+            records = pd.DataFrame.from_records(rows, columns=ICD10_RECORD_COLUMNS)
+            stage.rows_out = len(records)
+        return records
+
+    frames = metrics.timed('read', iter_icd10_order_frames(file_path))
+    with metrics.stage('transform') as stage:
+        records = transform_icd10_chunks(frames, stage.dropped)
+        stage.rows_in = metrics.stage_metrics('read').rows_out
+        stage.rows_out = len(records)
+    return records
+
+HCPCS_SHEET_COLUMNS = ['HCPC', 'SHORT DESCRIPTION', 'LONG DESCRIPTION', 'ACTION CD']
+
+def read_hcpcs_records(file_path, sheet_cache=None, metrics=None):
+    """Stream the HCPCS transaction report into master table records."""
+    metrics = metrics or ProcessorMetrics('hcpcs')
+    with Workbook(file_path, cache=sheet_cache) as book:
+        # Read the "Changes by HCPC" sheet as it has all the codes
+        chunks = book.iter_frames('Changes by HCPC', columns=HCPCS_SHEET_COLUMNS)
+        with metrics.stage('transform') as stage:
+            records = transform_hcpcs_chunks(metrics.timed('read', chunks), stage.dropped)
+            stage.rows_in = metrics.stage_metrics('read').rows_out
+            stage.rows_out = len(records)
+    return records
+
+def read_cpt_records(file_path, sheet_cache=None, metrics=None):
+    """Stream the CPT code list into master table records."""
+    metrics = metrics or ProcessorMetrics('cpt')
+    with Workbook(file_path, cache=sheet_cache) as book:
+        # Only the code/header column and the description column are used
+        chunks = book.iter_frames(0, columns=[0, 1])
+        with metrics.stage('transform') as stage:
+            records = transform_cpt_chunks(metrics.timed('read', chunks), stage.dropped)
+            stage.rows_in = metrics.stage_metrics('read').rows_out
+            stage.rows_out = len(records)
+    return records
+
+def render_records(metrics, heading, spec, records, output, file_path, update_source='CMS'):
+    """Render a processor's records as SQL, timed as its serialize stage."""
+    with metrics.stage('serialize') as stage:
+        stage.rows_in = len(records)
+        sql = heading + output.render(spec, records, file_path, update_source=update_source)
+        stage.rows_out = len(records)
+        # Counting ASCII output needs no encoded copy
+        stage.bytes_out = len(sql) if sql.isascii() else len(sql.encode('utf-8'))
+    return sql
+
+def render_icd10_hierarchy(metrics, records, output):
+    """Build the ICD-10 code tree from the master records and render its derived tables."""
+    with metrics.stage('transform') as stage:
+        stage.rows_in += len(records)
+        hierarchy = build_icd10_hierarchy(records['icd10_code'])
+        stage.rows_out += len(hierarchy.nodes)
+    print(
+        f"  Built ICD-10 hierarchy: {len(hierarchy.nodes)} codes, "
+        f"{len(hierarchy.closure)} closure rows"
+    )
+
+    with metrics.stage('serialize') as stage:
+        stage.rows_in += len(hierarchy.nodes) + len(hierarchy.closure)
+        sql = (
+            "\n-- ICD-10 Code Hierarchy (derived from the order file)\n"
+            + HIERARCHY_DDL
+            + output.render_replacement(ICD10_CODE_HIERARCHY, hierarchy.nodes)
+            + output.render_replacement(ICD10_CODE_CLOSURE, hierarchy.closure)
+        )
+        stage.rows_out += len(hierarchy.nodes) + len(hierarchy.closure)
+        stage.bytes_out += len(sql.encode('utf-8'))
+    return sql
+
+def process_icd10_txt_file(
+    file_path, workers=1, output=None, cache=None, metrics=None, hierarchy=False
+):
+    """Process ICD-10 text file and generate SQL INSERT statements.
+
+    With ``hierarchy`` the code tree (parent pointers, depth, paths and a
+    closure table) is rendered after the master records.
+    """
+    output = output or TableOutput()
+    metrics = metrics or ProcessorMetrics('icd10')
     print(f"Processing ICD-10 text file: {file_path}")
 
     if not Path(file_path).exists():
@@ -135,128 +178,28 @@ def process_icd10_txt_file(file_path):
         return None, 0
 
     try:
-        values = []
-        processed_codes = set()
-
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line_num, line in enumerate(file, 1):
-                if line_num % 1000 == 0:
-                    print(f"  Processed {line_num} lines...")
-
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Parse the fixed-width format
-                # Format: order_number(5) + space + code(7) + space + hierarchy_level(1) + space + short_desc(65) + space + long_desc
-                parts = line.split(None, 4)  # Split on whitespace, max 5 parts
-                if len(parts) < 5:
-                    continue
-
-                order_num = parts[0]
-                code = parts[1].strip()
-                hierarchy_level = parts[2]
-                short_desc = parts[3]
-                long_desc = parts[4] if len(parts) > 4 else parts[3]
-
-                # Skip if we've already processed this code
-                if code in processed_codes:
-                    continue
-                processed_codes.add(code)
-
-                # Validate ICD-10 format
-                if not re.match(r'^[A-Z]\d{2}', code):
-                    continue
-
-                # Determine properties
-                is_billable, requires_additional_digit = determine_icd10_properties(code)
-                chapter, chapter_range = determine_icd10_chapter_info(code)
-
-                # Generate category (first 3 characters)
-                category = code[:3]
-
-                # Clean descriptions
-                short_desc_clean = clean_text(short_desc)[:100] if short_desc else ''
-                long_desc_clean = clean_text(long_desc)[:1000] if long_desc else ''
-
-                # Determine if this is a header code (hierarchy level 0)
-                is_header = hierarchy_level == '0'
-
-                values.append(f"""(
-    '{code}',
-    '{short_desc_clean}',
-    '{long_desc_clean}',
-    '{clean_text(chapter)[:100]}',
-    '{clean_text(chapter_range)[:20]}',
-    NULL,
-    '{clean_text(category)[:50]}',
-    'diagnosis',
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    false,
-    false,
-    false,
-    {str(is_billable).lower()},
-    {str(is_header).lower()},
-    {str(requires_additional_digit).lower()},
-    0,
-    NULL,
-    true,
-    '2026-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+        records = cached_records(
+            cache, 'icd10', file_path, lambda: read_icd10_records(file_path, workers, metrics)
+        )
+        if records.empty:
             return None, 0
+        sql = render_records(
+            metrics, "-- ICD-10 Code Master Data (2026)\n", ICD10_CODE_MASTER, records, output,
+            file_path,
+        )
+        if hierarchy:
+            sql += render_icd10_hierarchy(metrics, records, output)
 
-        sql = f"""-- ICD-10 Code Master Data (2026)
-INSERT INTO icd10_code_master (
-    icd10_code,
-    short_description,
-    long_description,
-    chapter,
-    chapter_range,
-    section,
-    category,
-    code_type,
-    laterality,
-    encounter,
-    age_group,
-    gender,
-    reporting_required,
-    public_health_reporting,
-    manifestation_code,
-    is_billable,
-    is_header,
-    requires_additional_digit,
-    usage_count,
-    last_used_date,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (icd10_code) DO UPDATE SET
-    short_description = EXCLUDED.short_description,
-    long_description = EXCLUDED.long_description,
-    chapter = EXCLUDED.chapter,
-    chapter_range = EXCLUDED.chapter_range,
-    is_billable = EXCLUDED.is_billable,
-    is_header = EXCLUDED.is_header,
-    requires_additional_digit = EXCLUDED.requires_additional_digit,
-    updated_at = NOW();
-"""
-
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing ICD-10 text file: {e}")
         return None, 0
 
-def process_hcpcs_file(file_path):
+def process_hcpcs_file(file_path, output=None, cache=None, sheet_cache=None, metrics=None):
     """Process HCPCS Excel file and generate SQL INSERT statements."""
+    output = output or TableOutput()
+    metrics = metrics or ProcessorMetrics('hcpcs')
     print(f"Processing HCPCS file: {file_path}")
 
     if not Path(file_path).exists():
@@ -264,83 +207,27 @@ def process_hcpcs_file(file_path):
         return None, 0
 
     try:
-        # Read the "Changes by HCPC" sheet as it has all the codes
-        df = pd.read_excel(file_path, sheet_name='Changes by HCPC')
-        print(f"Columns in HCPCS file: {list(df.columns)}")
-        print(f"Shape: {df.shape}")
-
-        values = []
-        processed_codes = set()
-
-        for idx, row in df.iterrows():
-            if idx % 1000 == 0 and idx > 0:
-                print(f"  Processed {idx} rows...")
-
-            code = clean_text(row.get('HCPC', '')).strip()
-            if not code or code in processed_codes:
-                continue
-
-            processed_codes.add(code)
-
-            action_code = clean_text(row.get('ACTION CD', ''))
-            short_desc = clean_text(row.get('SHORT DESCRIPTION', ''))[:100]
-            long_desc = clean_text(row.get('LONG DESCRIPTION', ''))[:1000]
-
-            # Determine category
-            category = determine_hcpcs_category(code)
-
-            # Determine if this is active (not discontinued)
-            is_active = action_code != 'D'  # D = Discontinued
-
-            values.append(f"""(
-    '{code}',
-    '{short_desc}',
-    '{long_desc}',
-    '{clean_text(category)[:100]}',
-    '{action_code}',
-    NULL,
-    NULL,
-    NULL,
-    {str(is_active).lower()},
-    '2025-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+        records = cached_records(
+            cache, 'hcpcs', file_path,
+            lambda: read_hcpcs_records(file_path, sheet_cache, metrics),
+        )
+        if records.empty:
             return None, 0
+        sql = render_records(
+            metrics, "-- HCPCS Level II Code Master Data\n", HCPCS_CODE_MASTER, records, output,
+            file_path,
+        )
 
-        sql = f"""-- HCPCS Level II Code Master Data
-INSERT INTO hcpcs_code_master (
-    hcpcs_code,
-    short_description,
-    long_description,
-    category,
-    action_code,
-    coverage_status,
-    pricing_indicator,
-    multiple_pricing_indicator,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (hcpcs_code) DO UPDATE SET
-    short_description = EXCLUDED.short_description,
-    long_description = EXCLUDED.long_description,
-    category = EXCLUDED.category,
-    action_code = EXCLUDED.action_code,
-    is_active = EXCLUDED.is_active,
-    updated_at = NOW();
-"""
-
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing HCPCS file: {e}")
         return None, 0
 
-def process_cpt_file(file_path):
+def process_cpt_file(file_path, output=None, cache=None, sheet_cache=None, metrics=None):
     """Process CPT XLSX file and generate SQL INSERT statements."""
+    output = output or TableOutput()
+    metrics = metrics or ProcessorMetrics('cpt')
     print(f"Processing CPT file: {file_path}")
 
     if not Path(file_path).exists():
@@ -348,136 +235,200 @@ def process_cpt_file(file_path):
         return None, 0
 
     try:
-        df = pd.read_excel(file_path)
-        print(f"Columns in CPT file: {list(df.columns)}")
-        print(f"Shape: {df.shape}")
-
-        # Auto-detect columns
-        code_col = df.columns[0]  # First column usually contains codes
-        desc_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-
-        values = []
-        processed_codes = set()
-        current_category = ''
-
-        for idx, row in df.iterrows():
-            col_0_val = str(row.get(code_col, '')).strip()
-            col_1_val = str(row.get(desc_col, '')).strip() if not pd.isna(row.get(desc_col)) else ''
-
-            # Skip empty rows
-            if not col_0_val or col_0_val == 'nan':
-                continue
-
-            # Check if this row is a category header
-            if ('SERVICES' in col_0_val.upper() or
-                (col_0_val.isupper() and len(col_0_val.split()) > 1 and
-                 not re.match(r'^\d{5}$', col_0_val))):
-                current_category = col_0_val
-                continue
-
-            # Check if this is a CPT code (5 digits)
-            if re.match(r'^\d{5}$', col_0_val):
-                code = col_0_val
-                description = col_1_val if col_1_val and col_1_val != 'nan' else ''
-
-                # Skip if already processed
-                if code in processed_codes:
-                    continue
-                processed_codes.add(code)
-
-                # Determine category
-                category = determine_cpt_category(code, current_category)
-
-                # Clean for SQL
-                clean_desc = clean_text(description)
-                clean_cat = clean_text(category)
-
-                # Truncate to fit schema
-                short_desc = clean_desc[:100] if clean_desc else ''
-                long_desc = clean_desc[:1000] if clean_desc else ''
-                cat_limited = clean_cat[:50] if clean_cat else ''
-
-                values.append(f"""(
-    '{code}',
-    '{short_desc}',
-    '{long_desc}',
-    '{cat_limited}',
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    false,
-    false,
-    false,
-    false,
-    NULL,
-    false,
-    false,
-    0,
-    NULL,
-    true,
-    '2025-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+        records = cached_records(
+            cache, 'cpt', file_path, lambda: read_cpt_records(file_path, sheet_cache, metrics)
+        )
+        if records.empty:
             return None, 0
+        sql = render_records(
+            metrics, "-- CPT Code Master Data\n", CPT_CODE_MASTER, records, output, file_path,
+            update_source='AMA',
+        )
 
-        sql = f"""-- CPT Code Master Data
-INSERT INTO cpt_code_master (
-    cpt_code,
-    short_description,
-    long_description,
-    category,
-    section,
-    subsection,
-    rvu_work,
-    rvu_practice_expense,
-    rvu_malpractice,
-    rvu_total,
-    bilateral_surgery,
-    assistant_surgeon,
-    co_surgeon,
-    multiple_proc,
-    global_period,
-    prior_auth_commonly_required,
-    modifier_51_exempt,
-    usage_count,
-    last_used_date,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (cpt_code) DO UPDATE SET
-    short_description = EXCLUDED.short_description,
-    long_description = EXCLUDED.long_description,
-    updated_at = NOW();
-"""
-
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing CPT file: {e}")
         return None, 0
 
-def main():
+# Code sets in the order their SQL sections are written: (key, label)
+CODE_SETS = (
+    ('icd10', 'ICD-10'),
+    ('hcpcs', 'HCPCS'),
+    ('cpt', 'CPT'),
+)
+
+def process_code_set(
+    code_set, file_path, output, cache=None, sheet_cache=None, icd10_workers=1, metrics=None,
+    profiler=None, icd10_hierarchy=False,
+):
+    """Run one code set's processor; returns (sql, count, output, metrics)."""
+    metrics = metrics or ProcessorMetrics(code_set)
+    with profiled(profiler, code_set):
+        if code_set == 'icd10':
+            sql, count = process_icd10_txt_file(
+                file_path, icd10_workers, output, cache, metrics, icd10_hierarchy
+            )
+        elif code_set == 'hcpcs':
+            sql, count = process_hcpcs_file(file_path, output, cache, sheet_cache, metrics)
+        else:
+            sql, count = process_cpt_file(file_path, output, cache, sheet_cache, metrics)
+    return sql, count, output, metrics
+
+def process_code_sets(
+    files, output, cache=None, sheet_cache=None, icd10_workers=1, jobs=1, run_metrics=None,
+    profiler=None, icd10_hierarchy=False,
+):
+    """Process the given {code_set: file} and return {code_set: (sql, count)}.
+
+    With jobs != 1 (0 for one per code set) each code set runs in its own
+    worker process; a worker that dies is reported as (None, 0). The sidecar
+    tables written by the workers are merged into ``output`` in CODE_SETS
+    order, so the result does not depend on which worker finishes first.
+    The stage metrics of each code set are recorded in ``run_metrics``, and
+    each code set is profiled by ``profiler``, if given, in the process that
+    runs it.
+    """
+    if jobs < 0:
+        raise ValueError(f"jobs must be 0 or more, got {jobs}")
+    run_metrics = run_metrics or RunMetrics()
+    code_sets = [code_set for code_set, _ in CODE_SETS if code_set in files]
+    if jobs == 1 or len(code_sets) < 2:
+        return {
+            code_set: process_code_set(
+                code_set, files[code_set], output, cache, sheet_cache, icd10_workers,
+                run_metrics.processor(code_set), profiler, icd10_hierarchy,
+            )[:2]
+            for code_set in code_sets
+        }
+
+    results = {}
+    workers = min(jobs or len(code_sets), len(code_sets))
+    print(f"Processing {len(code_sets)} code sets in {workers} worker processes...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            code_set: executor.submit(
+                process_code_set,
+                code_set,
+                files[code_set],
+                output.fork(),
+                cache,
+                sheet_cache,
+                icd10_workers,
+                run_metrics.processor(code_set),
+                profiler,
+                icd10_hierarchy,
+            )
+            for code_set in code_sets
+        }
+        for code_set in code_sets:
+            try:
+                sql, count, worker_output, worker_metrics = futures[code_set].result()
+            except Exception as e:
+                print(f"Error processing {code_set} in a worker process: {e}")
+                sql, count, worker_output, worker_metrics = None, 0, None, None
+            if worker_output is not None:
+                output.join(worker_output)
+            if worker_metrics is not None:
+                run_metrics.join(worker_metrics)
+            results[code_set] = (sql, count)
+    return results
+
+def write_metrics(run_metrics, metrics_file):
+    """Write the run's stage metrics; a failure to do so does not fail the run."""
+    try:
+        path = run_metrics.write(metrics_file, Path(__file__).name)
+        print(f"📈 Stage metrics: {path}")
+    except OSError as e:
+        print(f"⚠ Could not write metrics file: {e}")
+
+def positive_int(value):
+    """argparse type for counts that must be 1 or more."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more, got {number}")
+    return number
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    # File paths - update these to match your downloaded files
+    parser = argparse.ArgumentParser(description="Generate medical code master data SQL.")
+    parser.add_argument(
+        '--icd10-file',
+        default="/Users/michaeldadi/Downloads/icd10orderfiles/icd10cm_order_2026.txt",
+    )
+    parser.add_argument(
+        '--hcpcs-file',
+        default="/Users/michaeldadi/Downloads/hcpc2025_oct_anweb_v4/HCPC2025_OCT_ANWEB_Transaction Report_v4.xlsx",
+    )
+    parser.add_argument(
+        '--cpt-file',
+        default="/Users/michaeldadi/Downloads/2025_dhs_code_list_addendum_11_26_2024-2/2025_DHS_Code_List_Addendum_11_26_2024.xlsx",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(Path(__file__).parent.parent / "populate_medical_codes_updated.sql"),
+        help="SQL file to write",
+    )
+    add_output_arguments(parser)
+    parser.add_argument(
+        '--cache-dir',
+        default=str(Path(__file__).parent / ".record-cache"),
+        help="directory for records and converted Excel sheets cached by source file hash",
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="always re-read and re-parse the source files",
+    )
+    parser.add_argument(
+        '--jobs',
+        type=non_negative_int,
+        default=1,
+        help="code sets processed at the same time in worker processes "
+        "(1 = one after another, 0 = one per code set)",
+    )
+    parser.add_argument(
+        '--icd10-workers',
+        type=positive_int,
+        default=1,
+        help="worker processes for parsing the ICD-10 order file (1 or more)",
+    )
+    parser.add_argument(
+        '--icd10-hierarchy',
+        action='store_true',
+        help="also write the ICD-10 code tree: icd10_code_hierarchy (parent, depth, path) "
+        "and icd10_code_closure, created if missing (SQL and sidecar only, not loaded "
+        "by --database-url)",
+    )
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to process all files."""
+    args = parse_args(argv)
+
     print("=" * 60)
     print("Updated Medical Code Processing Script")
     print("=" * 60)
     print()
 
-    # File paths - update these to match your downloaded files
-    icd10_file = "/Users/michaeldadi/Downloads/icd10orderfiles/icd10cm_order_2026.txt"
-    hcpcs_file = "/Users/michaeldadi/Downloads/hcpc2025_oct_anweb_v4/HCPC2025_OCT_ANWEB_Transaction Report_v4.xlsx"
-    cpt_file = "/Users/michaeldadi/Downloads/2025_dhs_code_list_addendum_11_26_2024-2/2025_DHS_Code_List_Addendum_11_26_2024.xlsx"
+    icd10_file = args.icd10_file
+    hcpcs_file = args.hcpcs_file
+    cpt_file = args.cpt_file
 
     # Output file
-    current_dir = Path(__file__).parent.parent
-    output_file = current_dir / "populate_medical_codes_updated.sql"
+    output_file = Path(args.output)
+    output = TableOutput.from_args(args)
+    cache = None if args.no_cache else RecordCache(args.cache_dir, PROCESSOR_VERSION)
+    sheet_cache = None if args.no_cache else SheetCache(Path(args.cache_dir) / 'sheets')
+    run_metrics = RunMetrics.from_args(args)
+    metrics_file = args.metrics_file or default_metrics_file(output_file)
+    profiler = Profiler.from_args(args)
 
     print(f"Output file: {output_file}")
     print()
@@ -487,57 +438,53 @@ def main():
     all_sql.append("-- Generated for current schema structure")
     all_sql.append("")
 
-    total_icd10 = 0
-    total_hcpcs = 0
-    total_cpt = 0
-
-    # Process ICD-10 codes
-    if Path(icd10_file).exists():
-        icd10_sql, icd10_count = process_icd10_txt_file(icd10_file)
-        if icd10_sql:
-            all_sql.append(icd10_sql)
-            all_sql.append("")
-            total_icd10 = icd10_count
-            print(f"✓ Processed {icd10_count} ICD-10 codes")
-        else:
-            print("✗ Failed to process ICD-10 file")
-    else:
-        print(f"⚠ ICD-10 file not found: {icd10_file}")
-
-    # Process HCPCS codes
-    if Path(hcpcs_file).exists():
-        hcpcs_sql, hcpcs_count = process_hcpcs_file(hcpcs_file)
-        if hcpcs_sql:
-            all_sql.append(hcpcs_sql)
-            all_sql.append("")
-            total_hcpcs = hcpcs_count
-            print(f"✓ Processed {hcpcs_count} HCPCS codes")
+    files = {'icd10': icd10_file, 'hcpcs': hcpcs_file, 'cpt': cpt_file}
+    found = {code_set: path for code_set, path in files.items() if Path(path).exists()}
+    results = process_code_sets(
+        found, output, cache, sheet_cache, args.icd10_workers, args.jobs, run_metrics, profiler,
+        args.icd10_hierarchy,
+    )
+
+    # Report and merge in a fixed order, whatever order the workers finished in
+    totals = {}
+    sections = []
+    for code_set, label in CODE_SETS:
+        if code_set not in found:
+            print(f"⚠ {label} file not found: {files[code_set]}")
+            continue
+        sql, count = results[code_set]
+        if sql:
+            sections.append((code_set, sql))
+            totals[code_set] = count
+            print(f"✓ Processed {count} {label} codes")
         else:
-            print("✗ Failed to process HCPCS file")
-    else:
-        print(f"⚠ HCPCS file not found: {hcpcs_file}")
-
-    # Process CPT codes
-    if Path(cpt_file).exists():
-        cpt_sql, cpt_count = process_cpt_file(cpt_file)
-        if cpt_sql:
-            all_sql.append(cpt_sql)
-            total_cpt = cpt_count
-            print(f"✓ Processed {cpt_count} CPT codes")
-        else:
-            print("✗ Failed to process CPT file")
-    else:
-        print(f"⚠ CPT file not found: {cpt_file}")
+            print(f"✗ Failed to process {label} file")
+
+    total_icd10 = totals.get('icd10', 0)
+    total_hcpcs = totals.get('hcpcs', 0)
+    total_cpt = totals.get('cpt', 0)
 
     if total_icd10 == 0 and total_hcpcs == 0 and total_cpt == 0:
         print("\n❌ No codes were processed. Please check your file paths and formats.")
+        write_metrics(run_metrics, metrics_file)
         return
 
     # Write to file
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(all_sql))
+            f.write('\n'.join(all_sql) + '\n')
+            for index, (code_set, sql) in enumerate(sections):
+                with run_metrics.processor(code_set).stage('write') as stage:
+                    text = sql if index == 0 else "\n\n" + sql
+                    f.write(text)
+                    stage.rows_in = stage.rows_out = totals[code_set]
+                    stage.bytes_out = len(text.encode('utf-8'))
         print(f"\n✅ SQL file generated: {output_file}")
+        # Promoting staged loads and writing the manifest belong to no single code set
+        with run_metrics.processor('output').stage('write'):
+            manifest = output.finish(Path(__file__).name)
+        if manifest is not None:
+            print(f"✅ Record files: {manifest.parent}")
         print(f"📊 Total ICD-10 codes: {total_icd10}")
         print(f"📊 Total HCPCS codes: {total_hcpcs}")
         print(f"📊 Total CPT codes: {total_cpt}")
@@ -546,8 +493,12 @@ def main():
         print("1. Review the generated SQL file")
         print("2. The HCPCS codes include a CREATE TABLE statement - you may need to add this to your schema")
         print("3. Run the SQL file against your database")
+    except LoadError as e:
+        print(f"❌ Error loading into the database: {e}")
     except Exception as e:
         print(f"❌ Error writing file: {e}")
 
+    write_metrics(run_metrics, metrics_file)
+
 if __name__ == "__main__":
     main()
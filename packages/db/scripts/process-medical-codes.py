@@ -4,100 +4,66 @@ Improved script to process XLSX files containing CPT and ICD-10 codes
 and generate SQL INSERT statements compatible with the current schema.
 """
 
+import argparse
+import itertools
 import pandas as pd
 import re
 import sys
 import uuid
 from pathlib import Path
 
+from medical_codes.classification import icd10_chapter, icd10_properties
+from medical_codes.cpt import transform_cpt_chunks
+from medical_codes.excel import Workbook
+from medical_codes.metrics import (
+    DROP_BLANK,
+    DROP_DUPLICATE,
+    DROP_FAILED_REGEX,
+    ProcessorMetrics,
+    RunMetrics,
+    add_metrics_arguments,
+    default_metrics_file,
+)
+from medical_codes.profiling import Profiler, add_profile_arguments, profiled
+from medical_codes.sheet_cache import SheetCache
+from medical_codes.sql import DEFAULT_BATCH_ROWS, render_insert_statements
+from medical_codes.tables import CPT_CODE_MASTER, ICD10_CODE_MASTER
+
+# This script's ICD-10 load predates the header flag and only refreshes the
+# descriptions of existing codes.
+ICD10_CODE_MASTER_2025 = ICD10_CODE_MASTER._replace(
+    update_columns=('short_description', 'long_description'),
+    constants={
+        **ICD10_CODE_MASTER.constants,
+        'is_header': False,
+        'effective_date': '2025-01-01',
+    },
+)
+
 def clean_text(text):
-    """Clean and sanitize text for SQL insertion."""
+    """Clean text for SQL insertion; quoting happens when the SQL is rendered."""
     if pd.isna(text):
         return None
     text = str(text).strip()
-    # Escape single quotes for SQL
-    text = text.replace("'", "''")
     # Limit length to prevent issues
     if len(text) > 1000:
         text = text[:1000]
     return text
 
-def determine_icd10_properties(code):
-    """Determine ICD-10 code properties based on structure."""
-    # Billable determination
-    is_billable = True
-    if len(code) == 3:  # Category codes like A01
-        is_billable = False
-    elif len(code) == 4 and code.endswith('9'):  # Unspecified codes like A019
-        is_billable = False
-    elif 'X' in code:  # Placeholder codes
-        is_billable = False
-
-    # 7th character requirement
-    requires_additional_digit = False
-    if code.startswith(('S', 'T')) and len(code) >= 6:
-        requires_additional_digit = True
-    elif code.startswith(('M80', 'M84', 'M48.4', 'M48.5')):
-        requires_additional_digit = True
-
-    return is_billable, requires_additional_digit
-
-def determine_icd10_chapter_info(code):
-    """Determine ICD-10 chapter and category information."""
-    chapter_mapping = {
-        'A': ('Infectious and parasitic diseases', 'A00-B99'),
-        'B': ('Infectious and parasitic diseases', 'A00-B99'),
-        'C': ('Neoplasms', 'C00-D49'),
-        'D': ('Diseases of blood and immune system', 'D50-D89'),
-        'E': ('Endocrine, nutritional and metabolic diseases', 'E00-E89'),
-        'F': ('Mental and behavioral disorders', 'F01-F99'),
-        'G': ('Diseases of the nervous system', 'G00-G99'),
-        'H': ('Diseases of eye/ear and adnexa', 'H00-H95'),
-        'I': ('Diseases of the circulatory system', 'I00-I99'),
-        'J': ('Diseases of the respiratory system', 'J00-J99'),
-        'K': ('Diseases of the digestive system', 'K00-K95'),
-        'L': ('Diseases of skin and subcutaneous tissue', 'L00-L99'),
-        'M': ('Diseases of musculoskeletal system', 'M00-M99'),
-        'N': ('Diseases of the genitourinary system', 'N00-N99'),
-        'O': ('Pregnancy, childbirth and the puerperium', 'O00-O9A'),
-        'P': ('Perinatal conditions', 'P00-P96'),
-        'Q': ('Congenital malformations', 'Q00-Q99'),
-        'R': ('Symptoms, signs and abnormal findings', 'R00-R99'),
-        'S': ('Injury, poisoning (by body region)', 'S00-T88'),
-        'T': ('Injury, poisoning (by type)', 'S00-T88'),
-        'V': ('External causes - transport accidents', 'V00-Y99'),
-        'W': ('External causes - other accidents', 'V00-Y99'),
-        'X': ('External causes - intentional self-harm', 'V00-Y99'),
-        'Y': ('External causes - assault, undetermined', 'V00-Y99'),
-        'Z': ('Factors influencing health status', 'Z00-Z99')
-    }
-
-    chapter_info = chapter_mapping.get(code[0], ('Other', 'Unknown'))
-    return chapter_info[0], chapter_info[1]
-
-def determine_cpt_category(code, current_category=''):
-    """Determine CPT category based on code range."""
-    try:
-        code_num = int(code)
-        if 99201 <= code_num <= 99499:
-            return 'Evaluation and Management'
-        elif 10021 <= code_num <= 69990:
-            return 'Surgery'
-        elif 70010 <= code_num <= 79999:
-            return 'Radiology'
-        elif 80047 <= code_num <= 89398:
-            return 'Pathology and Laboratory'
-        elif 90281 <= code_num <= 99199:
-            return 'Medicine'
-        elif 99500 <= code_num <= 99607:
-            return 'Home Health Procedures/Services'
-        else:
-            return current_category or 'Other'
-    except ValueError:
-        return current_category or 'Other'
-
-def process_icd10_file(file_path):
+def render_records(metrics, heading, spec, records, batch_rows, batch_bytes):
+    """Render a processor's records as INSERT statements, timed as its serialize stage."""
+    with metrics.stage('serialize') as stage:
+        stage.rows_in = len(records)
+        sql = heading + render_insert_statements(spec, records, batch_rows, batch_bytes)
+        stage.rows_out = len(records)
+        stage.bytes_out = len(sql.encode('utf-8'))
+    return sql
+
+def process_icd10_file(
+    file_path, batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=None, sheet_cache=None, metrics=None
+):
     """Process ICD-10 XLSX file and generate SQL INSERT statements."""
+    metrics = metrics or ProcessorMetrics('icd10')
     print(f"Processing ICD-10 file: {file_path}")
 
     if not Path(file_path).exists():
@@ -105,133 +71,104 @@ def process_icd10_file(file_path):
         return None, 0
 
     try:
-        # Read the Excel file
-        df = pd.read_excel(file_path)
-        print(f"Columns in ICD-10 file: {list(df.columns)}")
-        print(f"Shape: {df.shape}")
-
-        # Auto-detect column names
-        code_col = None
-        desc_col = None
-
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if 'code' in col_lower and code_col is None:
-                code_col = col
-            elif any(word in col_lower for word in ['description', 'desc']) and desc_col is None:
-                desc_col = col
-
-        if not code_col:
-            print("Could not find code column. Using first column.")
-            code_col = df.columns[0]
-
-        if not desc_col:
-            print("Could not find description column. Using second column.")
-            desc_col = df.columns[1] if len(df.columns) > 1 else code_col
-
-        print(f"Using code column: {code_col}")
-        print(f"Using description column: {desc_col}")
-
-        values = []
-        processed_codes = set()
-
-        for idx, row in df.iterrows():
-            if pd.isna(row.get(code_col)):
-                continue
-
-            code = clean_text(row[code_col])
-            description = clean_text(row.get(desc_col, '')) or ''
-
-            # Skip if we've already processed this code
-            if code in processed_codes:
-                continue
-            processed_codes.add(code)
-
-            # Validate ICD-10 format
-            if not re.match(r'^[A-Z]\d{2}', code):
-                continue
-
-            # Determine properties
-            is_billable, requires_additional_digit = determine_icd10_properties(code)
-            chapter, chapter_range = determine_icd10_chapter_info(code)
-
-            # Generate category (first 3 characters)
-            category = code[:3]
-
-            # Truncate descriptions to fit schema limits
-            short_desc = description[:100] if description else ''
-            long_desc = description[:1000] if description else ''
-
-            values.append(f"""(
-    '{code}',
-    '{short_desc}',
-    '{long_desc}',
-    '{chapter[:100]}',
-    '{chapter_range[:20]}',
-    NULL,
-    '{category[:50]}',
-    'diagnosis',
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    false,
-    false,
-    false,
-    {str(is_billable).lower()},
-    false,
-    {str(requires_additional_digit).lower()},
-    0,
-    NULL,
-    true,
-    '2025-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+        # Stream the sheet instead of loading the whole workbook
+        with Workbook(file_path, cache=sheet_cache) as book:
+            chunks = metrics.timed('read', book.iter_frames(0))
+            first_chunk = next(chunks)
+            print(f"Columns in ICD-10 file: {list(first_chunk.columns)}")
+
+            # Auto-detect column names
+            code_col = None
+            desc_col = None
+
+            for col in first_chunk.columns:
+                col_lower = str(col).lower()
+                if 'code' in col_lower and code_col is None:
+                    code_col = col
+                elif any(word in col_lower for word in ['description', 'desc']) and desc_col is None:
+                    desc_col = col
+
+            if not code_col:
+                print("Could not find code column. Using first column.")
+                code_col = first_chunk.columns[0]
+
+            if not desc_col:
+                print("Could not find description column. Using second column.")
+                desc_col = first_chunk.columns[1] if len(first_chunk.columns) > 1 else code_col
+
+            print(f"Using code column: {code_col}")
+            print(f"Using description column: {desc_col}")
+
+            records = []
+            processed_codes = set()
+            rows_read = 0
+
+            with metrics.stage('transform') as stage:
+                for chunk in itertools.chain([first_chunk], chunks):
+                    rows_read += len(chunk)
+                    for idx, row in chunk.iterrows():
+                        if pd.isna(row.get(code_col)):
+                            stage.drop(DROP_BLANK)
+                            continue
+
+                        code = clean_text(row[code_col])
+                        description = clean_text(row.get(desc_col, '')) or ''
+
+                        # Skip if we've already processed this code
+                        if code in processed_codes:
+                            stage.drop(DROP_DUPLICATE)
+                            continue
+                        processed_codes.add(code)
+
+                        # Validate ICD-10 format
+                        if not re.match(r'^[A-Z]\d{2}', code):
+                            stage.drop(DROP_FAILED_REGEX)
+                            continue
+
+                        # Determine properties
+                        is_billable, requires_additional_digit = icd10_properties(code)
+                        chapter, chapter_range = icd10_chapter(code)
+
+                        # Generate category (first 3 characters)
+                        category = code[:3]
+
+                        records.append((
+                            code,
+                            description[:100],
+                            description[:1000],
+                            chapter[:100],
+                            chapter_range[:20],
+                            category[:50],
+                            is_billable,
+                            requires_additional_digit,
+                        ))
+                stage.rows_in = rows_read
+                stage.rows_out = len(records)
+
+            print(f"Rows read: {rows_read}")
+
+        if not records:
             return None, 0
 
-        sql = f"""-- ICD-10 Code Master Data
-INSERT INTO icd10_code_master (
-    icd10_code,
-    short_description,
-    long_description,
-    chapter,
-    chapter_range,
-    section,
-    category,
-    code_type,
-    laterality,
-    encounter,
-    age_group,
-    gender,
-    reporting_required,
-    public_health_reporting,
-    manifestation_code,
-    is_billable,
-    is_header,
-    requires_additional_digit,
-    usage_count,
-    last_used_date,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (icd10_code) DO UPDATE SET
-    short_description = EXCLUDED.short_description,
-    long_description = EXCLUDED.long_description,
-    updated_at = NOW();
-"""
+        records = pd.DataFrame.from_records(
+            records, columns=ICD10_CODE_MASTER_2025.record_columns
+        )
+        sql = render_records(
+            metrics, "-- ICD-10 Code Master Data\n", ICD10_CODE_MASTER_2025, records,
+            batch_rows, batch_bytes,
+        )
 
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing ICD-10 file: {e}")
         return None, 0
 
-def process_cpt_file(file_path):
+def process_cpt_file(
+    file_path, batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=None, sheet_cache=None, metrics=None
+):
     """Process CPT XLSX file and generate SQL INSERT statements."""
+    metrics = metrics or ProcessorMetrics('cpt')
     print(f"Processing CPT file: {file_path}")
 
     if not Path(file_path).exists():
@@ -239,123 +176,82 @@ def process_cpt_file(file_path):
         return None, 0
 
     try:
-        df = pd.read_excel(file_path)
-        print(f"Columns in CPT file: {list(df.columns)}")
-        print(f"Shape: {df.shape}")
-
-        # Auto-detect columns
-        code_col = df.columns[0]  # First column usually contains codes
-        desc_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-
-        values = []
-        processed_codes = set()
-        current_category = ''
-
-        for idx, row in df.iterrows():
-            col_0_val = str(row.get(code_col, '')).strip()
-            col_1_val = str(row.get(desc_col, '')).strip() if not pd.isna(row.get(desc_col)) else ''
-
-            # Skip empty rows
-            if not col_0_val or col_0_val == 'nan':
-                continue
-
-            # Check if this row is a category header
-            if ('SERVICES' in col_0_val.upper() or
-                (col_0_val.isupper() and len(col_0_val.split()) > 1 and
-                 not re.match(r'^\d{5}$', col_0_val))):
-                current_category = col_0_val
-                continue
-
-            # Check if this is a CPT code (5 digits)
-            if re.match(r'^\d{5}$', col_0_val):
-                code = col_0_val
-                description = col_1_val if col_1_val and col_1_val != 'nan' else ''
-
-                # Skip if already processed
-                if code in processed_codes:
-                    continue
-                processed_codes.add(code)
-
-                # Determine category
-                category = determine_cpt_category(code, current_category)
-
-                # Clean for SQL
-                clean_desc = clean_text(description)
-                clean_cat = clean_text(category)
-
-                # Truncate to fit schema
-                short_desc = clean_desc[:100] if clean_desc else ''
-                long_desc = clean_desc[:1000] if clean_desc else ''
-                cat_limited = clean_cat[:50] if clean_cat else ''
-
-                values.append(f"""(
-    '{code}',
-    '{short_desc}',
-    '{long_desc}',
-    '{cat_limited}',
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    NULL,
-    false,
-    false,
-    false,
-    false,
-    NULL,
-    false,
-    false,
-    0,
-    NULL,
-    true,
-    '2025-01-01'::date,
-    NULL
-)""")
-
-        if not values:
+        with Workbook(file_path, cache=sheet_cache) as book:
+            # Only the code/header column and the description column are used
+            chunks = book.iter_frames(0, columns=[0, 1])
+            with metrics.stage('transform') as stage:
+                records = transform_cpt_chunks(metrics.timed('read', chunks), stage.dropped)
+                stage.rows_in = metrics.stage_metrics('read').rows_out
+                stage.rows_out = len(records)
+        if records.empty:
             return None, 0
 
-        sql = f"""-- CPT Code Master Data
-INSERT INTO cpt_code_master (
-    cpt_code,
-    short_description,
-    long_description,
-    category,
-    section,
-    subsection,
-    rvu_work,
-    rvu_practice_expense,
-    rvu_malpractice,
-    rvu_total,
-    bilateral_surgery,
-    assistant_surgeon,
-    co_surgeon,
-    multiple_proc,
-    global_period,
-    prior_auth_commonly_required,
-    modifier_51_exempt,
-    usage_count,
-    last_used_date,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (cpt_code) DO UPDATE SET
-    short_description = EXCLUDED.short_description,
-    long_description = EXCLUDED.long_description,
-    updated_at = NOW();
-"""
+        sql = render_records(
+            metrics, "-- CPT Code Master Data\n", CPT_CODE_MASTER, records, batch_rows,
+            batch_bytes,
+        )
 
-        return sql, len(values)
+        return sql, len(records)
 
     except Exception as e:
         print(f"Error processing CPT file: {e}")
         return None, 0
 
-def main():
+def write_metrics(run_metrics, metrics_file):
+    """Write the run's stage metrics; a failure to do so does not fail the run."""
+    try:
+        path = run_metrics.write(metrics_file, Path(__file__).name)
+        print(f"📈 Stage metrics: {path}")
+    except OSError as e:
+        print(f"⚠ Could not write metrics file: {e}")
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    # File paths - update these to match your downloaded files
+    parser = argparse.ArgumentParser(description="Generate medical code master data SQL.")
+    parser.add_argument(
+        '--icd10-file',
+        default="/Users/michaeldadi/Downloads/section111validicd10-jan2025_0.xlsx",
+    )
+    parser.add_argument(
+        '--cpt-file',
+        default="/Users/michaeldadi/Downloads/2025_dhs_code_list_addendum_11_26_2024-2/2025_DHS_Code_List_Addendum_11_26_2024.xlsx",
+    )
+    parser.add_argument(
+        '--output',
+        default=str(Path(__file__).parent.parent / "populate_medical_codes_schema_compatible.sql"),
+        help="SQL file to write",
+    )
+    parser.add_argument(
+        '--batch-rows',
+        type=int,
+        default=DEFAULT_BATCH_ROWS,
+        help="rows per INSERT statement (0 = no row limit)",
+    )
+    parser.add_argument(
+        '--batch-bytes',
+        type=int,
+        default=0,
+        help="approximate byte budget per INSERT statement (0 = no byte limit)",
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(Path(__file__).parent / ".record-cache"),
+        help="directory for converted Excel sheets cached by workbook hash",
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="always read the workbook itself",
+    )
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to process both files."""
+    args = parse_args(argv)
+
     # Generate a UUID for organization (user will need to replace this)
     org_id = str(uuid.uuid4())
 
@@ -368,13 +264,15 @@ def main():
     print("You'll need to replace this with your actual organization ID before running the SQL.")
     print()
 
-    # File paths - update these to match your downloaded files
-    icd10_file = "/Users/michaeldadi/Downloads/section111validicd10-jan2025_0.xlsx"
-    cpt_file = "/Users/michaeldadi/Downloads/2025_dhs_code_list_addendum_11_26_2024-2/2025_DHS_Code_List_Addendum_11_26_2024.xlsx"
+    icd10_file = args.icd10_file
+    cpt_file = args.cpt_file
 
     # Output file
-    current_dir = Path(__file__).parent.parent
-    output_file = current_dir / "populate_medical_codes_schema_compatible.sql"
+    output_file = Path(args.output)
+    sheet_cache = None if args.no_cache else SheetCache(Path(args.cache_dir) / 'sheets')
+    run_metrics = RunMetrics.from_args(args)
+    metrics_file = args.metrics_file or default_metrics_file(output_file)
+    profiler = Profiler.from_args(args)
 
     print(f"Output file: {output_file}")
     print()
@@ -393,7 +291,11 @@ def main():
 
     # Process ICD-10 codes
     if Path(icd10_file).exists():
-        icd10_sql, icd10_count = process_icd10_file(icd10_file)
+        with profiled(profiler, 'icd10'):
+            icd10_sql, icd10_count = process_icd10_file(
+                icd10_file, args.batch_rows, args.batch_bytes, sheet_cache,
+                run_metrics.processor('icd10'),
+            )
         if icd10_sql:
             all_sql.append(icd10_sql)
             all_sql.append("")
@@ -406,7 +308,11 @@ def main():
 
     # Process CPT codes
     if Path(cpt_file).exists():
-        cpt_sql, cpt_count = process_cpt_file(cpt_file)
+        with profiled(profiler, 'cpt'):
+            cpt_sql, cpt_count = process_cpt_file(
+                cpt_file, args.batch_rows, args.batch_bytes, sheet_cache,
+                run_metrics.processor('cpt'),
+            )
         if cpt_sql:
             all_sql.append(cpt_sql)
             total_cpt = cpt_count
@@ -418,12 +324,18 @@ def main():
 
     if total_icd10 == 0 and total_cpt == 0:
         print("\n❌ No codes were processed. Please check your file paths and formats.")
+        write_metrics(run_metrics, metrics_file)
         return
 
     # Write to file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(all_sql))
+        # The whole file is written at once, so the write stage is not per code set
+        with run_metrics.processor('output').stage('write') as stage:
+            text = '\n'.join(all_sql)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            stage.rows_in = stage.rows_out = total_icd10 + total_cpt
+            stage.bytes_out = len(text.encode('utf-8'))
         print(f"\n✅ SQL file generated: {output_file}")
         print(f"📊 Total ICD-10 codes: {total_icd10}")
         print(f"📊 Total CPT codes: {total_cpt}")
@@ -435,5 +347,7 @@ def main():
     except Exception as e:
         print(f"❌ Error writing file: {e}")
 
+    write_metrics(run_metrics, metrics_file)
+
 if __name__ == "__main__":
     main()
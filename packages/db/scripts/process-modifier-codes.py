@@ -4,16 +4,28 @@ Script to generate comprehensive modifier codes dataset with telehealth focus
 and create SQL INSERT statements for the modifier_code table.
 """
 
+import argparse
+import pandas as pd
 import uuid
 from pathlib import Path
 
+from medical_codes.loader import LoadError
+from medical_codes.metrics import (
+    ProcessorMetrics,
+    RunMetrics,
+    add_metrics_arguments,
+    default_metrics_file,
+)
+from medical_codes.modifiers import ModifierCatalog
+from medical_codes.output import TableOutput, add_output_arguments
+from medical_codes.profiling import Profiler, add_profile_arguments, profiled
+from medical_codes.tables import MODIFIER_CODE
+
 def clean_text(text):
-    """Clean and sanitize text for SQL insertion."""
+    """Clean text for SQL insertion; quoting happens when the SQL is rendered."""
     if not text:
         return ''
     text = str(text).strip()
-    # Escape single quotes for SQL
-    text = text.replace("'", "''")
     return text
 
 def get_comprehensive_modifier_codes():
@@ -1153,100 +1165,130 @@ def get_comprehensive_modifier_codes():
 
     return modifiers
 
-def generate_modifier_codes_sql():
-    """Generate SQL INSERT statements for modifier codes."""
-    modifiers = get_comprehensive_modifier_codes()
+def modifier_code_records(metrics=None):
+    """The modifier catalog as modifier_code records."""
+    metrics = metrics or ProcessorMetrics('modifiers')
+    with metrics.stage('read') as stage:
+        modifiers = get_comprehensive_modifier_codes()
+        stage.rows_out = len(modifiers)
 
-    values = []
-    for modifier in modifiers:
-        code = clean_text(modifier['code'])
-        description = clean_text(modifier['description'])
-        short_desc = clean_text(modifier['short_description'])
-        category = clean_text(modifier['category'])
-        mod_type = clean_text(modifier['type'])
-        level_i = modifier['level_i']
-        level_ii = modifier['level_ii']
+    with metrics.stage('transform') as stage:
+        stage.rows_in = len(modifiers)
+        records = pd.DataFrame.from_records(
+            [
+                (
+                    clean_text(modifier['code']),
+                    clean_text(modifier['description']),
+                    clean_text(modifier['short_description']),
+                    clean_text(modifier['category']),
+                    clean_text(modifier['type']),
+                    modifier['level_i'],
+                    modifier['level_ii'],
+                )
+                for modifier in modifiers
+            ],
+            columns=MODIFIER_CODE.record_columns,
+        )
+        stage.rows_out = len(records)
+    return records
 
-        values.append(f"""(
-    '{code}',
-    '{description}',
-    '{short_desc}',
-    '{category}',
-    '{mod_type}',
-    '{level_i}',
-    '{level_ii}',
-    true,
-    '2025-01-01'::date,
-    NULL
-)""")
+def generate_modifier_codes_sql(output=None, records=None, metrics=None):
+    """Generate SQL INSERT statements for modifier codes."""
+    output = output or TableOutput()
+    metrics = metrics or ProcessorMetrics('modifiers')
+    if records is None:
+        records = modifier_code_records(metrics)
 
-    sql = f"""-- Modifier Code Data
-INSERT INTO modifier_code (
-    modifier_code,
-    description,
-    short_description,
-    category,
-    type,
-    level_i_indicator,
-    level_ii_indicator,
-    is_active,
-    effective_date,
-    termination_date
-) VALUES
-{','.join(values)}
-ON CONFLICT (modifier_code) DO UPDATE SET
-    description = EXCLUDED.description,
-    short_description = EXCLUDED.short_description,
-    category = EXCLUDED.category,
-    type = EXCLUDED.type,
-    level_i_indicator = EXCLUDED.level_i_indicator,
-    level_ii_indicator = EXCLUDED.level_ii_indicator,
-    updated_at = NOW();
-"""
+    with metrics.stage('serialize') as stage:
+        stage.rows_in = len(records)
+        sql = "-- Modifier Code Data\n" + output.render(
+            MODIFIER_CODE, records, update_source='Manual'
+        )
+        stage.rows_out = len(records)
+        stage.bytes_out = len(sql.encode('utf-8'))
+
+    return sql, len(records)
 
-    return sql, len(values)
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate modifier code SQL.")
+    parser.add_argument(
+        '--output',
+        default=str(Path(__file__).parent.parent / "populate_modifier_codes.sql"),
+        help="SQL file to write",
+    )
+    add_output_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main function to generate modifier codes."""
+    args = parse_args(argv)
+
     print("=" * 60)
     print("Modifier Code Processing Script")
     print("=" * 60)
     print()
 
     # Output file
-    current_dir = Path(__file__).parent.parent
-    output_file = current_dir / "populate_modifier_codes.sql"
+    output_file = Path(args.output)
+    output = TableOutput.from_args(args)
+    run_metrics = RunMetrics.from_args(args)
+    metrics = run_metrics.processor('modifiers')
+    profiler = Profiler.from_args(args)
 
     print(f"Output file: {output_file}")
     print()
 
     # Generate modifier codes SQL
-    modifier_sql, count = generate_modifier_codes_sql()
+    with profiled(profiler, 'modifiers'):
+        records = modifier_code_records(metrics)
+        modifier_sql, count = generate_modifier_codes_sql(output, records, metrics)
+        with metrics.stage('transform'):
+            catalog = ModifierCatalog.from_records(records)
 
     # Write to file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("-- Modifier Code Data Population\n")
-            f.write("-- Generated for modifier_code table\n")
-            f.write("-- Heavy focus on telehealth and comprehensive coverage\n\n")
-            f.write(modifier_sql)
+        with metrics.stage('write') as stage:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write("-- Modifier Code Data Population\n")
+                f.write("-- Generated for modifier_code table\n")
+                f.write("-- Heavy focus on telehealth and comprehensive coverage\n\n")
+                f.write(modifier_sql)
+            stage.rows_in = stage.rows_out = count
+            stage.bytes_out = output_file.stat().st_size
 
         print(f"\n✅ SQL file generated: {output_file}")
+        with metrics.stage('write'):
+            manifest = output.finish(Path(__file__).name)
+        if manifest is not None:
+            print(f"✅ Record files: {manifest.parent}")
         print(f"📊 Total modifier codes: {count}")
         print()
         print("Categories included:")
-        modifiers = get_comprehensive_modifier_codes()
-        categories = set(m['category'] for m in modifiers)
-        for category in sorted(categories):
-            count_in_cat = len([m for m in modifiers if m['category'] == category])
+        for category, count_in_cat in catalog.category_counts().items():
             print(f"  - {category}: {count_in_cat} codes")
         print()
+        print("Mutually exclusive modifiers:")
+        for name, mask in catalog.groups:
+            print(f"  - {name}: {', '.join(catalog.codes_of(mask))}")
+        print()
         print("Next steps:")
         print("1. Review the generated SQL file")
         print("2. Run: cd packages/db && yarn populate-modifier-codes")
         print("   or execute the SQL file directly against your database")
+    except LoadError as e:
+        print(f"❌ Error loading into the database: {e}")
     except Exception as e:
         print(f"❌ Error writing file: {e}")
 
+    metrics_file = args.metrics_file or default_metrics_file(output_file)
+    try:
+        path = run_metrics.write(metrics_file, Path(__file__).name)
+        print(f"📈 Stage metrics: {path}")
+    except OSError as e:
+        print(f"⚠ Could not write metrics file: {e}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+import pandas as pd
+
+from medical_codes.delta import diff_records, history_rows, render_delta_sql, render_terminations
+from medical_codes.sql import render_insert_statements
+from medical_codes.tables import HCPCS_CODE_MASTER, ICD10_CODE_MASTER
+
+
+def icd10_records(descriptions):
+    codes = list(descriptions)
+    return pd.DataFrame({
+        'icd10_code': codes,
+        'short_description': [descriptions[code] for code in codes],
+        'long_description': [descriptions[code] for code in codes],
+        'chapter': 'Infectious and parasitic diseases',
+        'chapter_range': 'A00-B99',
+        'category': [code[:3] for code in codes],
+        'is_billable': True,
+        'is_header': False,
+        'requires_additional_digit': False,
+    })
+
+
+def hcpcs_records(action_codes):
+    codes = list(action_codes)
+    return pd.DataFrame({
+        'hcpcs_code': codes,
+        'short_description': [f"Code {code}" for code in codes],
+        'long_description': [f"Code {code}" for code in codes],
+        'category': 'Transportation Services, Medical and Surgical Supplies',
+        'action_code': [action_codes[code] for code in codes],
+        'is_active': [action_codes[code] != 'D' for code in codes],
+    })
+
+
+def test_inserts_changes_and_terminations():
+    previous = icd10_records({'A000': 'Cholera', 'A001': 'Cholera, eltor', 'A009': 'Old'})
+    current = icd10_records({'A000': 'Cholera', 'A001': 'Cholera due to eltor', 'A010': 'New'})
+
+    delta = diff_records(ICD10_CODE_MASTER, previous, current, terminate_missing=True)
+
+    assert delta.inserts['icd10_code'].tolist() == ['A010']
+    assert delta.changes['icd10_code'].tolist() == ['A001']
+    assert delta.previous_values['short_description'].tolist() == ['Cholera, eltor']
+    changed = delta.changed_columns.iloc[0]
+    assert sorted(changed[changed].index) == ['long_description', 'short_description']
+    assert delta.terminations['icd10_code'].tolist() == ['A009']
+
+    assert render_terminations(ICD10_CODE_MASTER, delta.terminations, '2026-10-01') == (
+        "UPDATE icd10_code_master SET\n"
+        "    is_active = false,\n"
+        "    termination_date = '2026-10-01'::date,\n"
+        "    updated_at = NOW()\n"
+        "WHERE icd10_code IN (\n    'A009'\n);\n"
+    )
+
+    history = history_rows(ICD10_CODE_MASTER, delta)
+    assert history[['code_value', 'field_changed', 'change_type']].values.tolist() == [
+        ['A010', None, 'INSERT'],
+        ['A001', 'short_description', 'UPDATE'],
+        ['A001', 'long_description', 'UPDATE'],
+        ['A009', 'is_active', 'DELETE'],
+    ]
+
+
+def test_partial_sources_do_not_terminate_missing_codes():
+    previous = hcpcs_records({'A0021': 'N', 'A0080': 'N'})
+    current = hcpcs_records({'A0021': 'N'})
+
+    delta = diff_records(HCPCS_CODE_MASTER, previous, current)
+
+    assert delta.is_empty
+    sql = render_delta_sql(HCPCS_CODE_MASTER, delta, render_insert_statements, len(current))
+    assert 'UPDATE hcpcs_code_master' not in sql
+
+
+def test_inactive_codes_in_both_releases_are_unchanged():
+    previous = hcpcs_records({'A0021': 'N', 'A0080': 'D'})
+    current = hcpcs_records({'A0021': 'N', 'A0080': 'D'})
+
+    delta = diff_records(HCPCS_CODE_MASTER, previous, current, terminate_missing=True)
+
+    assert delta.is_empty
+    assert history_rows(HCPCS_CODE_MASTER, delta).empty
+
+
+def test_discontinued_codes_are_changes_and_not_terminated_again():
+    previous = hcpcs_records({'A0021': 'N', 'A0080': 'D'})
+    current = hcpcs_records({'A0021': 'D'})
+
+    delta = diff_records(HCPCS_CODE_MASTER, previous, current, terminate_missing=True)
+
+    assert delta.inserts.empty
+    assert delta.changes['hcpcs_code'].tolist() == ['A0021']
+    changed = delta.changed_columns.iloc[0]
+    assert sorted(changed[changed].index) == ['action_code', 'is_active']
+    assert delta.terminations.empty
+
+
+def test_retired_code_is_reinstated():
+    first = icd10_records({'A000': 'Cholera', 'A001': 'Cholera, eltor'})
+    second = icd10_records({'A000': 'Cholera'})
+    third = icd10_records({'A000': 'Cholera (renamed)', 'A001': 'Cholera, eltor'})
+
+    retired = diff_records(ICD10_CODE_MASTER, first, second, terminate_missing=True)
+    assert retired.terminations['icd10_code'].tolist() == ['A001']
+
+    delta = diff_records(ICD10_CODE_MASTER, second, third, terminate_missing=True)
+    assert delta.inserts['icd10_code'].tolist() == ['A001']
+    assert delta.changes['icd10_code'].tolist() == ['A000']
+
+    sql = render_delta_sql(ICD10_CODE_MASTER, delta, render_insert_statements, len(third))
+    insert, change = sql.split('INSERT INTO icd10_code_master')[1:3]
+    assert "'A001'" in insert and "'A000'" in change
+    # The re-listed code's upsert clears its retirement; a plain change does not touch it
+    assert 'is_active = EXCLUDED.is_active' in insert
+    assert 'termination_date = EXCLUDED.termination_date' in insert
+    assert 'is_active = EXCLUDED.is_active' not in change
+    assert 'termination_date = EXCLUDED.termination_date' not in change
+    assert 'UPDATE icd10_code_master' not in sql
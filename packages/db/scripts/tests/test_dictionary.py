@@ -0,0 +1,82 @@
+import datetime
+
+import pandas as pd
+
+from medical_codes.dictionary import (
+    NOT_FOUND,
+    CodeDictionary,
+    CodeEntry,
+    dictionary_frame,
+    read_dictionary_records,
+    write_code_dictionary,
+)
+from medical_codes.sidecar import SidecarWriter
+from medical_codes.tables import HCPCS_CODE_MASTER, ICD10_CODE_MASTER
+
+
+def write_records(directory):
+    writer = SidecarWriter(directory)
+    writer.write(ICD10_CODE_MASTER, pd.DataFrame({
+        'icd10_code': ['E11', 'E119', 'I10', 'S72001A'],
+        'short_description': '',
+        'long_description': '',
+        'chapter': '',
+        'chapter_range': '',
+        'category': ['E11', 'E11', 'I10', 'S72'],
+        'is_billable': [False, False, False, True],
+        'is_header': [True, False, False, False],
+        'requires_additional_digit': [False, False, False, True],
+    }))
+    writer.write(HCPCS_CODE_MASTER, pd.DataFrame({
+        'hcpcs_code': ['A0021', 'G0008', 'E1100'],
+        'short_description': '',
+        'long_description': '',
+        'category': 'Temporary Codes',
+        'action_code': ['N', 'N', 'D'],
+        'is_active': [True, True, False],
+    }))
+    writer.write_manifest('test')
+
+
+def test_dictionary_round_trip(tmp_path):
+    write_records(tmp_path)
+    path = write_code_dictionary(read_dictionary_records(tmp_path), tmp_path / 'codes.bin')
+
+    with CodeDictionary(path) as dictionary:
+        assert len(dictionary) == 7
+        assert dictionary.code_set_counts() == {'ICD10': 4, 'CPT': 0, 'HCPCS': 3, 'MODIFIER': 0}
+        # Keys are sorted for the binary search
+        assert dictionary.keys.tolist() == sorted(dictionary.keys.tolist())
+
+        assert dictionary.lookup('e11.9') == CodeEntry(
+            'E119', 'ICD10', True, False, True, False, None, None, 'E11',
+        )
+        # Billable follows the order file's header flag; table-wide dates are not kept
+        assert dictionary.lookup('E11').is_billable is False
+        assert dictionary.lookup('S72.001A', 'ICD10').requires_additional_digit
+        assert dictionary.lookup('E1100').is_active is False
+        assert dictionary.lookup('A0021', 'ICD10') is None
+        assert dictionary.lookup('Z999') is None
+
+        positions = dictionary.find_many(['I10', 'G0008', 'Z999', 'E1190000000'], 'ICD10')
+        assert positions[0] == dictionary.find('I10', 'ICD10')
+        assert positions[1:].tolist() == [NOT_FOUND] * 3
+        assert dictionary.find_many(['G0008'], 'HCPCS')[0] != NOT_FOUND
+
+
+def test_dates_and_repeated_codes(tmp_path):
+    records = pd.DataFrame({
+        'hcpcs_code': ['J1100', 'J1100', 'Q0091'],
+        'effective_date': ['2024-01-01', '2025-01-01', None],
+        'termination_date': [None, '2025-12-31', None],
+        'category': 'Drugs Administered Other Than Oral Method',
+    })
+    path = write_code_dictionary(dictionary_frame(records, 'hcpcs_code', 'HCPCS'), tmp_path / 'd')
+
+    with CodeDictionary(path) as dictionary:
+        assert len(dictionary) == 2
+        # The last row of a repeated code wins
+        entry = dictionary.lookup('J1100', 'HCPCS')
+        assert entry.effective_date == datetime.date(2025, 1, 1)
+        assert entry.termination_date == datetime.date(2025, 12, 31)
+        assert dictionary.lookup('Q0091').effective_date is None
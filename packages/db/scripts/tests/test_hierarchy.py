@@ -0,0 +1,35 @@
+import pandas as pd
+
+from medical_codes.hierarchy import build_icd10_hierarchy
+from medical_codes.sidecar import SidecarWriter, read_table_records
+from medical_codes.tables import ICD10_CODE_CLOSURE, ICD10_CODE_HIERARCHY
+
+# Order file order, except that E119 comes before its sibling E111
+CODES = ['E10', 'E109', 'E11', 'E119', 'E111', 'E1110', 'E1111', 'I10']
+
+
+def test_closure_round_trip(tmp_path):
+    hierarchy = build_icd10_hierarchy(CODES)
+
+    writer = SidecarWriter(tmp_path)
+    writer.write(ICD10_CODE_HIERARCHY, hierarchy.nodes)
+    writer.write(ICD10_CODE_CLOSURE, hierarchy.closure)
+    writer.write_manifest('test')
+    nodes = read_table_records(tmp_path, 'icd10_code_hierarchy').set_index('icd10_code')
+    closure = read_table_records(tmp_path, 'icd10_code_closure')
+
+    assert nodes.loc['E1111', ['parent_code', 'depth', 'path']].tolist() == [
+        'E111', 2, 'E11/E111/E1111',
+    ]
+    assert pd.isna(nodes.loc['E11', 'parent_code'])
+    assert nodes.loc['I10', 'depth'] == 0
+
+    # Every code under E11, itself included, without a prefix scan
+    under = closure[closure['ancestor_code'] == 'E11']
+    assert sorted(zip(under['descendant_code'], under['distance'])) == [
+        ('E11', 0), ('E111', 1), ('E1110', 2), ('E1111', 2), ('E119', 1),
+    ]
+    # Ancestors of a leaf, nearest first
+    above = closure[closure['descendant_code'] == 'E1110'].sort_values('distance')
+    assert above['ancestor_code'].tolist() == ['E1110', 'E111', 'E11']
+    assert len(closure) == len(CODES) + sum(nodes['depth'])
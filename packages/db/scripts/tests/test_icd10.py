@@ -0,0 +1,76 @@
+from medical_codes.icd10 import (
+    ICD10OrderRecord,
+    icd10_order_frame,
+    iter_icd10_order_records,
+    iter_unique_transformed_records,
+    parse_icd10_order_file,
+    transform_icd10_order_file_parallel,
+)
+
+
+def order_line(number, code, flag, short, long=''):
+    return f"{number:05d} {code:<7} {flag} {short:<60} {long}".rstrip() + '\n'
+
+
+def record_code(record):
+    return (record.order_number, record.code)
+
+
+LINES = [
+    order_line(1, 'A00', '0', 'Cholera', 'Cholera'),
+    order_line(2, 'A000', '1', 'Cholera due to Vibrio cholerae 01, biovar cholerae',
+               'Cholera due to Vibrio cholerae 01, biovar cholerae'),
+    '\n',
+    'short line\n',
+    order_line(3, 'A001', '1', 'Cholera due to Vibrio cholerae 01, biovar eltor'),
+    'notanumber A002    1 Not a record\n',
+    order_line(4, 'A009', '1', 'Cholera, unspecified', 'Cholera, unspecified'),
+]
+
+
+def test_parses_fixed_width_columns():
+    records = list(iter_icd10_order_records(LINES))
+
+    assert records == [
+        ICD10OrderRecord(1, 'A00', True, 'Cholera', 'Cholera'),
+        # Multi-word short descriptions are kept whole
+        ICD10OrderRecord(
+            2, 'A000', False,
+            'Cholera due to Vibrio cholerae 01, biovar cholerae',
+            'Cholera due to Vibrio cholerae 01, biovar cholerae',
+        ),
+        # An empty long description falls back to the short one
+        ICD10OrderRecord(
+            3, 'A001', False,
+            'Cholera due to Vibrio cholerae 01, biovar eltor',
+            'Cholera due to Vibrio cholerae 01, biovar eltor',
+        ),
+        ICD10OrderRecord(4, 'A009', False, 'Cholera, unspecified', 'Cholera, unspecified'),
+    ]
+
+
+def test_order_frame_matches_record_parser():
+    frame = icd10_order_frame(LINES)
+
+    assert list(frame.itertuples(index=False, name=None)) == [
+        tuple(record) for record in iter_icd10_order_records(LINES)
+    ]
+
+
+def test_parallel_parse_matches_serial_parse(tmp_path):
+    lines = [
+        order_line(number, f"B{number % 40:02d}{number % 7}", '1', f"Description {number}")
+        for number in range(1, 400)
+    ]
+    path = tmp_path / 'icd10cm_order.txt'
+    path.write_text(''.join(lines), encoding='utf-8')
+
+    serial = [
+        result
+        for _, result in iter_unique_transformed_records(parse_icd10_order_file(path), record_code)
+    ]
+    parallel = transform_icd10_order_file_parallel(path, record_code, workers=4)
+
+    # Codes repeat across the worker ranges; each keeps its first occurrence
+    assert len(serial) == 280
+    assert parallel == serial
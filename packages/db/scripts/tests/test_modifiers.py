@@ -0,0 +1,76 @@
+import pandas as pd
+
+from medical_codes.modifiers import DUPLICATE_GROUP, ModifierCatalog
+from medical_codes.sidecar import SidecarWriter, read_table_records
+from medical_codes.tables import MODIFIER_CODE
+
+MODIFIERS = [
+    ('95', 'Telehealth', 'Level I'),
+    ('GT', 'Telehealth', 'Level II'),
+    ('93', 'Telehealth', 'Level I'),
+    ('LT', 'Anatomical', 'Level II'),
+    ('RT', 'Anatomical', 'Level II'),
+    ('50', 'Anatomical', 'Level I'),
+    ('25', 'Evaluation and Management', 'Level I'),
+    ('59', 'Distinct Procedural Service', 'Level I'),
+    ('XS', 'Distinct Procedural Service', 'Level II'),
+]
+
+
+def load_catalog(directory):
+    writer = SidecarWriter(directory)
+    writer.write(MODIFIER_CODE, pd.DataFrame({
+        'modifier_code': [code for code, _, _ in MODIFIERS],
+        'description': '',
+        'short_description': '',
+        'category': [category for _, category, _ in MODIFIERS],
+        'type': [type_ for _, _, type_ in MODIFIERS],
+        'level_i_indicator': None,
+        'level_ii_indicator': None,
+    }))
+    writer.write_manifest('test')
+    return ModifierCatalog.from_records(read_table_records(directory, 'modifier_code'))
+
+
+def test_modifier_conflicts_round_trip(tmp_path):
+    catalog = load_catalog(tmp_path)
+
+    assert len(catalog) == len(MODIFIERS)
+    assert catalog.codes[:3] == ('25', '50', '59')
+    assert catalog.codes_of(catalog.with_category('Telehealth')) == ['93', '95', 'GT']
+    assert catalog.codes_of(catalog.with_type('Level II')) == ['GT', 'LT', 'RT', 'XS']
+    assert catalog.category_counts()['Anatomical'] == 3
+    # Groups with fewer than two modifiers in the catalog are dropped
+    assert [name for name, _ in catalog.groups] == [
+        'telehealth_modality', 'laterality', 'distinct_service',
+    ]
+
+    assert catalog.is_valid_combination(['25', 'lt', 'XS', 'ZZ'])
+    assert not catalog.is_valid_combination(['95', 'GT'])
+    assert not catalog.is_valid_combination(['LT', '50'])
+    assert not catalog.is_valid_combination(['25', '25'])
+    assert catalog.violated_groups(['95', '93', 'LT', 'RT', 'LT']) == [
+        DUPLICATE_GROUP, 'telehealth_modality', 'laterality',
+    ]
+
+
+def test_invalid_lines_matches_line_checks(tmp_path):
+    catalog = load_catalog(tmp_path)
+    lines = [
+        ('25', 'LT'),
+        ('95', 'GT'),
+        ('59', None),
+        ('XS', '59'),
+        ('ZZ', 'ZZ'),
+        ('rt', 'RT'),
+        (None, None),
+    ]
+    first = pd.Series([line[0] for line in lines], dtype=object)
+    second = pd.Series([line[1] for line in lines], dtype=object)
+
+    invalid = catalog.invalid_lines([first, second])
+
+    assert invalid.tolist() == [
+        not catalog.is_valid_combination([code for code in line if code]) for line in lines
+    ]
+    assert invalid.tolist() == [False, True, False, True, False, True, False]
@@ -0,0 +1,59 @@
+import numpy as np
+
+from medical_codes.search import (
+    DescriptionIndex,
+    PostingTable,
+    decode_varints,
+    encode_varints,
+)
+
+CODES = ['E119', 'E1140', 'I10', '99213', 'A0021']
+CODE_SETS = ['ICD10', 'ICD10', 'ICD10', 'CPT', 'HCPCS']
+SHORT = [
+    'Type 2 diabetes mellitus without complications',
+    'Type 2 diabetes mellitus with diabetic neuropathy, unsp',
+    'Essential (primary) hypertension',
+    'Office visit, established patient',
+    'Ambulance service, outside state per mile',
+]
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 16383, 16384, 2 ** 35 + 5], dtype=np.int64)
+    encoded = encode_varints(values)
+
+    assert len(encoded) == 1 + 1 + 1 + 2 + 2 + 2 + 3 + 6
+    assert decode_varints(encoded).tolist() == values.tolist()
+
+
+def test_posting_lists_are_gap_encoded():
+    documents = np.array([3, 0, 300, 3, 1, 300])
+    term_ids = np.array([0, 0, 0, 0, 1, 1])
+    table = PostingTable.build(documents, term_ids, np.array(['diabetes', 'type'], dtype=object))
+
+    assert table.postings(table.position('diabetes')).tolist() == [0, 3, 300]
+    assert table.postings(table.position('type')).tolist() == [1, 300]
+    assert table.counts.tolist() == [3, 2]
+    # Gaps 0, 3 and 297 (two bytes), then 1 and 299 (two bytes)
+    assert len(table.data) == 1 + 1 + 2 + 1 + 2
+
+
+def test_index_npz_round_trip(tmp_path):
+    built = DescriptionIndex.build(CODES, CODE_SETS, SHORT, [''] * len(CODES))
+    path = built.save(tmp_path / 'description_index.npz')
+    index = DescriptionIndex.load(path)
+
+    assert len(index) == len(CODES)
+    for name in ('words', 'trigrams'):
+        saved, loaded = getattr(built, name), getattr(index, name)
+        assert loaded.terms.tolist() == saved.terms.tolist()
+        assert np.array_equal(loaded.data, saved.data)
+    assert np.array_equal(index.scores('diabetic neuropathy'), built.scores('diabetic neuropathy'))
+
+    assert [hit.code for hit in index.search('diabetes')] == ['E119', 'E1140']
+    assert index.search('hypertension')[0].description == 'Essential (primary) hypertension'
+    # Misspelled and partial words match through the trigrams
+    assert index.search('hypertenson')[0].code == 'I10'
+    assert index.search('neuropath', limit=1)[0].code == 'E1140'
+    assert [hit.code_set for hit in index.search('service visit', code_sets=['CPT'])] == ['CPT']
+    assert index.search('xyzzy') == []
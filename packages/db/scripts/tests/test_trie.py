@@ -0,0 +1,63 @@
+import pandas as pd
+
+from medical_codes.sidecar import SidecarWriter
+from medical_codes.tables import CPT_CODE_MASTER, ICD10_CODE_MASTER
+from medical_codes.trie import CodeTrie, Completion, read_trie_entries, write_code_trie
+
+
+def write_records(directory):
+    writer = SidecarWriter(directory)
+    writer.write(ICD10_CODE_MASTER, pd.DataFrame({
+        'icd10_code': ['E11', 'E119', 'E1165', 'E10', 'I10'],
+        'short_description': ['Type 2 diabetes', 'T2DM w/o comp', 'T2DM w hyprgly', 'T1DM', 'HTN'],
+        'long_description': '',
+        'chapter': '',
+        'chapter_range': '',
+        'category': '',
+        'is_billable': True,
+        'is_header': False,
+        'requires_additional_digit': False,
+    }))
+    writer.write(CPT_CODE_MASTER, pd.DataFrame({
+        'cpt_code': ['99213', '99214'],
+        'short_description': ['Office visit, low', 'Office visit, moderate'],
+        'long_description': '',
+        'category': 'Evaluation and Management',
+        'section': None,
+        'subsection': None,
+    }))
+    writer.write_manifest('test')
+
+
+def test_trie_round_trip(tmp_path):
+    write_records(tmp_path)
+    entries = read_trie_entries(tmp_path, weights={'E119': 5.0, '99214': 1.0})
+    skipped = []
+    path = write_code_trie(entries, tmp_path / 'code_trie.bin', top_k=3, skipped=skipped)
+
+    with CodeTrie(path) as trie:
+        assert len(trie) == 7
+        assert trie.edge_start[-1] == len(trie.edge_label) == len(trie.edge_target)
+        # Weighted codes first, then shorter codes, then in code order
+        assert [completion.code for completion in trie.complete('e11')] == [
+            'E119', 'E11', 'E1165',
+        ]
+        assert trie.complete('E11.6') == [Completion('E1165', 'ICD10', 'T2DM w hyprgly')]
+        assert [completion.code for completion in trie.complete('9921')] == ['99214', '99213']
+        assert len(trie.complete('')) == 3
+        assert trie.complete('E11', limit=1) == [Completion('E119', 'ICD10', 'T2DM w/o comp')]
+        assert trie.complete('E12') == []
+        assert trie.complete('É') == []
+    assert skipped == []
+
+
+def test_non_ascii_codes_are_skipped(tmp_path):
+    write_records(tmp_path)
+    entries = read_trie_entries(tmp_path)
+    entries.append(entries[0]._replace(code='É11'))
+    skipped = []
+    path = write_code_trie(entries, tmp_path / 'code_trie.bin', skipped=skipped)
+
+    assert [entry.code for entry in skipped] == ['É11']
+    with CodeTrie(path) as trie:
+        assert len(trie) == 7
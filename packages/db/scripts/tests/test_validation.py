@@ -0,0 +1,56 @@
+import pandas as pd
+
+from medical_codes.classification import icd10_properties
+from medical_codes.dictionary import (
+    PLACEHOLDER_COLUMNS,
+    CodeDictionary,
+    dictionary_frame,
+    write_code_dictionary,
+)
+from medical_codes.tables import CPT_CODE_MASTER, ICD10_CODE_MASTER
+from medical_codes.validation import error_names, validate_claim_lines
+
+
+def icd10_records(codes, headers):
+    rows = []
+    for code, is_header in zip(codes, headers):
+        is_billable, requires_additional_digit = icd10_properties(code)
+        rows.append({
+            'icd10_code': code,
+            'is_billable': is_billable,
+            'is_header': is_header,
+            'requires_additional_digit': requires_additional_digit,
+            'is_active': True,
+            'effective_date': ICD10_CODE_MASTER.constants['effective_date'],
+            'termination_date': None,
+            'category': code[:3],
+        })
+    return pd.DataFrame(rows)
+
+
+def test_order_file_codes_are_valid_for_submission(tmp_path):
+    icd10 = icd10_records(['I10', 'E119', 'T360X1A', 'E11'], [False, False, False, True])
+    cpt = pd.DataFrame({
+        'cpt_code': ['99213'],
+        'is_active': [True],
+        'effective_date': [CPT_CODE_MASTER.constants['effective_date']],
+        'category': ['Evaluation and Management'],
+    })
+    entries = pd.concat([
+        dictionary_frame(icd10, 'icd10_code', 'ICD10', PLACEHOLDER_COLUMNS['icd10_code_master']),
+        dictionary_frame(cpt, 'cpt_code', 'CPT', PLACEHOLDER_COLUMNS['cpt_code_master']),
+    ], ignore_index=True)
+    path = write_code_dictionary(entries, tmp_path / 'code_dictionary.bin')
+
+    with CodeDictionary(path) as dictionary:
+        errors = validate_claim_lines(
+            dictionary,
+            ['99213'] * 4,
+            # Before the table-wide 2026-01-01 ICD-10 effective date
+            ['2025-06-01'] * 4,
+            [['I10', 'E11.9', 'T36.0X1A', 'E11']],
+        )
+
+    assert [error_names(int(mask)) for mask in errors] == [
+        [], [], [], ['diagnosis_not_billable'],
+    ]
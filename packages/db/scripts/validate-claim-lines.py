@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Script to validate a batch of claim lines against the binary code dictionary.
+
+Reads claim lines from a CSV or Parquet file with the claim_line columns
+(cpt_code, service_date, diagnosis_code_1..4, modifier_1..4), checks every
+code in bulk with medical_codes/validation.py against the dictionary written
+by build-code-dictionary.py and writes the lines back out with an
+``errors`` mask and ``error_codes`` column, e.g. for a day's export:
+
+    psql -c "\\copy (SELECT * FROM claim_line WHERE service_date = CURRENT_DATE - 1)
+    TO 'lines.csv' CSV HEADER"
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from medical_codes.dictionary import CodeDictionary
+from medical_codes.modifiers import ModifierCatalog
+from medical_codes.sidecar import MANIFEST_NAME, default_sidecar_dir, read_table_records
+from medical_codes.validation import (
+    CLAIM_LINE_DIAGNOSES,
+    CLAIM_LINE_MODIFIERS,
+    CLAIM_LINE_PROCEDURE,
+    count_errors,
+    error_labels,
+    validate_claim_line_frame,
+)
+
+DB_DIR = Path(__file__).parent.parent
+
+def read_claim_lines(path):
+    """Claim lines from a .csv or .parquet file, codes kept as text."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    text_columns = (CLAIM_LINE_PROCEDURE,) + CLAIM_LINE_DIAGNOSES + CLAIM_LINE_MODIFIERS
+    return pd.read_csv(path, dtype={column: str for column in text_columns})
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(
+        description="Validate claim lines against the code dictionary."
+    )
+    parser.add_argument('input', help="CSV or Parquet file of claim lines")
+    parser.add_argument(
+        '--dictionary',
+        default=str(DB_DIR / "code_dictionary.bin"),
+        help="dictionary file written by build-code-dictionary.py",
+    )
+    parser.add_argument(
+        '--modifier-records',
+        default=str(default_sidecar_dir(DB_DIR / "populate_modifier_codes.sql")),
+        help="modifier_code record directory to check modifier combinations with",
+    )
+    parser.add_argument(
+        '--output',
+        help="write the lines with their errors here (.csv or .parquet)",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to validate the claim lines."""
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("Claim Line Validator")
+    print("=" * 60)
+    print()
+
+    if not Path(args.dictionary).exists():
+        print(f"❌ No dictionary at {args.dictionary}; run build-code-dictionary.py first")
+        sys.exit(1)
+
+    catalog = None
+    if (Path(args.modifier_records) / MANIFEST_NAME).exists():
+        catalog = ModifierCatalog.from_records(
+            read_table_records(args.modifier_records, 'modifier_code')
+        )
+        print(f"✓ Loaded {len(catalog)} modifiers, {len(catalog.groups)} exclusive groups")
+    else:
+        print(f"⚠ No modifier records in {args.modifier_records}; skipping combination checks")
+
+    lines = read_claim_lines(args.input)
+    print(f"✓ Read {len(lines)} claim lines from {args.input}")
+
+    with CodeDictionary(args.dictionary) as dictionary:
+        started = time.perf_counter()
+        try:
+            errors = validate_claim_line_frame(dictionary, lines, catalog)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        seconds = time.perf_counter() - started
+
+    invalid = int((errors != 0).sum())
+    rate = len(lines) / max(seconds, 1e-9)
+    print(f"\n✅ Validated {len(lines)} lines in {seconds:.2f}s ({rate:,.0f} lines/s)")
+    print(f"📊 {invalid} lines with errors, {len(lines) - invalid} valid")
+    for name, count in count_errors(errors).items():
+        if count:
+            print(f"  {name}: {count}")
+
+    if args.output:
+        lines['errors'] = errors
+        lines['error_codes'] = error_labels(errors)
+        output = Path(args.output)
+        if output.suffix == '.parquet':
+            lines.to_parquet(output, index=False)
+        else:
+            lines.to_csv(output, index=False)
+        print(f"\n✓ Wrote validated lines to {output}")
+
+if __name__ == "__main__":
+    main()